@@ -6,18 +6,46 @@ import pandas as pd
 import numpy as np
 import math
 from dotenv import load_dotenv
+from comment_cache import CommentCache, CommentPrefetcher, market_signature
+from local_commenter import LocalCommenter
+from metrics import METRICS
 
 # Load env variables
 load_dotenv()
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL")
+# Streaming SSE: le footer se remplit au fil des tokens (OPENROUTER_STREAM=0 pour couper)
+OPENROUTER_STREAM = os.getenv("OPENROUTER_STREAM", "1") not in ("0", "false", "")
 
 HISTORY_PATH = "ai_market_comments.json"  # persiste l'historique
 MAX_HISTORY = 15
 SERIES_POINTS = 40      # nb de points 'Close' par bière envoyés à l'IA
 THROTTLE_SECONDS = 30   # délai mini entre deux requêtes IA
+CONNECT_TIMEOUT = 5     # s, établissement TCP+TLS
+READ_TIMEOUT = 30       # s, entre deux octets reçus
+MAX_RETRIES = 2         # nouvelles tentatives sur erreur de connexion / 429 / 5xx
+BACKOFF_SECONDS = 0.5   # 0.5 s, 1 s, 2 s...
+STREAM_REFRESH = 0.1    # s, intervalle mini entre deux rafraîchissements du footer
+# Schéma envoyé au LLM: "v1" (séries horodatées) ou "v2" (compact, delta-encodé)
+PAYLOAD_SCHEMA = os.getenv("AI_PAYLOAD_SCHEMA", "v1")
+TOP_MOVERS = int(os.getenv("AI_TOP_MOVERS", "0"))   # v2: séries seulement pour les N plus gros mouvements (0 = toutes)
+PAYLOAD_DUMP_DIR = os.getenv("AI_PAYLOAD_DUMP")      # si défini, chaque payload v1 y est enregistré
+PRICE_QUANTUM = 0.01    # v2: prix en centimes
+SLOW_SECONDS = 4        # au-delà, on affiche un commentaire en cache en attendant
+PREFETCH = os.getenv("AI_PREFETCH", "1") not in ("0", "false", "")
+# "auto": commentaire local à chaque tick + OpenRouter par-dessus si la clé est valide;
+# "local": jamais d'appel réseau (hors-ligne)
+AI_MODE = os.getenv("AI_MODE", "auto")
+TENUE_DISTANT = 20      # s pendant lesquelles un commentaire OpenRouter reste affiché
+
+V2_SCHEMA_HINT = (
+    "Format des données (beer-market-v2) : `cols` nomme les champs de `f` de chaque bière "
+    "(dernier prix, variations % sur 1, 5 et 30 bougies, volatilité). `c` = série des clôtures en "
+    "centimes, delta-encodée : premier nombre = prix initial, puis écarts successifs. Les séries "
+    "finissent toutes à la dernière bougie ; un point toutes les `step_s` secondes depuis `t0`."
+)
 
 def dfs_from_l_bieres(l_bieres):
     """Construit un dict {nom_biere: df} depuis ta liste d'objets."""
@@ -137,6 +165,82 @@ def build_ai_payload_from_dfs(dfs: dict, history:list=None,
     return payload
 
 
+def build_ai_payload_from_features(features: dict, history:list=None, round_dec:int=3):
+    """
+    features: {"Corona": FeatureTracker, ...} tenus à jour à chaque tick.
+    Même schéma que build_ai_payload_from_dfs, sans relire l'historique: on ne
+    fait que sérialiser les valeurs déjà calculées.
+    """
+    payload = {
+        "schema": "beer-market-v1",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "series_points": max((ft.window for ft in features.values()), default=SERIES_POINTS),
+        "beers": [],
+        "history": (history or [])[-15:]
+    }
+    for name, ft in features.items():
+        if ft is None or len(ft) < 2:
+            continue
+        payload["beers"].append({
+            "name": str(name),
+            "features": ft.features(round_dec),
+            "series": ft.series(round_dec)
+        })
+    return payload
+
+
+def _iso_to_epoch(ts):
+    return datetime.fromisoformat(ts).timestamp()
+
+
+def compact_payload(payload: dict, top_movers:int=0, quantum:float=PRICE_QUANTUM):
+    """
+    Convertit un payload beer-market-v1 en beer-market-v2:
+      - une seule base de temps (t0) et un pas fixe (step_s) au lieu d'un horodatage par point;
+      - clôtures quantifiées (centimes) et delta-encodées;
+      - features en tableau positionnel (cols);
+      - top_movers > 0: séries seulement pour les N bières qui bougent le plus (|ch_5|).
+    """
+    cols = ["last", "ch_1", "ch_5", "ch_30", "vol"]
+    beers = payload.get("beers", [])
+    longest = max(beers, key=lambda b: len(b["series"]), default=None)
+    t0, step = None, None
+    if longest is not None and longest["series"]:
+        ts = [_iso_to_epoch(p["t"]) for p in longest["series"]]
+        t0 = longest["series"][0]["t"]
+        steps = np.diff(ts)
+        step = int(round(float(np.median(steps)))) if len(steps) else 0
+
+    with_series = {b["name"] for b in beers}
+    if top_movers and top_movers < len(beers):
+        def move(b):
+            f = b["features"]
+            v = f.get("ch_5") if f.get("ch_5") is not None else f.get("ch_1")
+            return abs(v) if v is not None else 0.0
+        with_series = {b["name"] for b in sorted(beers, key=move, reverse=True)[:top_movers]}
+
+    out_beers = []
+    for b in beers:
+        f = b["features"]
+        entry = {"n": b["name"],
+                 "f": [None if f.get("last") is None else round(f["last"], 2)]
+                      + [f.get(c) for c in cols[1:]]}
+        if b["name"] in with_series:
+            q = [int(round(p["c"] / quantum)) for p in b["series"]]
+            entry["c"] = q[:1] + [q[i] - q[i - 1] for i in range(1, len(q))]
+        out_beers.append(entry)
+
+    return {
+        "schema": "beer-market-v2",
+        "timestamp": payload.get("timestamp"),
+        "t0": t0,
+        "step_s": step,
+        "cols": cols,
+        "beers": out_beers,
+        "history": payload.get("history", []),
+    }
+
+
 """
 def build_ai_payload_from_dfs(dfs: dict, history:list=None,
                               series_points:int=SERIES_POINTS, round_dec:int=3):
@@ -224,38 +328,146 @@ class AICommenter:
         self._busy = False
         self._last_ts = 0
         self._history = self._load_history()
-
-    def update_footer_async(self, root, footer_label, dfs:dict):
-        """Appelle l'IA en thread puis met à jour le footer via root.after()."""
+        self.stream = OPENROUTER_STREAM
+        self.payload_schema = PAYLOAD_SCHEMA
+        self.top_movers = TOP_MOVERS
+        self._lock = threading.Lock()
+        # Cache par état du marché + pré-génération quand le réseau est libre
+        self.cache = CommentCache()
+        self.last_payload = None
+        self.last_network_activity = 0.0
+        self._prefetcher = CommentPrefetcher(self) if PREFETCH else None
+        # Socle local: le footer bouge à chaque tick, même sans réseau
+        self.local = LocalCommenter()
+        self.distant = AI_MODE != "local" and bool(api_key) and api_key != "YOUR_OPENROUTER_API_KEY"
+        self._distant_ts = 0.0   # dernier texte OpenRouter affiché (time.time())
+        # Session keep-alive: une seule poignée de main TCP+TLS pour toute la soirée
+        self._session = requests.Session()
+        self._session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+    def update_footer_local(self, footer_label, features:dict):
+        """
+        Commentaire local (thread Tk, < 1 ms) à chaque tick, sauf si un commentaire
+        OpenRouter est affiché depuis moins de TENUE_DISTANT s ou en train d'arriver.
+        """
+        if time.time() - self._distant_ts < TENUE_DISTANT:
+            return
+        with METRICS.mesure("ia_local"):
+            texte = self.local.comment_features(features)
+        footer_label.config(text=texte)
+
+    def _affiche_distant(self, root, footer_label, texte):
+        self._distant_ts = time.time()
+        root.after(0, lambda: footer_label.config(text=texte))
+
+    def update_footer_async(self, root, footer_label, dfs:dict=None, features:dict=None):
+        """
+        Appelle l'IA en thread puis met à jour le footer via root.after().
+        features: {nom: FeatureTracker}; le payload est alors construit ici (thread Tk,
+        coût négligeable) pour ne pas lire les trackers pendant qu'ils bougent.
+        Sans clé ou en mode local, ne fait rien: le commentaire local suffit.
+        """
+        if not self.distant:
+            return
         now = time.time()
-        if self._busy or (now - self._last_ts) < THROTTLE_SECONDS:
+        if (now - self._last_ts) < THROTTLE_SECONDS or not self.try_acquire():
             return
-        self._busy = True
         self._last_ts = now
+        if self._prefetcher is not None and not self._prefetcher.is_alive():
+            self._prefetcher.start()
+        ready = None
+        if features is not None:
+            with METRICS.mesure("ia_payload"):
+                ready = build_ai_payload_from_features(features, history=self._history)
+
+        last_refresh = [0.0]
+        state = {"done": False, "tokens": False, "sig": None, "t0": 0.0}
+
+        def on_token(partial):
+            # Rafraîchit le footer au plus toutes les STREAM_REFRESH s
+            if not state["tokens"]:
+                METRICS.observe("ia_premier_token", time.perf_counter() - state["t0"])
+            state["tokens"] = True
+            t = time.time()
+            if t - last_refresh[0] >= STREAM_REFRESH:
+                last_refresh[0] = t
+                self._affiche_distant(root, footer_label, partial)
+
+        def show_cached_if_slow():
+            # Appel lent: on affiche tout de suite un commentaire déjà généré pour cet état
+            if state["done"] or state["tokens"]:
+                return
+            cached = self.cache.get(state["sig"])
+            if cached:
+                self._distant_ts = time.time()
+                footer_label.config(text=cached)
 
         def worker():
             try:
-                payload = build_ai_payload_from_dfs(dfs, history=self._history)
-                comment = self._call_openrouter(payload)
+                if ready is None:
+                    with METRICS.mesure("ia_payload"):
+                        payload = build_ai_payload_from_dfs(dfs, history=self._history)
+                else:
+                    payload = ready
+                self.last_payload = payload
+                state["sig"] = market_signature(payload)
+                state["t0"] = time.perf_counter()
+                with METRICS.mesure("ia_appel"):
+                    comment = self.comment_for(payload, on_token=on_token if self.stream else None)
                 print("---------------------------------")
                 print(comment)
                 print("---------------------------------")
                 if comment:
                     self._push_history(comment)
-                    root.after(0, lambda c=comment: footer_label.config(text=c))
+                    self.cache.put(state["sig"], comment)
+                    self._affiche_distant(root, footer_label, comment)
             except Exception as e:
 
                 print(e)
 
-                msg = f"IA: {e}"
-                root.after(0, lambda m=msg: footer_label.config(text=m))
+                # Échec: commentaire en cache pour cet état, sinon le commentaire local continue
+                cached = self.cache.get(state["sig"])
+                if cached:
+                    self._affiche_distant(root, footer_label, cached)
             finally:
-                self._busy = False
-
+                state["done"] = True
+                self.release()
 
+        root.after(int(SLOW_SECONDS * 1000), show_cached_if_slow)
         threading.Thread(target=worker, daemon=True).start()
 
-    def _call_openrouter(self, payload: dict) -> str:
+    def try_acquire(self) -> bool:
+        """Réserve l'accès réseau (un seul appel IA à la fois, prefetch compris)."""
+        with self._lock:
+            if self._busy:
+                return False
+            self._busy = True
+            return True
+
+    def release(self):
+        with self._lock:
+            self._busy = False
+            self.last_network_activity = time.time()
+
+    def comment_for(self, payload: dict, on_token=None, anticipe=False) -> str:
+        """
+        Payload v1 -> commentaire (conversion v2 et enregistrement selon la config).
+        anticipe: état hypothétique (prefetch), pas enregistré et commenté sans chiffres.
+        """
+        if not anticipe:
+            self._dump_payload(payload)
+        if self.payload_schema == "v2":
+            payload = compact_payload(payload, top_movers=self.top_movers)
+        return self._call_openrouter(payload, on_token=on_token, sans_chiffres=anticipe)
+
+    def _call_openrouter(self, payload: dict, on_token=None, sans_chiffres=False) -> str:
+        """
+        Appelle OpenRouter et retourne le commentaire.
+        on_token: si fourni, réponse en streaming SSE et on_token(texte_partiel)
+        est appelé à chaque morceau reçu.
+        sans_chiffres: interdit prix et pourcentages (les chiffres du payload sont inventés).
+        """
         if not self.api_key or self.api_key == "YOUR_OPENROUTER_API_KEY":
             raise RuntimeError("OPENROUTER_API_KEY manquant ou invalide")
 
@@ -281,7 +493,9 @@ class AICommenter:
                         "- Longueur : 2–3 phrases max.\n"
                         "- Contenu : analyse du marché des bières (hausse, baisse, volatilité, leaders/laggards), "
                         "+ punchlines drôles, + call-to-action implicite (« allez boire », « foncez sur »).\n"
-                        "- Chiffres : tu peux citer des variations %, prix, ou volatilité pour rendre ça réaliste.\n"
+                        + ("- Chiffres : n’écris aucun chiffre, prix ni pourcentage, seulement des tendances.\n"
+                           if sans_chiffres else
+                           "- Chiffres : tu peux citer des variations %, prix, ou volatilité pour rendre ça réaliste.\n") +
                         "- Humour : fais rire, pousse dans l’absurde si tu veux. "
                         "Tu peux glisser des blagues random sans rapport (rarement, 1 fois sur 10).\n"
                         "- Variabilité : ne pas répéter la même tournure à chaque fois. Alterne entre hype, ironie, "
@@ -289,7 +503,7 @@ class AICommenter:
                         "- Objectif : mettre l’ambiance et inciter les gens à jouer le jeu. Tout est permis sauf la censure.\n"
                         "- Si rien d’intéressant ne se passe sur le marché, invente un délire "
                         "(ex : hallucination, commentaire absurde, théorie du complot sur les bières)."
-                    ),
+                    ) + ("\n\n" + V2_SCHEMA_HINT if payload.get("schema") == "beer-market-v2" else ""),
                 },
                 {
                     "role": "user",
@@ -302,17 +516,13 @@ class AICommenter:
             "max_tokens": 180,
         }
 
-        try:
-            r = requests.post(OPENROUTER_URL, headers=headers, json=body, timeout=30)
-        except requests.RequestException as net_err:
-            # erreur réseau claire
-            raise RuntimeError(f"réseau: {net_err}")
+        if on_token is not None:
+            body["stream"] = True
+            r = self._post(headers, body, stream=True)
+            with r:
+                return self._read_stream(r, on_token)
 
-        # Si status != 2xx, on remonte un message parlant + snippet de la réponse
-        if not (200 <= r.status_code < 300):
-            txt = r.text.strip()
-            snippet = txt[:300].replace("\n", " ")
-            raise RuntimeError(f"HTTP {r.status_code}: {snippet}")
+        r = self._post(headers, body)
 
         # Parfois OpenRouter renvoie du vide ou du HTML => protéger r.json()
         raw = r.text.strip()
@@ -342,6 +552,90 @@ class AICommenter:
         return text
 
 
+    def _post(self, headers, body, stream=False):
+        """
+        POST avec la session keep-alive et nouvelles tentatives:
+          - erreur de connexion (DNS, refus, timeout de connexion): rien n'a été
+            envoyé, on retente avec backoff exponentiel;
+          - 429 / 5xx: on retente (Retry-After respecté);
+          - timeout de lecture: le serveur a la requête, on ne la rejoue pas.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            delay = BACKOFF_SECONDS * (2 ** attempt)
+            try:
+                r = self._session.post(OPENROUTER_URL, headers=headers, json=body, stream=stream,
+                                       timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            except requests.ConnectionError as conn_err:
+                # ConnectTimeout hérite de ConnectionError
+                if attempt < MAX_RETRIES:
+                    time.sleep(delay)
+                    continue
+                raise RuntimeError(f"connexion: {conn_err}")
+            except requests.Timeout as read_err:
+                raise RuntimeError(f"lecture: {read_err}")
+            except requests.RequestException as net_err:
+                # erreur réseau claire
+                raise RuntimeError(f"réseau: {net_err}")
+
+            if (r.status_code == 429 or r.status_code >= 500) and attempt < MAX_RETRIES:
+                try:
+                    delay = max(delay, float(r.headers.get("Retry-After", 0)))
+                except ValueError:
+                    pass
+                r.close()
+                time.sleep(delay)
+                continue
+
+            # Si status != 2xx, on remonte un message parlant + snippet de la réponse
+            if not (200 <= r.status_code < 300):
+                txt = r.text.strip()
+                snippet = txt[:300].replace("\n", " ")
+                raise RuntimeError(f"HTTP {r.status_code}: {snippet}")
+            return r
+
+    def _read_stream(self, r, on_token):
+        """Lit le flux SSE (lignes 'data: {...}', fin sur 'data: [DONE]')."""
+        parts = []
+        try:
+            for line in r.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue   # lignes vides / commentaires keep-alive (": OPENROUTER PROCESSING")
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    continue
+                if "error" in chunk:
+                    raise RuntimeError(f"flux: {chunk['error']}")
+                try:
+                    delta = chunk["choices"][0].get("delta", {}).get("content") or ""
+                except (KeyError, IndexError, AttributeError):
+                    continue
+                if delta:
+                    parts.append(delta)
+                    on_token("".join(parts))
+        except requests.RequestException as read_err:
+            raise RuntimeError(f"lecture: {read_err}")
+
+        text = "".join(parts).strip()
+        if not text:
+            raise RuntimeError("réponse vide (flux)")
+        return text
+
+    def _dump_payload(self, payload: dict):
+        """Enregistre le payload v1 (pour benchmarks/payload_size.py)."""
+        if not PAYLOAD_DUMP_DIR:
+            return
+        try:
+            os.makedirs(PAYLOAD_DUMP_DIR, exist_ok=True)
+            path = os.path.join(PAYLOAD_DUMP_DIR, f"payload_{int(time.time() * 1000)}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+        except OSError:
+            pass
+
     def _load_history(self):
         try:
             with open(self.history_path, "r", encoding="utf-8") as f:
@@ -0,0 +1,64 @@
+"""
+Temps de construction du payload IA en fonction de la longueur de l'historique:
+build_ai_payload_from_dfs (DataFrame complet) vs build_ai_payload_from_features.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_ai_payload --historiques 40 400 4000 40000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from ai_commenter import SERIES_POINTS, build_ai_payload_from_dfs, build_ai_payload_from_features
+from market_features import FeatureTracker
+from ohlc_store import OHLCStore
+
+
+def marche(n_bieres, n_bougies, seed=0):
+    """Même séquence que biere: nouvelle bougie puis 3 mises à jour de clôture."""
+    rng = np.random.default_rng(seed)
+    t = datetime(2025, 1, 1, 20)
+    stores = {f"b{i}": OHLCStore(n_bougies) for i in range(n_bieres)}
+    trackers = {nom: FeatureTracker(SERIES_POINTS) for nom in stores}
+    prix = np.full(n_bieres, 3.0)
+    for _ in range(n_bougies):
+        t += timedelta(minutes=1)
+        for p, (nom, s) in zip(prix, stores.items()):
+            s.append(t, p, p, p, p)
+            trackers[nom].nouvelle_bougie(t, p)
+        for _ in range(3):
+            prix *= np.exp(rng.normal(0, 0.01, n_bieres))
+            for p, (nom, s) in zip(prix, stores.items()):
+                _, o, h, l, c, v = s.last()
+                s.update_last(high=max(h, p), low=min(l, p), close=p)
+                trackers[nom].maj_close(p)
+    return {nom: s.frame() for nom, s in stores.items()}, trackers
+
+
+def chrono(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        out = fn()
+    return (time.perf_counter() - t0) / n, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--historiques", type=int, nargs="+", default=[40, 400, 4000, 40000])
+    parser.add_argument("--bieres", type=int, default=15)
+    parser.add_argument("-n", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'bougies':>8} {'dfs ms':>10} {'features ms':>12} {'gain':>7}  identiques")
+    for h in args.historiques:
+        dfs, trackers = marche(args.bieres, h)
+        t_df, p_df = chrono(lambda: build_ai_payload_from_dfs(dfs), args.n)
+        t_ft, p_ft = chrono(lambda: build_ai_payload_from_features(trackers), args.n)
+        ok = p_df["beers"] == p_ft["beers"]
+        print(f"{h:>8} {t_df * 1e3:>10.2f} {t_ft * 1e3:>12.3f} {t_df / t_ft:>6.0f}x  {ok}")
+
+
+if __name__ == "__main__":
+    main()
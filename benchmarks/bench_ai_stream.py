@@ -0,0 +1,57 @@
+"""
+Temps avant le premier texte affiché: requests.post sans session (ancien chemin)
+vs AICommenter avec session keep-alive + streaming SSE, contre un faux OpenRouter local.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_ai_stream --latence 0.4 --tokens 60 --delai-token 0.03
+"""
+import argparse
+import time
+
+import numpy as np
+import requests
+
+import ai_commenter
+from ai_commenter import AICommenter
+from benchmarks.openrouter_stub import OpenRouterStub
+
+PAYLOAD = {"schema": "beer-market-v1", "beers": [], "history": []}
+
+
+def ancien(url):
+    """Chemin d'origine: nouvelle connexion, réponse complète avant affichage."""
+    t0 = time.perf_counter()
+    r = requests.post(url, json={"model": "m", "messages": []}, timeout=30)
+    r.json()["choices"][0]["message"]["content"]
+    dt = time.perf_counter() - t0
+    return dt, dt
+
+
+def nouveau(ai):
+    premier = []
+    t0 = time.perf_counter()
+    ai._call_openrouter(PAYLOAD, on_token=lambda _: premier or premier.append(time.perf_counter() - t0))
+    return premier[0], time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latence", type=float, default=0.4, help="délai serveur avant le 1er token (s)")
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--delai-token", type=float, default=0.03)
+    parser.add_argument("-n", type=int, default=5)
+    args = parser.parse_args()
+
+    with OpenRouterStub(args.latence, args.tokens, args.delai_token) as stub:
+        ai_commenter.OPENROUTER_URL = stub.url
+        ai = AICommenter(model="stub", api_key="test", history_path="/dev/null")
+        res = {"requests.post": [ancien(stub.url) for _ in range(args.n)],
+               "session + SSE": [nouveau(ai) for _ in range(args.n)]}
+    for nom, mesures in res.items():
+        ttft, total = np.array(mesures).T
+        print(f"{nom:>14}: 1er texte {np.median(ttft) * 1000:7.0f} ms   "
+              f"commentaire complet {np.median(total) * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark moteur de prix: boucles biere.achat/vente vs MarketEngine.applique.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_engine --tailles 15 100 1000
+"""
+import argparse
+import time
+from random import seed as py_seed
+
+import numpy as np
+
+from hh_bourse_v2 import biere
+from market_engine import MarketEngine
+
+
+def _legacy(n):
+    # Les vraies bières de l'appli (l'import ne se connecte plus à Google)
+    l = [biere(3.0, f"b{i}", 33, 5.0, 0.03, 1, i + 1, None) for i in range(n)]
+    for i in range(n):
+        l[i].liste_b(l[:i] + l[i+1:])
+    return l
+
+
+def _ventes(n, ticks, rng):
+    # Même générateur que le chemin commenté `n = randint(0,2)`
+    return rng.integers(0, 3, size=(ticks, n))
+
+
+def bench_legacy(n, ventes, budget):
+    """Temps moyen par tick; au-delà du budget on extrapole depuis un tick partiel."""
+    l = _legacy(n)
+    cumul = np.zeros(n, dtype=np.int64)
+    t0 = time.perf_counter()
+    faits = 0
+    for row in ventes:
+        cumul += row
+        t_tick = time.perf_counter()
+        for idx, (b, v) in enumerate(zip(l, cumul)):
+            b.actualise(int(v))
+            if faits == 0 and time.perf_counter() - t0 > budget:
+                # Coût ~ proportionnel au nombre de bières vendues traitées
+                partiel = max(1, int((row[:idx + 1] > 0).sum()))
+                total = max(1, int((row > 0).sum()))
+                return (time.perf_counter() - t_tick) * total / partiel, 0
+        faits += 1
+        if time.perf_counter() - t0 > budget:
+            break
+    return (time.perf_counter() - t0) / faits, faits
+
+
+def bench_engine(n, ventes):
+    moteur = MarketEngine(np.full(n, 3.0), seed=0)
+    t0 = time.perf_counter()
+    for row in ventes:
+        moteur.applique(row)
+    return (time.perf_counter() - t0) / len(ventes)
+
+
+def check_stats(n=15, ticks=3000):
+    """Compare moyenne/écart-type des log-rendements par tick des deux chemins."""
+    rng = np.random.default_rng(1)
+    py_seed(1)
+    ventes = _ventes(n, ticks, rng)
+    l = _legacy(n)
+    moteur = MarketEngine(np.full(n, 3.0), seed=1)
+    r_leg, r_eng = [], []
+    cumul = np.zeros(n, dtype=np.int64)
+    for row in ventes:
+        avant = np.array([b.prix for b in l])
+        cumul += row
+        for b, v in zip(l, cumul):
+            b.actualise(int(v))
+        r_leg.append(np.log(np.array([b.prix for b in l]) / avant))
+        r_eng.append(moteur.log_facteurs(row))
+    r_leg, r_eng = np.concatenate(r_leg), np.concatenate(r_eng)
+    print(f"log-rendement/tick N={n}: legacy moy={r_leg.mean():+.5f} std={r_leg.std():.5f} | "
+          f"moteur moy={r_eng.mean():+.5f} std={r_eng.std():.5f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", type=int, nargs="+", default=[15, 100, 1000])
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="temps max (s) pour le chemin legacy par taille")
+    args = parser.parse_args()
+
+    check_stats()
+    rng = np.random.default_rng(0)
+    print(f"{'N':>6} {'legacy ms/tick':>16} {'moteur ms/tick':>16} {'gain':>8}")
+    for n in args.tailles:
+        ventes = _ventes(n, args.ticks, rng)
+        t_leg, faits = bench_legacy(n, ventes, args.budget)
+        t_eng = bench_engine(n, ventes)
+        if faits == 0:
+            note = "  (legacy extrapolé d'un tick partiel)"
+        else:
+            note = "" if faits == args.ticks else f"  ({faits} ticks legacy)"
+        print(f"{n:>6} {t_leg * 1e3:>16.3f} {t_eng * 1e3:>16.3f} {t_leg / t_eng:>7.0f}x{note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Coût d'une salle de plus: N salles de 15 bières dans un MarketHost vs un process par salle.
+
+Chaque mesure tourne dans un process neuf (classeur en mémoire, un onglet de ventes
+par salle, latence Sheets simulée): RSS après N ticks, temps du tick de ventes pour
+toutes les salles, appels Sheets de lecture par tick (un values_batch_get groupé).
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_host --salles 4 16 --ticks 200 --latence 0.15
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+
+def _rss_mo():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+class _Source:
+    """Un classeur: onglets ventes_<k> et ohlc_<k>, comme un bar qui ajoute ses salles en onglets."""
+
+    def __init__(self, n, latence):
+        from fake_sheet import FakeSpreadsheet, FakeWorksheet
+        onglets = [FakeWorksheet(title=f"{kind}_{k}") for k in range(n) for kind in ("ventes", "ohlc")]
+        self.classeur = FakeSpreadsheet(onglets, latence=latence)
+
+    def feuille(self, ref):
+        return self.classeur.worksheet(ref)
+
+
+def _run(n, ticks, latence, out):
+    os.environ["BOURSE_SHM"] = f"bench_host_{os.getpid()}"
+    os.environ["BOURSE_SHEET_OHLC"] = "0"
+    from catalogue import CATALOGUE
+    from market_host import MarketHost
+
+    dossier = tempfile.mkdtemp(prefix="bench_host_")
+    try:
+        src = _Source(n, latence)
+        configs = [{"nom": f"salle_{k}", "source": "fake", "ventes": f"ventes_{k}", "ohlc": f"ohlc_{k}"}
+                   for k in range(n)]
+        host = MarketHost(configs, port=0, dossier=dossier, sources={("fake", None): src})
+        rng = np.random.default_rng(0)
+        ventes = np.zeros((n, len(CATALOGUE)), dtype=np.int64)
+        lecture, tick = [], []
+        for t in range(ticks):
+            ventes += rng.integers(0, 2, ventes.shape)
+            for k in range(n):
+                ws = src.classeur.worksheet(f"ventes_{k}")
+                for (_, _, _, _, _, i, j), v in zip(CATALOGUE, ventes[k].tolist()):
+                    ws.set(i, j, v)
+            t0 = time.perf_counter()
+            host.ingestion.poll_once()
+            t1 = time.perf_counter()
+            if t % 4 == 0:
+                host.tache_bougie()
+            host.tache_ventes()
+            lecture.append(t1 - t0)
+            tick.append(time.perf_counter() - t1)
+        rss = _rss_mo()
+        appels = src.classeur.appels["values_batch_get"]
+        host.close()
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+    out.put((rss, np.median(lecture), np.median(tick), appels / ticks))
+
+
+def mesure(n, ticks, latence):
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_run, args=(n, ticks, latence, q))
+    p.start()
+    res = q.get()
+    p.join()
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--salles", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--latence", type=float, default=0.15, help="latence d'un appel Sheets (s)")
+    args = parser.parse_args()
+
+    rss_1, lect_1, tick_1, _ = mesure(1, args.ticks, args.latence)
+    print(f"1 salle par process: RSS {rss_1:.0f} Mo, relevé {lect_1 * 1e3:.0f} ms, tick {tick_1 * 1e3:.2f} ms")
+    for n in args.salles:
+        rss, lect, tick, appels = mesure(n, args.ticks, args.latence)
+        print(f"{n:>3} salles, 1 hôte: RSS {rss:6.0f} Mo (vs {n * rss_1:6.0f} Mo en {n} process, "
+              f"+{(rss - rss_1) / max(n - 1, 1):.1f} Mo/salle)  relevé {lect * 1e3:5.0f} ms "
+              f"({appels:.0f} appel/tick vs {n})  tick {tick * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Temps d'import de hh_bourse_v2 (process neuf à chaque mesure).
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_import                 # arbre courant
+    python -m benchmarks.bench_import --ref 9ea2568   # compare avec une révision git
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def mesure(cwd, repetitions, module="hh_bourse_v2"):
+    temps, erreur = [], None
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONDONTWRITEBYTECODE="1")
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        r = subprocess.run([sys.executable, "-c", f"import {module}"], cwd=cwd, env=env,
+                           capture_output=True, text=True)
+        temps.append(time.perf_counter() - t0)
+        if r.returncode != 0:
+            erreur = r.stderr.strip().splitlines()[-1]
+    return np.array(temps), erreur
+
+
+def _affiche(nom, temps, erreur):
+    print(f"{nom:>14}: médiane {np.median(temps) * 1000:7.0f} ms  min {temps.min() * 1000:7.0f} ms"
+          + (f"  (échec: {erreur})" if erreur else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ref", help="révision git à comparer (extraite dans un dossier temporaire)")
+    parser.add_argument("-n", type=int, default=5)
+    args = parser.parse_args()
+
+    base, _ = mesure(RACINE, args.n, module="matplotlib.pyplot, mplfinance, pandas")
+    _affiche("dépendances", base, None)
+    _affiche("courant", *mesure(RACINE, args.n))
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            archive = subprocess.run(["git", "archive", args.ref], cwd=RACINE,
+                                     capture_output=True, check=True).stdout
+            subprocess.run(["tar", "-x", "-C", tmp], input=archive, check=True)
+            _affiche(args.ref, *mesure(tmp, args.n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark lecture des ventes: 15 worksheet.cell() vs un seul batch_get.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_ingestion --latence 0.08 --ticks 20
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+from fake_sheet import FakeWorksheet
+from sales_ingestion import SalesReader
+
+# Même disposition que le __main__ de hh_bourse_v2 (3 lignes x 5 colonnes)
+COORDS = [(i, j) for j in (1, 4, 7, 10, 13) for i in (1, 11, 21)]
+
+
+def _bieres(n=15):
+    return [SimpleNamespace(nom=f"b{k}", i=i, j=j) for k, (i, j) in enumerate(COORDS[:n])]
+
+
+def _feuille(l_bieres, latence):
+    return FakeWorksheet({(b.i, b.j): 3 * k for k, b in enumerate(l_bieres)}, latence=latence)
+
+
+def tick_cellule(ws, l_bieres):
+    return {b.nom: int(ws.cell(b.i, b.j).value) for b in l_bieres}
+
+
+def tick_batch(lecteur):
+    return lecteur.lire()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latence", type=float, default=0.08, help="latence simulée par appel (s)")
+    parser.add_argument("--ticks", type=int, default=10)
+    args = parser.parse_args()
+
+    l_bieres = _bieres()
+
+    ws = _feuille(l_bieres, args.latence)
+    t0 = time.perf_counter()
+    for _ in range(args.ticks):
+        ref = tick_cellule(ws, l_bieres)
+    dt_cell = (time.perf_counter() - t0) / args.ticks
+    n_cell = sum(ws.appels.values()) / args.ticks
+
+    ws = _feuille(l_bieres, args.latence)
+    lecteur = SalesReader(ws, l_bieres)
+    t0 = time.perf_counter()
+    for _ in range(args.ticks):
+        out = tick_batch(lecteur)
+    dt_batch = (time.perf_counter() - t0) / args.ticks
+    n_batch = sum(ws.appels.values()) / args.ticks
+
+    assert out == ref, "les deux chemins doivent lire les mêmes compteurs"
+    print(f"latence simulée : {args.latence * 1000:.0f} ms/appel, {len(l_bieres)} bières")
+    print(f"cell()     : {n_cell:4.0f} appels/tick  {dt_cell * 1000:8.1f} ms/tick")
+    print(f"batch_get  : {n_batch:4.0f} appels/tick  {dt_batch * 1000:8.1f} ms/tick")
+    print(f"gain       : x{dt_cell / dt_batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Temps du commentaire local (LocalCommenter.comment_features) par tick, comparé au
+seul payload IA (build_ai_payload_from_features), et quelques commentaires produits.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_local_comment --bieres 15 100 500 --ticks 2000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from ai_commenter import SERIES_POINTS, build_ai_payload_from_features
+from local_commenter import LocalCommenter
+from market_features import FeatureTracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bieres", type=int, nargs="+", default=[15, 100, 500])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--exemples", type=int, default=6, help="commentaires affichés (15 bières)")
+    args = parser.parse_args()
+
+    for n in args.bieres:
+        rng = np.random.default_rng(n)
+        trackers = {f"Biere{i}": FeatureTracker(SERIES_POINTS) for i in range(n)}
+        prix = np.full(n, 3.0)
+        t = datetime(2025, 1, 1, 20)
+        local = LocalCommenter(seed=0)
+        temps_local, temps_payload, exemples = [], [], []
+        for k in range(args.ticks):
+            # Marché tantôt calme, tantôt agité, avec des bières qui décrochent
+            sigma = 0.002 if (k // 200) % 2 == 0 else 0.03
+            prix *= np.exp(rng.normal(0, sigma, n))
+            if k % 4 == 0:
+                t += timedelta(minutes=1)
+                for p, ft in zip(prix, trackers.values()):
+                    ft.nouvelle_bougie(t, p)
+            else:
+                for p, ft in zip(prix, trackers.values()):
+                    ft.maj_close(p)
+            t0 = time.perf_counter()
+            texte = local.comment_features(trackers)
+            t1 = time.perf_counter()
+            build_ai_payload_from_features(trackers)
+            temps_payload.append(time.perf_counter() - t1)
+            temps_local.append(t1 - t0)
+            if n == args.bieres[0] and k % (args.ticks // max(args.exemples, 1)) == 0:
+                exemples.append(texte)
+        tl, tp = np.array(temps_local) * 1e3, np.array(temps_payload) * 1e3
+        print(f"{n:>4} bières: local p50 {np.median(tl):.3f} ms, p99 {np.percentile(tl, 99):.3f} ms "
+              f"| payload IA seul p50 {np.median(tp):.3f} ms")
+        for e in exemples:
+            print(f"      « {e} »")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Soirée simulée de bout en bout, hors-ligne: les vraies tâches de hh_bourse_v2
+(ventes, nouvelle bougie, rendu, commentaire, IA) sur des bières synthétiques.
+
+Les fausses dépendances sont locales: FakeWorksheet (latence réglable) pour le
+relevé des ventes et la recopie OHLC, OpenRouterStub pour l'IA, backend Agg à la
+place de Tk. Le temps est simulé: un tick de ventes toutes les 15 s, une bougie
+tous les 4 ticks, l'IA tous les 2 ticks (l'appel précédent est toujours fini).
+
+Chaque taille tourne dans deux process neufs: un pour les temps (registre
+METRICS, échantillons gardés en entier), un pour la mémoire (tracemalloc par
+étape, plus lent, sur --ticks-memoire ticks). Résultats en JSON pour comparer
+deux versions:
+
+    python -m benchmarks.bench_pipeline --bieres 15 100 500 --ticks 1000 --json avant.json
+    python -m benchmarks.bench_pipeline --bieres 15 100 500 --ticks 1000 --compare avant.json
+
+"tick" = tout ce qui tourne sur le thread Tk pendant un tick (tâches ventes,
+bougie, rendu, commentaire local, IA); lecture_sheet, ia_appel et ia_premier_token tournent sur
+leurs propres threads dans l'appli et sont mesurés à part.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
+import mplfinance as mpf
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+FORMAT = 1
+ETAPES_TICK = ("tick", "tache_ventes", "tache_bougie", "tache_rendu", "tache_commentaire", "tache_ia")
+
+
+class _Label:
+    """Remplace tk.Label: garde le dernier texte."""
+
+    def __init__(self):
+        self.text = ""
+
+    def config(self, text=""):
+        self.text = text
+
+
+class _Root:
+    """Remplace la fenêtre Tk pour AICommenter: after() exécute tout de suite."""
+
+    def after(self, ms, fn, *args):
+        fn(*args)
+
+
+def _catalogue(n):
+    """n bières: la carte réelle répétée, compteurs placés comme dans la feuille (lignes 1/11/21)."""
+    from catalogue import CATALOGUE
+    out = []
+    for k in range(n):
+        prix, nom, qte, prc, alpha, _, _ = CATALOGUE[k % len(CATALOGUE)]
+        out.append((prix, nom if k < len(CATALOGUE) else f"{nom} {k}", qte, prc, alpha,
+                    1 + 10 * (k % 3), 1 + 3 * (k // 3)))
+    return out
+
+
+def _alloc(stats, mesure_orig):
+    """METRICS.mesure qui relève aussi l'allocation nette et le pic tracemalloc de chaque étape."""
+    pile = []
+    principal = threading.main_thread()
+
+    @contextlib.contextmanager
+    def mesure(etape):
+        if threading.current_thread() is not principal:
+            with mesure_orig(etape):
+                yield
+            return
+        cur0, pic = tracemalloc.get_traced_memory()
+        if pile:
+            pile[-1][1] = max(pile[-1][1], pic)
+        tracemalloc.reset_peak()
+        entree = [cur0, cur0]
+        pile.append(entree)
+        try:
+            with mesure_orig(etape):
+                yield
+        finally:
+            cur, pic = tracemalloc.get_traced_memory()
+            pic = max(pic, entree[1])
+            pile.pop()
+            if pile:
+                pile[-1][1] = max(pile[-1][1], pic)
+            s = stats.setdefault(etape, [0, 0, 0])
+            s[0] += 1
+            s[1] += cur - cur0
+            s[2] = max(s[2], pic - cur0)
+    return mesure
+
+
+def _run(n_bieres, args, memoire, out):
+    import ai_commenter
+    import hh_bourse_v2 as app
+    from ai_commenter import AICommenter
+    from benchmarks.openrouter_stub import OpenRouterStub
+    from candle_renderer import CandleRenderer
+    from fake_sheet import FakeWorksheet
+    from market_engine import MarketEngine
+    from market_journal import MarketJournal
+    from market_shm import MarketSnapshotWriter
+    from metrics import METRICS
+    from sales_ingestion import IngestionWorker, SalesReader
+    from sheet_writer import SheetWriteBehind
+
+    dossier = tempfile.mkdtemp(prefix="bench_pipeline_")
+    ticks = args.ticks_memoire if memoire else args.ticks
+    n_graphes = min(n_bieres, args.graphes)
+    rng = np.random.default_rng(0)
+    sortie = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sortie), \
+                OpenRouterStub(args.ia_latence, args.ia_tokens, 0.0) as stub:
+            feuille_ventes = FakeWorksheet(latence=args.latence)
+            feuille_ohlc = FakeWorksheet(latence=args.latence)
+            l_bieres = [app.biere(*infos, feuille_ohlc, archive=os.path.join(dossier, "historique"))
+                        for infos in _catalogue(n_bieres)]
+            for i, b in enumerate(l_bieres):
+                b.liste_b(l_bieres[:i] + l_bieres[i+1:])
+            ingestion = IngestionWorker(SalesReader(feuille_ventes, l_bieres))
+            moteur = MarketEngine.from_bieres(l_bieres)
+            journal = MarketJournal(os.path.join(dossier, "bourse.journal"))
+            journal.open()
+            ecriture = SheetWriteBehind(feuille_ohlc)
+            ecriture.start()
+            shm = MarketSnapshotWriter(f"bourse_bench_{os.getpid()}", l_bieres)
+            diffusions = [shm]
+
+            style = app.style_bougies()
+            figs = [mpf.plot(b.bougies.tail(22), type='candle', figsize=(1.45, 1.2), ylabel='',
+                             style=style, returnfig=True) for b in l_bieres[:n_graphes]]
+            l_rendus = [CandleRenderer(axes[0], FigureCanvasAgg(fig), n_bougies=15, style=style)
+                        for fig, axes in figs]
+            l_label = [_Label() for _ in l_bieres]
+
+            ai_commenter.OPENROUTER_URL = stub.url
+            ai_commenter.PREFETCH = False
+            ai = AICommenter(model="stub", api_key="test", history_path=os.path.join(dossier, "ia.json"))
+            root, footer = _Root(), _Label()
+
+            METRICS.fenetre = ticks * max(1, n_graphes) + 16
+            METRICS.reset()
+            allocations = {}
+            if memoire:
+                METRICS.mesure = _alloc(allocations, METRICS.mesure)
+                tracemalloc.start()
+
+            ventes = np.zeros(n_bieres, dtype=np.int64)
+            debut = time.perf_counter()
+            for k in range(ticks):
+                # La caisse écrit dans la feuille, le thread d'ingestion relève (ici en ligne)
+                ventes += rng.integers(0, 3, n_bieres) * (rng.random(n_bieres) < 0.3)
+                for b, v in zip(l_bieres, ventes.tolist()):
+                    feuille_ventes.set(b.i, b.j, v)
+                ingestion.poll_once()
+                if k % args.ia_tous == 0:
+                    # 30 s simulées: l'appel IA précédent est forcément terminé
+                    while ai._busy:
+                        time.sleep(0.001)
+                    ai._last_ts = 0
+                # Pire cas pour le footer (hors-ligne): commentaire local à chaque tick
+                ai._distant_ts = 0.0
+                with METRICS.mesure("tick"):
+                    if k % args.bougie_tous == 0:
+                        with METRICS.mesure("tache_bougie"):
+                            app.tache_bougie(l_bieres, journal, diffusions, ecriture)
+                    with METRICS.mesure("tache_ventes"):
+                        app.tache_ventes(l_bieres, ingestion, moteur, journal, diffusions, None, ecriture)
+                    with METRICS.mesure("tache_rendu"):
+                        app.tache_rendu(l_rendus, l_bieres, l_label)
+                    with METRICS.mesure("tache_commentaire"):
+                        app.tache_commentaire(l_bieres, ai, footer)
+                    if k % args.ia_tous == 0:
+                        with METRICS.mesure("tache_ia"):
+                            app.tache_ia(l_bieres, root, ai, footer)
+            duree = time.perf_counter() - debut
+            while ai._busy:
+                time.sleep(0.001)
+
+            res = {"ticks": ticks, "graphes": n_graphes, "duree_s": duree}
+            if memoire:
+                _, pic = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                res["pic_tracemalloc_mo"] = pic / 1e6
+                res["etapes"] = {nom: {"n": n, "net_ko": net / n / 1e3, "pic_ko": p / 1e3}
+                                 for nom, (n, net, p) in sorted(allocations.items())}
+            else:
+                res["etapes"] = METRICS.snapshot()["etapes"]
+                res["requetes_ia"] = stub.requetes
+                res["appels_sheet"] = {"lecture": feuille_ventes.appels["batch_get"],
+                                       "ecriture": feuille_ohlc.appels["batch_update"]}
+            res["rss_max_mo"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+            ai._session.close()
+            ecriture.stop(timeout=5)
+            journal.close()
+            shm.close()
+            for b in l_bieres:
+                b.historique.close()
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+    out.put(res)
+
+
+def _mesure(n_bieres, args, memoire):
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_run, args=(n_bieres, args, memoire, q))
+    p.start()
+    res = q.get()
+    p.join()
+    return res
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _affiche(res):
+    for n, r in res["resultats"].items():
+        t = r["temps"]
+        print(f"--- {n} bières, {t['ticks']} ticks en {t['duree_s']:.1f} s "
+              f"({t['graphes']} graphes, {t['requetes_ia']} appels IA), RSS max {t['rss_max_mo']:.0f} Mo")
+        m = r.get("memoire", {}).get("etapes", {})
+        print(f"  {'étape':<18}{'moy':>8}{'p50':>8}{'p95':>8}{'max':>8}   {'net ko':>8}{'pic ko':>9}")
+        for nom, s in sorted(t["etapes"].items(), key=lambda x: (x[0] not in ETAPES_TICK, x[0])):
+            a = m.get(nom)
+            mem = f"{a['net_ko']:>8.1f}{a['pic_ko']:>9.0f}" if a else ""
+            print(f"  {nom:<18}{s['moy_ms']:>8.2f}{s['p50_ms']:>8.2f}{s['p95_ms']:>8.2f}"
+                  f"{s['max_ms']:>8.1f}   {mem}")
+        if "memoire" in r:
+            print(f"  pic tracemalloc {r['memoire']['pic_tracemalloc_mo']:.1f} Mo "
+                  f"sur {r['memoire']['ticks']} ticks")
+
+
+def compare(ancien, nouveau, seuil):
+    """Affiche p50/p95 par étape et retourne les régressions au-delà de `seuil` (0.2 = +20%)."""
+    regressions = []
+    print(f"comparaison {ancien.get('commit')} -> {nouveau.get('commit')} (ms, p50 / p95)")
+    for n, r in nouveau["resultats"].items():
+        a = ancien["resultats"].get(n)
+        if a is None:
+            continue
+        print(f"--- {n} bières")
+        for nom, s in sorted(r["temps"]["etapes"].items()):
+            sa = a["temps"]["etapes"].get(nom)
+            if sa is None:
+                continue
+            ratios = []
+            for cle in ("p50_ms", "p95_ms"):
+                ratios.append(s[cle] / sa[cle] if sa[cle] > 0 else 1.0)
+            marque = ""
+            if nom in ETAPES_TICK and ratios[0] > 1 + seuil:
+                marque = "  <-- régression"
+                regressions.append((n, nom, ratios[0]))
+            print(f"  {nom:<18}{sa['p50_ms']:>8.2f} -> {s['p50_ms']:>8.2f} (x{ratios[0]:.2f})"
+                  f"{sa['p95_ms']:>9.2f} -> {s['p95_ms']:>8.2f} (x{ratios[1]:.2f}){marque}")
+        ma, mn = a.get("memoire"), r.get("memoire")
+        if ma and mn:
+            print(f"  pic tracemalloc {ma['pic_tracemalloc_mo']:.1f} -> {mn['pic_tracemalloc_mo']:.1f} Mo")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bieres", type=int, nargs="+", default=[15, 100, 500])
+    parser.add_argument("--ticks", type=int, default=1000, help="ticks de ventes (10000 ≈ 42 h simulées)")
+    parser.add_argument("--ticks-memoire", type=int, default=200, help="ticks de la passe tracemalloc (0 = pas de passe)")
+    parser.add_argument("--graphes", type=int, default=15, help="graphes rendus (l'écran en montre 15)")
+    parser.add_argument("--latence", type=float, default=0.0, help="latence par appel Sheets (s)")
+    parser.add_argument("--ia-latence", type=float, default=0.01, help="délai du faux OpenRouter avant réponse (s)")
+    parser.add_argument("--ia-tokens", type=int, default=40)
+    parser.add_argument("--bougie-tous", type=int, default=4, help="ticks par bougie (60 s / 15 s)")
+    parser.add_argument("--ia-tous", type=int, default=2, help="ticks entre deux commentaires (30 s / 15 s)")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--compare", help="résultats JSON d'une version précédente")
+    parser.add_argument("--seuil", type=float, default=0.2, help="régression signalée au-delà de +seuil sur le p50")
+    args = parser.parse_args()
+
+    res = {"format": FORMAT, "commit": _commit(), "date": datetime.now().isoformat(timespec="seconds"),
+           "python": platform.python_version(), "machine": platform.platform(),
+           "params": vars(args), "resultats": {}}
+    for n in args.bieres:
+        r = {"temps": _mesure(n, args, memoire=False)}
+        if args.ticks_memoire:
+            r["memoire"] = _mesure(n, args, memoire=True)
+        res["resultats"][str(n)] = r
+    _affiche(res)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(res, f, ensure_ascii=False, indent=1)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            ancien = json.load(f)
+        if compare(ancien, res, args.seuil):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark temps de frame: clear + mpf.plot + draw (15 graphes) vs CandleRenderer.
+
+Backend Agg, pas besoin d'écran. Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_render --ticks 40
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import mplfinance as mpf
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from candle_renderer import CandleRenderer
+from ohlc_store import OHLCStore
+
+STYLE = mpf.make_mpf_style(base_mpl_style='dark_background',
+                           rc={'figure.facecolor': 'black', 'axes.facecolor': 'black',
+                               'axes.edgecolor': 'black', 'axes.labelcolor': 'white',
+                               'xtick.color': 'white', 'ytick.color': 'white',
+                               'grid.color': 'gray', 'grid.alpha': 0},
+                           marketcolors=mpf.make_marketcolors(up='green', down='red', edge='inherit',
+                                                              wick='inherit', volume='inherit'))
+
+
+class _Marche:
+    """Marché synthétique: nouvelle bougie tous les 4 ticks, ~30% de bières inchangées."""
+
+    def __init__(self, n, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.t = datetime(2025, 1, 1, 20)
+        self.prix = np.full(n, 3.0)
+        self.stores = [OHLCStore(64) for _ in range(n)]
+        for _ in range(20):
+            self.tick(0)
+
+    def tick(self, k):
+        self.t += timedelta(seconds=15)
+        bouge = self.rng.random(len(self.prix)) > 0.3
+        self.prix *= np.where(bouge, np.exp(self.rng.normal(0, 0.01, len(self.prix))), 1.0)
+        for s, p in zip(self.stores, self.prix):
+            if k % 4 == 0 or len(s) == 0:
+                s.append(self.t, p, p, p, p)
+            else:
+                _, o, h, l, _, _ = s.last()
+                s.update_last(high=max(h, p), low=min(l, p), close=p)
+
+
+def _figures(marche):
+    figs = [mpf.plot(s.tail(22), type='candle', figsize=(1.45, 1.2), ylabel='',
+                     style=STYLE, returnfig=True) for s in marche.stores]
+    return [(fig, axes, FigureCanvasAgg(fig)) for fig, axes in figs]
+
+
+def bench_mpf(n, ticks):
+    marche = _Marche(n)
+    figs = _figures(marche)
+    temps = []
+    for k in range(ticks):
+        marche.tick(k)
+        t0 = time.perf_counter()
+        for (fig, axes, canvas), s in zip(figs, marche.stores):
+            axes[0].clear()
+            mpf.plot(s.tail(15), ax=axes[0], type='candle', ylabel='', style=STYLE, returnfig=False)
+            canvas.draw()
+        temps.append(time.perf_counter() - t0)
+    plt.close("all")
+    return np.array(temps)
+
+
+def bench_renderer(n, ticks):
+    marche = _Marche(n)
+    figs = _figures(marche)
+    rendus = [CandleRenderer(axes[0], canvas, n_bougies=15, style=STYLE) for _, axes, canvas in figs]
+    for r, s in zip(rendus, marche.stores):
+        r.update(*s.arrays(15))
+    temps, modes = [], {"skip": 0, "blit": 0, "full": 0}
+    for k in range(ticks):
+        marche.tick(k)
+        t0 = time.perf_counter()
+        for r, s in zip(rendus, marche.stores):
+            modes[r.update(*s.arrays(15))] += 1
+        temps.append(time.perf_counter() - t0)
+    plt.close("all")
+    return np.array(temps), modes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bieres", type=int, default=15)
+    parser.add_argument("--ticks", type=int, default=40)
+    args = parser.parse_args()
+
+    t_mpf = bench_mpf(args.bieres, args.ticks)
+    t_new, modes = bench_renderer(args.bieres, args.ticks)
+    for nom, t in (("clear+mpf.plot", t_mpf), ("CandleRenderer", t_new)):
+        print(f"{nom:>16}: moy {t.mean() * 1e3:7.1f} ms/frame  p95 {np.percentile(t, 95) * 1e3:7.1f}  "
+              f"max {t.max() * 1e3:7.1f}")
+    print(f"gain moyen x{t_mpf.mean() / t_new.mean():.1f} — répartition des mises à jour: {modes}")
+
+
+if __name__ == "__main__":
+    main()
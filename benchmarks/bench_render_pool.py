@@ -0,0 +1,51 @@
+"""
+Benchmark temps de frame du RenderPool en fonction du nombre de workers.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_render_pool --workers 1 2 4 --frames 10
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from benchmarks.bench_render import STYLE, _Marche
+from render_pool import RenderPool
+
+
+def bench(workers, n, frames):
+    marche = _Marche(n)
+    pool = RenderPool(n, STYLE, workers=workers)
+    try:
+        pool.render([s.arrays(15) for s in marche.stores])   # chauffe (imports, figures)
+        temps = []
+        for k in range(frames):
+            marche.tick(k)
+            t0 = time.perf_counter()
+            pool.render([s.arrays(15) for s in marche.stores])
+            temps.append(time.perf_counter() - t0)
+    finally:
+        pool.close()
+    return np.array(temps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, mp.cpu_count()}))
+    parser.add_argument("--bieres", type=int, default=15)
+    parser.add_argument("--frames", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{mp.cpu_count()} coeurs, {args.bieres} graphes par frame (rendu complet)")
+    ref = None
+    for w in args.workers:
+        t = bench(w, args.bieres, args.frames)
+        ref = ref or t.mean()
+        print(f"workers={w:>2}: moy {t.mean() * 1e3:7.1f} ms/frame  max {t.max() * 1e3:7.1f}  "
+              f"accélération x{ref / t.mean():.2f}")
+
+
+if __name__ == "__main__":
+    main()
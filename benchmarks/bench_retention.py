@@ -0,0 +1,88 @@
+"""
+Mémoire de l'historique des ticks sur plusieurs jours: listes Python qui grandissent
+(ancien h_prix / h_ventes) vs TickHistory (fenêtre chaude + archive par minute).
+
+Chaque variante tourne dans un process neuf; le RSS est relevé toutes les 6 h simulées.
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_retention --jours 3 --bieres 15
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+TICK = 15.0
+
+
+def _rss_mo():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _run(mode, n_bieres, jours, dossier, out):
+    from history import TickHistory, chemin_archive
+
+    rng = np.random.default_rng(0)
+    t0 = 1.7e9
+    prix = np.full(n_bieres, 3.0)
+    ventes = np.zeros(n_bieres, dtype=np.int64)
+    if mode == "listes":
+        h = [([3.0], [0]) for _ in range(n_bieres)]
+    else:
+        h = [TickHistory(3.0, 0, t0, archive=chemin_archive(dossier, f"b{i}")) for i in range(n_bieres)]
+    n_ticks = int(jours * 86400 / TICK)
+    releves = []
+    for k in range(1, n_ticks + 1):
+        t = t0 + k * TICK
+        prix *= np.exp(rng.normal(0, 0.01, n_bieres))
+        ventes += rng.integers(0, 2, n_bieres)
+        for i in range(n_bieres):
+            if mode == "listes":
+                h[i][0].append(float(prix[i]))
+                h[i][1].append(int(ventes[i]))
+            else:
+                h[i].append(t, float(prix[i]), int(ventes[i]))
+        if k % int(6 * 3600 / TICK) == 0:
+            releves.append((k * TICK / 3600, _rss_mo()))
+    lecture = None
+    if mode != "listes":
+        # Relecture d'une heure de la 1re nuit (rejouée en fin de soirée)
+        debut = time.perf_counter()
+        r = h[0].lit(t0 + 20 * 3600, t0 + 21 * 3600)
+        lecture = (len(r), (time.perf_counter() - debut) * 1e3)
+        for x in h:
+            x.close()
+    out.put((mode, releves, lecture))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jours", type=float, default=3.0)
+    parser.add_argument("--bieres", type=int, default=15)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    dossier = tempfile.mkdtemp(prefix="bench_retention_")
+    try:
+        for mode in ("listes", "TickHistory"):
+            q = ctx.Queue()
+            p = ctx.Process(target=_run, args=(mode, args.bieres, args.jours, dossier, q))
+            p.start()
+            mode, releves, lecture = q.get()
+            p.join()
+            serie = "  ".join(f"{h:>3.0f}h:{rss:6.1f}" for h, rss in releves)
+            print(f"{mode:>12} RSS Mo  {serie}   (+{releves[-1][1] - releves[0][1]:.1f} Mo)")
+            if lecture:
+                print(f"{'':>12} relecture 1 h archivée: {lecture[0]} enregistrements en {lecture[1]:.2f} ms")
+        taille = sum(os.path.getsize(os.path.join(dossier, f)) for f in os.listdir(dossier))
+        print(f"archive: {taille / 1e6:.1f} Mo pour {args.bieres} bières sur {args.jours:g} jours")
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Recopie OHLC dans la feuille 1: 4 update_cell par bière et par tick (ancien
+actualise_sheet) vs SheetWriteBehind (un batch_update groupé par intervalle).
+
+Le temps est accéléré d'un facteur --accel: un tick de 15 s dure 15/accel s,
+l'intervalle d'envoi et la fenêtre du quota Sheets (60 écritures/min) aussi.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_sheet_write --ticks 240 --accel 300 --latence 0.002
+"""
+import argparse
+import time
+
+import sheet_writer
+from fake_sheet import FakeWorksheet
+from sheet_writer import SheetWriteBehind
+
+N_BIERES = 15
+TICK = 15.0
+
+
+def _ohlc(k, b):
+    p = 3.0 + 0.01 * ((k * 7 + b * 3) % 11)
+    return p, p + 0.05, p - 0.05, p
+
+
+def ancien(ws, ticks, accel):
+    bloque = 0.0
+    for k in range(ticks):
+        debut = time.perf_counter()
+        for b in range(N_BIERES):
+            for r, v in enumerate(_ohlc(k, b), start=1):
+                try:
+                    ws.update_cell(4 * b + r, k // 4 + 2, v)
+                except Exception:
+                    pass   # l'ancien code n'avait pas de reprise: la valeur est perdue
+        bloque += time.perf_counter() - debut
+        time.sleep(max(0.0, TICK / accel - (time.perf_counter() - debut)))
+    return bloque
+
+
+def nouveau(ws, ticks, accel, intervalle, par_minute):
+    w = SheetWriteBehind(ws, intervalle=intervalle / accel, par_minute=par_minute * accel)
+    w.start()
+    bloque = 0.0
+    for k in range(ticks):
+        debut = time.perf_counter()
+        for b in range(N_BIERES):
+            for r, v in enumerate(_ohlc(k, b), start=1):
+                w.put(4 * b + r, k // 4 + 2, v)
+        bloque += time.perf_counter() - debut
+        time.sleep(max(0.0, TICK / accel - (time.perf_counter() - debut)))
+    w.stop(timeout=5)
+    return bloque, w
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=240, help="ticks de 15 s (240 = 1 h)")
+    parser.add_argument("--accel", type=float, default=300.0)
+    parser.add_argument("--latence", type=float, default=0.002, help="latence par appel Sheets (s, non accélérée)")
+    parser.add_argument("--quota", type=int, default=60, help="écritures/min autorisées par Sheets")
+    parser.add_argument("--intervalle", type=float, default=10.0, help="intervalle d'envoi (s)")
+    parser.add_argument("--par-minute", type=float, default=30.0, help="quota du token bucket")
+    args = parser.parse_args()
+    sheet_writer.BACKOFF_MIN /= args.accel
+    sheet_writer.BACKOFF_MAX /= args.accel
+
+    def feuille():
+        return FakeWorksheet(latence=args.latence, quota_ecriture=args.quota,
+                             fenetre_quota=60.0 / args.accel)
+
+    duree = args.ticks * TICK / 60
+    ws_a = feuille()
+    bloque_a = ancien(ws_a, args.ticks, args.accel)
+    ws_n = feuille()
+    bloque_n, w = nouveau(ws_n, args.ticks, args.accel, args.intervalle, args.par_minute)
+
+    attendu = {(4 * b + r, k // 4 + 2): _ohlc(k, b)[r - 1]
+               for k in range(args.ticks) for b in range(N_BIERES) for r in range(1, 5)}
+    exact_a = sum(ws_a._cells.get(c) == str(v) for c, v in attendu.items())
+    exact_n = sum(ws_n._cells.get(c) == str(v) for c, v in attendu.items())
+
+    print(f"{args.ticks} ticks ({duree:.0f} min simulées), {N_BIERES} bières, quota {args.quota} écritures/min")
+    for nom, ws, bloque, exact in (("update_cell", ws_a, bloque_a, exact_a),
+                                   ("write-behind", ws_n, bloque_n, exact_n)):
+        ok = ws.appels["update_cell"] + ws.appels["batch_update"] - ws.appels["429"]
+        print(f"{nom:>13}: {ok:>6} écritures OK, {ws.appels['429']:>6} refus 429, "
+              f"boucle bloquée {bloque * 1e3:8.1f} ms, cellules à jour {exact}/{len(attendu)}")
+
+
+if __name__ == "__main__":
+    main()
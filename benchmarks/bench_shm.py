@@ -0,0 +1,93 @@
+"""
+Lecture du snapshot en mémoire partagée pendant qu'un autre process publie en boucle.
+
+Le writer met la même valeur (numéro de publication) dans tous les prix et toutes
+les bougies: un snapshot incohérent (publication à moitié lue) se voit tout de suite.
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.bench_shm --bieres 15 --duree 3
+"""
+import argparse
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from market_shm import MarketSnapshotReader, MarketSnapshotWriter
+from ohlc_store import OHLCStore
+
+NOM = "bourse_bench_shm"
+
+
+def _writer(n_bieres, pause):
+    """Process à part (pas multiprocessing): son resource_tracker est distinct de celui du lecteur."""
+    stop = threading.Event()
+    threading.Thread(target=lambda: (sys.stdin.read(), stop.set()), daemon=True).start()
+    bieres = [SimpleNamespace(nom=f"b{i}", prix=0.0, h_ventes=[0], bougies=OHLCStore(64))
+              for i in range(n_bieres)]
+    t = datetime(2025, 1, 1, 20)
+    for b in bieres:
+        for _ in range(40):
+            b.bougies.append(t, 0, 0, 0, 0)
+    w = MarketSnapshotWriter(NOM, bieres)
+    print("pret", flush=True)
+    k = 0
+    while not stop.is_set():
+        k += 1
+        for b in bieres:
+            b.prix = float(k)
+            b.h_ventes[-1] = k
+            b.bougies.update_last(open=k, high=k, low=k, close=k)
+        w.publish()
+        if pause:
+            time.sleep(pause)
+    w.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bieres", type=int, default=15)
+    parser.add_argument("--duree", type=float, default=3.0)
+    parser.add_argument("--pause", type=float, default=0.0, help="pause du writer entre publications (s)")
+    parser.add_argument("--writer", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.writer:
+        _writer(args.bieres, args.pause)
+        return
+
+    p = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_shm", "--writer",
+                          "--bieres", str(args.bieres), "--pause", str(args.pause)],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    p.stdout.readline()
+    r = MarketSnapshotReader(NOM)
+    res = {}
+    for nom, lecture in (("read_prix", r.read_prix), ("read", r.read)):
+        n = incoherents = 0
+        temps = []
+        fin = time.perf_counter() + args.duree / 2
+        while time.perf_counter() < fin:
+            t0 = time.perf_counter()
+            s = lecture()
+            temps.append(time.perf_counter() - t0)
+            n += 1
+            if nom == "read":
+                vals = np.concatenate([s.prix, s.ventes, s.ohlc[:, -1].ravel()])
+            else:
+                vals = np.array(list(s.values()))
+            incoherents += not np.all(vals == vals[0])
+        res[nom] = (n, incoherents, np.array(temps))
+    seq = r.seq
+    r.close()
+    p.stdin.close()
+    p.wait(10)
+    print(f"{args.bieres} bières, writer: {seq // 2} publications en {args.duree:.0f} s")
+    for nom, (n, inco, temps) in res.items():
+        p50, p99 = np.percentile(temps, (50, 99)) * 1e6
+        print(f"{nom:>10}: {n:>8} lectures, médiane {p50:6.1f} µs, p99 {p99:7.1f} µs, incohérentes {inco}")
+
+
+if __name__ == "__main__":
+    main()
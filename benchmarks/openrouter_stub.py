@@ -0,0 +1,79 @@
+"""
+Faux serveur OpenRouter local (chat/completions, JSON ou SSE), pour tests et benchmarks.
+
+    with OpenRouterStub(latence=0.3, tokens=40, delai_token=0.02) as stub:
+        os.environ["OPENROUTER_URL"] = stub.url
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPONSE = ("Mes petits brasseurs, la Corona s'envole pendant que la Kwak boit la tasse. "
+           "Foncez au bar avant que ça se retourne !")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            pass   # client keep-alive fermé sans lire la fin du flux: normal en fin de bench
+
+    def do_POST(self):
+        stub = self.server.stub
+        stub.requetes += 1
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(stub.latence)   # temps avant le premier token (file d'attente + prefill)
+        mots = REPONSE.split(" ")
+        mots = (mots * (stub.tokens // len(mots) + 1))[:stub.tokens]
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._chunk(b": OPENROUTER PROCESSING\n\n")
+            for i, mot in enumerate(mots):
+                if i:
+                    time.sleep(stub.delai_token)
+                evt = {"choices": [{"delta": {"content": (" " if i else "") + mot}}]}
+                self._chunk(f"data: {json.dumps(evt, ensure_ascii=False)}\n\n".encode())
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+        else:
+            time.sleep(stub.delai_token * (len(mots) - 1))
+            data = json.dumps({"choices": [{"message": {"content": " ".join(mots)}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class OpenRouterStub:
+    def __init__(self, latence=0.3, tokens=40, delai_token=0.02, port=0):
+        self.latence = latence
+        self.tokens = tokens
+        self.delai_token = delai_token
+        self.requetes = 0
+        self._srv = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._srv.daemon_threads = True
+        self._srv.stub = self
+        self.url = f"http://127.0.0.1:{self._srv.server_address[1]}/api/v1/chat/completions"
+
+    def __enter__(self):
+        threading.Thread(target=self._srv.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._srv.shutdown()
+        self._srv.server_close()
@@ -0,0 +1,80 @@
+"""
+Taille des payloads IA: beer-market-v1 vs beer-market-v2 (compact), en octets et en tokens.
+
+Sur des payloads enregistrés (AI_PAYLOAD_DUMP=dossier pendant la soirée) ou synthétiques:
+    python -m benchmarks.payload_size dumps/*.json
+    python -m benchmarks.payload_size --top 5
+Les tokens sont comptés avec tiktoken (cl100k_base) s'il est installé, sinon estimés (octets / 4).
+"""
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+
+from ai_commenter import build_ai_payload_from_features, compact_payload
+
+try:
+    import tiktoken
+    _ENC = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENC = None
+
+
+def _texte(payload):
+    # Même sérialisation que _call_openrouter
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def tailles(payload):
+    txt = _texte(payload)
+    n_octets = len(txt.encode("utf-8"))
+    n_tokens = len(_ENC.encode(txt)) if _ENC is not None else n_octets / 4
+    return n_octets, n_tokens
+
+
+def _charge(chemins):
+    fichiers = []
+    for c in chemins:
+        fichiers += sorted(glob.glob(os.path.join(c, "*.json"))) if os.path.isdir(c) else [c]
+    for f in fichiers:
+        with open(f, encoding="utf-8") as fh:
+            p = json.load(fh)
+        if p.get("schema") == "beer-market-v1":
+            yield p
+
+
+def _synthetiques(n=5):
+    from benchmarks.bench_ai_payload import marche
+    for seed in range(n):
+        _, trackers = marche(15, 60, seed=seed)
+        yield build_ai_payload_from_features(trackers, history=[])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("payloads", nargs="*", help="fichiers ou dossiers de payloads v1 (JSON)")
+    parser.add_argument("--top", type=int, default=5, help="variante v2 limitée aux N plus gros mouvements")
+    args = parser.parse_args()
+
+    payloads = list(_charge(args.payloads)) if args.payloads else list(_synthetiques())
+    if not payloads:
+        parser.error("aucun payload beer-market-v1 trouvé")
+    variantes = {
+        "v1": lambda p: p,
+        "v2": lambda p: compact_payload(p),
+        f"v2 top {args.top}": lambda p: compact_payload(p, top_movers=args.top),
+    }
+    unite = "tokens" if _ENC is not None else "tokens (estim.)"
+    print(f"{len(payloads)} payloads — {'variante':>10} {'octets':>9} {unite:>16} {'ratio':>7}")
+    ref = None
+    for nom, conv in variantes.items():
+        mesures = np.array([tailles(conv(p)) for p in payloads])
+        octets, tokens = mesures.mean(axis=0)
+        ref = ref or tokens
+        print(f"{'':>{len(str(len(payloads))) + 12}}{nom:>10} {octets:>9.0f} {tokens:>16.0f} {ref / tokens:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
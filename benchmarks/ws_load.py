@@ -0,0 +1,158 @@
+"""
+Charge WebSocket sur le tableau de bord: N clients connectés en même temps,
+dont une fraction qui ne lit jamais (teste la contre-pression par client).
+
+Par défaut un DashboardServer est lancé dans un process à part avec un marché
+synthétique qui publie toutes les `--periode` s; --url vise un serveur existant.
+
+Usage (depuis la racine du dépôt):
+    python -m benchmarks.ws_load --clients 500 --duree 10
+    python -m benchmarks.ws_load --url ws://192.168.1.20:8080/ws --clients 200
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing as mp
+import os
+import resource
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import numpy as np
+
+from dashboard_server import DashboardServer, ws_accept, ws_read_frame
+from ohlc_store import OHLCStore
+
+
+def _marche(n):
+    return [SimpleNamespace(nom=f"b{i}", prix=3.0, bougies=OHLCStore(64)) for i in range(n)]
+
+
+def _serveur(port, n_bieres, periode, pret):
+    """Process serveur: marché synthétique, même cadence bougie/ticks que l'appli (1 bougie / 4 ticks)."""
+    rng = np.random.default_rng(0)
+    l_bieres = _marche(n_bieres)
+    t = datetime(2025, 1, 1, 20)
+    serveur = DashboardServer(l_bieres, host="127.0.0.1", port=port).start()
+    pret.put(serveur.port)
+    k = 0
+    prochain = time.monotonic()
+    while True:
+        for b in l_bieres:
+            b.prix *= float(np.exp(rng.normal(0, 0.01)))
+            if k % 4 == 0:
+                b.bougies.append(t, b.prix, b.prix, b.prix, b.prix)
+            else:
+                _, o, h, l, _, _ = b.bougies.last()
+                b.bougies.update_last(high=max(h, b.prix), low=min(l, b.prix), close=b.prix)
+        t += timedelta(seconds=15)
+        k += 1
+        serveur.publish()
+        prochain += periode
+        time.sleep(max(0.0, prochain - time.monotonic()))
+
+
+async def _client(host, port, path, fin, stats, lent):
+    reader, writer = await asyncio.open_connection(host, port)
+    cle = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {cle}\r\n"
+                  "Sec-WebSocket-Version: 13\r\n\r\n").encode("ascii"))
+    reponse = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    if " 101 " not in reponse.split("\r\n")[0] or ws_accept(cle) not in reponse:
+        raise ConnectionError(f"handshake refusé: {reponse.splitlines()[0]}")
+    stats["connectes"] += 1
+    try:
+        if lent:
+            # Ne lit rien: le tampon TCP se remplit, le serveur doit décrocher ce client seul
+            await asyncio.sleep(max(0.0, fin - time.time()))
+            return
+        while True:
+            reste = fin - time.time()
+            if reste <= 0:
+                break
+            try:
+                _, data = await asyncio.wait_for(
+                    ws_read_frame(reader, masque_requis=False, taille_max=1 << 26), reste)
+            except asyncio.TimeoutError:
+                break
+            m = json.loads(data)
+            stats["messages"] += 1
+            stats["octets"] += len(data)
+            if m["type"] == "snapshot":
+                stats["snapshots"] += 1
+            else:
+                stats["latences"].append(time.time() - m["ts"])
+    finally:
+        writer.close()
+
+
+async def _charge(url, n_clients, duree, frac_lents):
+    u = urlparse(url)
+    stats = {"connectes": 0, "messages": 0, "octets": 0, "snapshots": 0, "latences": [], "erreurs": 0}
+    fin = time.time() + duree
+    n_lents = int(round(n_clients * frac_lents))
+    taches = []
+    for i in range(n_clients):
+        taches.append(_client(u.hostname, u.port or 80, u.path or "/ws", fin, stats, i < n_lents))
+        if i % 50 == 49:
+            await asyncio.sleep(0.01)   # évite de saturer le backlog d'accept
+    res = await asyncio.gather(*taches, return_exceptions=True)
+    for r in res:
+        if isinstance(r, Exception):
+            stats["erreurs"] += 1
+    return stats, n_lents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="serveur existant (ws://hote:port/ws)")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--duree", type=float, default=10.0)
+    parser.add_argument("--lents", type=float, default=0.05, help="fraction de clients qui ne lisent pas")
+    parser.add_argument("--bieres", type=int, default=15)
+    parser.add_argument("--periode", type=float, default=0.25, help="période de publication du serveur local (s)")
+    args = parser.parse_args()
+
+    # Un descripteur par client (et autant côté serveur si local)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    proc = None
+    url = args.url
+    if url is None:
+        ctx = mp.get_context("spawn")
+        pret = ctx.Queue()
+        proc = ctx.Process(target=_serveur, args=(0, args.bieres, args.periode, pret), daemon=True)
+        proc.start()
+        url = f"ws://127.0.0.1:{pret.get(timeout=30)}/ws"
+        cpu0 = _cpu(proc.pid)
+
+    stats, n_lents = asyncio.run(_charge(url, args.clients, args.duree, args.lents))
+
+    print(f"{args.clients} clients ({n_lents} lents) sur {url} pendant {args.duree:.0f} s")
+    print(f"  connectés {stats['connectes']}, erreurs {stats['erreurs']}")
+    print(f"  messages reçus {stats['messages']} ({stats['snapshots']} snapshots), "
+          f"{stats['octets'] / 1e6:.1f} Mo, {stats['messages'] / args.duree:.0f} msg/s")
+    lat = np.array(stats["latences"])
+    if len(lat):
+        p50, p95 = np.percentile(lat, (50, 95)) * 1e3
+        print(f"  latence publish -> client: p50 {p50:.1f} ms, p95 {p95:.1f} ms, max {lat.max() * 1e3:.1f} ms")
+    if proc is not None:
+        cpu = _cpu(proc.pid) - cpu0
+        print(f"  CPU serveur: {cpu:.2f} s sur {args.duree:.0f} s ({cpu / args.duree * 100:.0f}% d'un cœur)")
+        proc.terminate()
+
+
+def _cpu(pid):
+    """Temps CPU (user + sys) d'un process, via /proc (Linux)."""
+    with open(f"/proc/{pid}/stat") as f:
+        champs = f.read().rsplit(")", 1)[1].split()
+    return (int(champs[11]) + int(champs[12])) / os.sysconf("SC_CLK_TCK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# ====================== Rendu incrémental des bougies (blitting) ==================
+# Remplace ax.clear() + mpf.plot() + canvas.draw() à chaque tick.
+import numpy as np
+from matplotlib.lines import Line2D
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+from ohlc_store import OPEN, HIGH, LOW, CLOSE
+
+SKIP, BLIT, FULL = "skip", "blit", "full"
+
+
+class CandleRenderer:
+    """
+    Garde des artistes persistants (corps + mèches) pour les `n_bougies`
+    dernières bougies d'un axe.
+
+    update() choisit le travail minimal:
+      - SKIP: OHLC identique au tick précédent, rien à faire;
+      - BLIT: seule la dernière bougie a bougé et reste dans l'échelle Y,
+              on restaure le fond et on redessine les bougies de cet axe;
+      - FULL: nouvelle bougie (décalage) ou sortie d'échelle, redessin complet.
+    """
+
+    def __init__(self, ax, canvas, n_bougies=15, style=None, largeur=0.6,
+                 taille_x=3, taille_y=5):
+        self.ax = ax
+        self.canvas = canvas
+        self.n = n_bougies
+        self.largeur = largeur
+        style = style or {}
+        mc = style.get("marketcolors", {})
+        self.up = mc.get("candle", {}).get("up", "green")
+        self.down = mc.get("candle", {}).get("down", "red")
+        self.wick_up = mc.get("wick", {}).get("up", self.up)
+        self.wick_down = mc.get("wick", {}).get("down", self.down)
+        fond = style.get("rc", {}).get("axes.facecolor", "black")
+
+        ax.clear()
+        ax.set_facecolor(fond)
+        ax.set_xlim(-0.5 - largeur / 2, n_bougies - 0.5 + largeur / 2)
+        ax.tick_params(axis="x", labelsize=taille_x)
+        ax.tick_params(axis="y", labelsize=taille_y)
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=4, integer=True))
+        ax.xaxis.set_major_formatter(FuncFormatter(self._format_x))
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f"{y:.1f}"))
+
+        self.meches = [Line2D([i, i], [0, 0], linewidth=1, animated=True, visible=False)
+                       for i in range(n_bougies)]
+        self.corps = [Rectangle((i - largeur / 2, 0), largeur, 0, animated=True, visible=False)
+                      for i in range(n_bougies)]
+        for m in self.meches:
+            ax.add_line(m)
+        for c in self.corps:
+            ax.add_patch(c)
+
+        self._times = np.array([], dtype="datetime64[ns]")
+        self._signature = None
+        self._bg = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    # ---- dessin
+    def _format_x(self, x, _):
+        i = int(round(x))
+        if 0 <= i < len(self._times):
+            return str(self._times[i])[11:16]   # HH:MM
+        return ""
+
+    def _artists(self):
+        return self.meches + self.corps
+
+    def _on_draw(self, event):
+        # Appelé après chaque redessin complet (y compris redimensionnement)
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        for a in self._artists():
+            self.ax.draw_artist(a)
+
+    def _blit(self):
+        self.canvas.restore_region(self._bg)
+        for a in self._artists():
+            self.ax.draw_artist(a)
+        self.canvas.blit(self.ax.bbox)
+
+    def _set_slot(self, slot, row, hauteur_min):
+        o, h, l, c = row[OPEN], row[HIGH], row[LOW], row[CLOSE]
+        hausse = c >= o
+        corps = self.corps[slot]
+        corps.set_y(min(o, c))
+        corps.set_height(max(abs(c - o), hauteur_min))
+        corps.set_color(self.up if hausse else self.down)
+        corps.set_visible(True)
+        meche = self.meches[slot]
+        meche.set_ydata([l, h])
+        meche.set_color(self.wick_up if hausse else self.wick_down)
+        meche.set_visible(True)
+
+    def _ylim_for(self, data):
+        lo, hi = float(data[:, LOW].min()), float(data[:, HIGH].max())
+        marge = max((hi - lo) * 0.05, abs(hi) * 1e-3, 1e-6)
+        return lo - marge, hi + marge
+
+    # ---- API
+    def update(self, times, data):
+        """
+        times/data: vues OHLCStore.arrays(n) (n <= n_bougies).
+        Retourne SKIP, BLIT ou FULL selon le travail effectué.
+        """
+        n = min(len(times), self.n)
+        if n == 0:
+            return SKIP
+        times, data = times[-n:], data[-n:]
+        signature = (n, times[-1], tuple(data[-1, :CLOSE + 1]))
+        if signature == self._signature:
+            return SKIP
+        decale = (self._signature is None or n != self._signature[0]
+                  or times[-1] != self._signature[1])
+        self._signature = signature
+
+        ymin, ymax = self.ax.get_ylim()
+        hauteur_min = (ymax - ymin) * 0.002
+        if decale:
+            self._times = np.array(times)
+            for slot in range(self.n):
+                if slot < n:
+                    self._set_slot(slot, data[slot], hauteur_min)
+                else:
+                    self.corps[slot].set_visible(False)
+                    self.meches[slot].set_visible(False)
+        else:
+            self._set_slot(n - 1, data[-1], hauteur_min)
+
+        dehors = data[-1, LOW] < ymin or data[-1, HIGH] > ymax
+        if decale or dehors or self._bg is None:
+            self.ax.set_ylim(*self._ylim_for(data))
+            # Le draw_event recapture le fond et redessine les bougies
+            self.canvas.draw()
+            return FULL
+        self._blit()
+        return BLIT
+# =================== /Rendu incrémental des bougies ================================
@@ -0,0 +1,20 @@
+# ====================== Carte des bières =========================================
+# (prix_ini, nom, qte (cl), degré, alpha, ligne i, colonne j du compteur dans la feuille)
+CATALOGUE = [
+    (1.7, "Corona", 33, 4.5, 0.03, 1, 1),
+    (2.5, "Desperados", 33, 5.9, 0.03, 11, 1),
+    (2.9, "Chouffe", 33, 8.0, 0.03, 21, 1),
+    (3, "Triple Karmelite", 33, 8.0, 0.03, 1, 4),
+    (1.8, "Leffe", 25, 6.6, 0.03, 11, 4),
+    (4, "Goudale", 75, 7.2, 0.03, 21, 4),
+    (3.2, "Otcho", 33, 8.0, 0.03, 1, 7),
+    (3, "Vedett", 33, 5.5, 0.03, 11, 7),
+    (2.8, "Brewdog Punk", 33, 5.6, 0.03, 21, 7),
+    (1.7, "1664 blanche", 25, 5.5, 0.03, 1, 10),
+    (3, "Chouffe blanche", 33, 6.5, 0.03, 11, 10),
+    (3, "Kasteel rouge", 33, 8.0, 0.03, 21, 10),
+    (3, "Chouffe Cherry", 33, 8.0, 0.03, 1, 13),
+    (2.8, "Queue de charrue", 33, 5.5, 0.03, 11, 13),
+    (2.8, "Kwak", 33, 8.4, 0.03, 21, 13),
+]
+# =================== /Carte des bières ===========================================
@@ -0,0 +1,189 @@
+# ====================== Cache de commentaires IA par état du marché ===============
+# Un commentaire déjà généré pour un état "équivalent" du marché s'affiche tout de
+# suite quand l'appel frais est lent ou en échec; un thread en pré-génère d'avance.
+# Les commentaires pré-générés décrivent un état hypothétique: ils sont rangés à part
+# et ne servent que si le marché atteint exactement cet état.
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+VOL_BUCKETS = (0.005, 0.02, 0.05)   # bornes de volatilité moyenne: calme / normal / agité / fou
+BIG_MOVE_PCT = 3.0                  # |ch_1| au-delà duquel une bière "bouge fort"
+
+
+def _move(f):
+    v = f.get("ch_5")
+    if v is None:
+        v = f.get("ch_1")
+    return v if v is not None else 0.0
+
+
+def market_signature(payload: dict):
+    """
+    Signature discrète d'un payload beer-market-v1:
+    (leader, laggard, seau de volatilité, bières à gros mouvement).
+    """
+    beers = payload.get("beers", [])
+    if not beers:
+        return None
+    ranked = sorted(beers, key=lambda b: _move(b["features"]))
+    vols = [b["features"].get("vol") for b in beers if b["features"].get("vol") is not None]
+    vol = sum(vols) / len(vols) if vols else 0.0
+    bucket = sum(vol > x for x in VOL_BUCKETS)
+    big = frozenset(b["name"] for b in beers
+                    if abs(b["features"].get("ch_1") or 0.0) >= BIG_MOVE_PCT)
+    return (ranked[-1]["name"], ranked[0]["name"], bucket, big)
+
+
+class CommentCache:
+    """
+    LRU + TTL: signature -> derniers commentaires générés pour cet état.
+    Les commentaires anticipés (prefetch) sont dans un second LRU, jamais servis
+    par correspondance approchée.
+    """
+
+    def __init__(self, maxsize=64, ttl=1800, per_key=3):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.per_key = per_key
+        self._d = OrderedDict()
+        self._anticipes = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def put(self, sig, comment, anticipe=False):
+        if sig is None or not comment:
+            return
+        d = self._anticipes if anticipe else self._d
+        with self._lock:
+            entries = d.pop(sig, [])
+            entries = (entries + [(time.time(), comment)])[-self.per_key:]
+            d[sig] = entries
+            while len(d) > self.maxsize:
+                d.popitem(last=False)
+
+    def _fresh(self, d, sig, now):
+        entries = [e for e in d.get(sig, []) if now - e[0] <= self.ttl]
+        if entries:
+            d[sig] = entries
+            d.move_to_end(sig)
+        else:
+            d.pop(sig, None)
+        return entries
+
+    def get(self, sig, approx=True):
+        """
+        Commentaire le plus récent pour `sig`; si approx, à défaut un commentaire
+        d'un état proche (même leader et laggard, puis même leader); en dernier
+        recours un commentaire anticipé pour exactement `sig`.
+        """
+        if sig is None:
+            return None
+        now = time.time()
+        with self._lock:
+            entries = self._fresh(self._d, sig, now)
+            if not entries and approx:
+                for match in (lambda k: k[:2] == sig[:2], lambda k: k[0] == sig[0]):
+                    for k in reversed(list(self._d)):
+                        if match(k):
+                            entries = self._fresh(self._d, k, now)
+                            if entries:
+                                break
+                    if entries:
+                        break
+            if not entries:
+                entries = self._fresh(self._anticipes, sig, now)
+        if entries:
+            self.hits += 1
+            return entries[-1][1]
+        self.misses += 1
+        return None
+
+    def __contains__(self, sig):
+        now = time.time()
+        with self._lock:
+            return bool(self._fresh(self._d, sig, now) or self._fresh(self._anticipes, sig, now))
+
+    def __len__(self):
+        return len(self._d) + len(self._anticipes)
+
+
+def likely_next_states(payload: dict):
+    """
+    Payloads hypothétiques proches de l'état courant (à pré-commenter):
+    le second passe leader, le laggard rebondit, la volatilité s'emballe.
+    """
+    beers = payload.get("beers", [])
+    if len(beers) < 2:
+        return []
+    ranked = sorted(range(len(beers)), key=lambda i: _move(beers[i]["features"]))
+    lead, second, lag = ranked[-1], ranked[-2], ranked[0]
+    lead_move = _move(beers[lead]["features"])
+    out = []
+
+    def variant(mutate):
+        p = copy.deepcopy(payload)
+        mutate(p["beers"])
+        out.append(p)
+
+    def overtake(bs):
+        f = bs[second]["features"]
+        f["ch_5"] = round(abs(lead_move) + 1.0, 2)
+        f["ch_1"] = round(max(f.get("ch_1") or 0.0, BIG_MOVE_PCT), 2)
+
+    def rebound(bs):
+        f = bs[lag]["features"]
+        f["ch_1"] = round(BIG_MOVE_PCT + 1.0, 2)
+        f["ch_5"] = round(abs(lead_move) + 0.5, 2)
+
+    def spike(bs):
+        for b in bs:
+            b["features"]["vol"] = round((b["features"].get("vol") or 0.01) * 3, 3)
+
+    variant(overtake)
+    variant(rebound)
+    variant(spike)
+    return out
+
+
+class CommentPrefetcher(threading.Thread):
+    """
+    Quand le réseau est au repos (pas d'appel en cours depuis `idle_seconds`),
+    génère un commentaire pour un état probable pas encore en cache.
+    Au plus un appel toutes les `interval` secondes pour borner le coût API.
+    """
+
+    def __init__(self, commenter, idle_seconds=10, interval=60):
+        super().__init__(name="ia-prefetch", daemon=True)
+        self.commenter = commenter
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._last_call = 0.0
+
+    def run(self):
+        while not self._stop_event.wait(1.0):
+            c = self.commenter
+            payload = c.last_payload
+            now = time.time()
+            if payload is None or now - self._last_call < self.interval:
+                continue
+            if now - c.last_network_activity < self.idle_seconds:
+                continue
+            todo = [p for p in likely_next_states(payload)
+                    if market_signature(p) not in c.cache]
+            if not todo or not c.try_acquire():
+                continue
+            self._last_call = now
+            try:
+                p = todo[0]
+                c.cache.put(market_signature(p), c.comment_for(p, anticipe=True), anticipe=True)
+            except Exception as e:
+                print(f"prefetch IA: {e}")
+            finally:
+                c.release()
+
+    def stop(self):
+        self._stop_event.set()
+# =================== /Cache de commentaires IA =====================================
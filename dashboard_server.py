@@ -0,0 +1,347 @@
+# ====================== Tableau de bord web (HTTP + WebSocket) ====================
+# Un seul process lit Sheets et fait tourner le marché; les écrans supplémentaires
+# (TV, téléphones) se connectent en WebSocket et ne reçoivent que les bougies
+# modifiées. asyncio dans un thread à part, WebSocket (RFC 6455) écrit à la main:
+# pas de dépendance en plus, et une trame encodée une seule fois pour tous les clients.
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+N_BOUGIES = 60            # bougies par bière dans le snapshot initial
+FILE_CLIENT = 32          # messages en attente par client avant resynchronisation
+TAMPON_MAX = 256 * 1024   # octets non envoyés tolérés dans le transport d'un client
+MAX_TRAME_ENTRANTE = 64 * 1024
+
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+def ws_accept(key):
+    """Valeur de Sec-WebSocket-Accept pour une Sec-WebSocket-Key."""
+    return base64.b64encode(hashlib.sha1(key.encode("ascii") + WS_GUID).digest()).decode("ascii")
+
+
+def ws_frame(payload, opcode=OP_TEXT):
+    """Trame serveur -> client (FIN, non masquée)."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+async def ws_read_frame(reader, masque_requis=True, taille_max=MAX_TRAME_ENTRANTE):
+    """Lit une trame; retourne (opcode, payload). Lève ValueError sur une trame invalide."""
+    b0, b1 = await reader.readexactly(2)
+    opcode = b0 & 0x0F
+    masque = b1 & 0x80
+    n = b1 & 0x7F
+    if n == 126:
+        (n,) = struct.unpack("!H", await reader.readexactly(2))
+    elif n == 127:
+        (n,) = struct.unpack("!Q", await reader.readexactly(8))
+    if masque_requis and not masque:
+        raise ValueError("trame client non masquée")
+    if n > taille_max:
+        raise ValueError(f"trame trop grande: {n} octets")
+    cle = await reader.readexactly(4) if masque else None
+    data = await reader.readexactly(n)
+    if cle:
+        data = bytes(a ^ b for a, b in zip(data, cle * (n // 4 + 1)))
+    return opcode, data
+
+
+def _epoch(t):
+    return int(np.datetime64(t, "s").astype(np.int64))
+
+
+def _bougie(t, o, h, l, c):
+    return [_epoch(t), round(o, 3), round(h, 3), round(l, 3), round(c, 3)]
+
+
+class _Client:
+    """File bornée par client: un client lent est resynchronisé, jamais attendu."""
+
+    __slots__ = ("writer", "canal", "file", "resync", "evenement", "envoyes", "pertes")
+
+    def __init__(self, writer, canal):
+        self.writer = writer
+        self.canal = canal
+        self.file = deque()
+        self.resync = False
+        self.evenement = asyncio.Event()
+        self.envoyes = 0
+        self.pertes = 0
+
+
+class _Canal:
+    """
+    Un marché diffusé: ses bières, ce qui a déjà été envoyé et ses clients.
+
+    publish() est appelé depuis le thread du marché après chaque tick: il calcule
+    les bougies modifiées depuis le dernier appel, encode UNE trame de delta et
+    un snapshot complet (pour les nouveaux clients et les resynchronisations),
+    puis les passe à la boucle asyncio du serveur.
+    """
+
+    def __init__(self, serveur, nom, l_bieres):
+        self.serveur = serveur
+        self.nom = nom
+        self.l_bieres = l_bieres
+        self.n_bougies = serveur.n_bougies
+        self.clients = set()
+        self._vus = [None] * len(l_bieres)   # (total, last) déjà diffusés par bière
+        self._snapshot = ws_frame(json.dumps(self._etat()))
+
+    def _etat(self):
+        bougies = []
+        for b in self.l_bieres:
+            t, data = b.bougies.arrays(self.n_bougies)
+            bougies.append([_bougie(ti, *row[:4]) for ti, row in zip(t, data)])
+        return {"type": "snapshot", "noms": [b.nom for b in self.l_bieres],
+                "prix": [round(b.prix, 3) for b in self.l_bieres], "bougies": bougies}
+
+    def _deltas(self):
+        out = []
+        for i, b in enumerate(self.l_bieres):
+            if b.bougies.total == 0:
+                continue
+            cle = (b.bougies.total, b.bougies.last())
+            if cle == self._vus[i]:
+                continue
+            precedent = self._vus[i]
+            self._vus[i] = cle
+            ecart = cle[0] - (precedent[0] if precedent is not None else 0)
+            if ecart:
+                # Nouvelle(s) bougie(s): la précédente dans son état final, puis les suivantes
+                k = ecart + 1 if ecart > 0 else self.n_bougies
+                t, data = b.bougies.arrays(min(k, self.n_bougies))
+                for ti, row in zip(t, data):
+                    out.append([i, round(b.prix, 3), _bougie(ti, *row[:4])])
+            else:
+                t, o, h, l, c, _ = cle[1]
+                out.append([i, round(b.prix, 3), _bougie(t, o, h, l, c)])
+        return out
+
+    def publish(self):
+        """Calcule et diffuse les bougies modifiées; sans effet si rien n'a bougé."""
+        deltas = self._deltas()
+        if not deltas:
+            return
+        self._snapshot = ws_frame(json.dumps(self._etat()))
+        loop = self.serveur.loop
+        if loop is None or not self.clients:
+            return
+        trame = ws_frame(json.dumps({"type": "delta", "ts": time.time(), "b": deltas},
+                                    separators=(",", ":")))
+        loop.call_soon_threadsafe(self.serveur._diffuse, self, trame)
+
+
+class DashboardServer:
+    """
+    Diffuse l'état des `biere` aux navigateurs connectés.
+
+    Un marché par défaut (`l_bieres`, page / et WebSocket /ws) et/ou des salles
+    ajoutées par ajoute(nom, l_bieres) (page /<nom>/, WebSocket /<nom>/ws), toutes
+    servies par la même boucle asyncio. Messages JSON:
+      {"type":"snapshot","noms":[...],"prix":[...],"bougies":[[[t,o,h,l,c],...],...]}
+      {"type":"delta","ts":..,"b":[[i,prix,[t,o,h,l,c]],...]}   (upsert par t)
+    """
+
+    def __init__(self, l_bieres=None, host="0.0.0.0", port=8080, n_bougies=N_BOUGIES,
+                 file_client=FILE_CLIENT, tampon_max=TAMPON_MAX):
+        self.host = host
+        self.port = port
+        self.n_bougies = n_bougies
+        self.file_client = file_client
+        self.tampon_max = tampon_max
+        self.canaux = {}
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self._pret = threading.Event()
+        self.resyncs = 0
+        if l_bieres is not None:
+            self.ajoute("", l_bieres)
+
+    def ajoute(self, nom, l_bieres):
+        """Ajoute une salle; le canal retourné a sa propre méthode publish()."""
+        canal = self.canaux[nom] = _Canal(self, nom, l_bieres)
+        return canal
+
+    @property
+    def clients(self):
+        return set().union(*(c.clients for c in self.canaux.values()))
+
+    # ---- côté thread Tk
+    def publish(self):
+        """Diffuse le marché par défaut (appli à une seule salle)."""
+        self.canaux[""].publish()
+
+    # ---- côté boucle asyncio
+    def _diffuse(self, canal, trame):
+        for c in canal.clients:
+            transport = c.writer.transport
+            if transport.is_closing():
+                continue
+            if len(c.file) >= self.file_client or transport.get_write_buffer_size() > self.tampon_max:
+                # Client trop lent: on jette ses deltas en attente, il recevra un snapshot
+                c.pertes += len(c.file)
+                c.file.clear()
+                if not c.resync:
+                    c.resync = True
+                    self.resyncs += 1
+            else:
+                c.file.append(trame)
+            c.evenement.set()
+
+    async def _envoi(self, c):
+        w = c.writer
+        try:
+            while not w.is_closing():
+                await c.evenement.wait()
+                c.evenement.clear()
+                if c.resync:
+                    c.resync = False
+                    c.file.clear()
+                    w.write(c.canal._snapshot)
+                    c.envoyes += 1
+                while c.file:
+                    w.write(c.file.popleft())
+                    c.envoyes += 1
+                await w.drain()
+        except ConnectionError:
+            w.close()
+
+    async def _http(self, reader, writer):
+        try:
+            requete = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+        lignes = requete.decode("latin-1").split("\r\n")
+        try:
+            methode, chemin, _ = lignes[0].split(" ", 2)
+        except ValueError:
+            writer.close()
+            return
+        entetes = {}
+        for ligne in lignes[1:]:
+            if ":" in ligne:
+                k, v = ligne.split(":", 1)
+                entetes[k.strip().lower()] = v.strip()
+        chemin = chemin.split("?")[0]
+        # /ws, /index.html -> marché par défaut; /<salle>/ws, /<salle>/ -> cette salle
+        salle, _, fin = chemin.strip("/").rpartition("/")
+        if fin not in ("ws", "index.html"):
+            salle, fin = chemin.strip("/"), ""
+        canal = self.canaux.get(salle)
+        if fin == "ws" and canal is not None and entetes.get("upgrade", "").lower() == "websocket":
+            await self._websocket(reader, writer, entetes, canal)
+        elif methode == "GET" and fin != "ws" and canal is not None:
+            self._repond(writer, 200, "text/html; charset=utf-8", self._page())
+        elif methode == "GET" and chemin == "/" and self.canaux:
+            self._repond(writer, 200, "text/html; charset=utf-8", self._index())
+        elif methode == "GET" and chemin == "/stats.json":
+            self._repond(writer, 200, "application/json", json.dumps(self.stats()).encode("utf-8"))
+        else:
+            self._repond(writer, 404, "text/plain", b"404")
+
+    def stats(self):
+        clients = self.clients
+        return {"clients": len(clients), "resyncs": self.resyncs,
+                "pertes": sum(c.pertes for c in clients),
+                "salles": {nom: len(c.clients) for nom, c in self.canaux.items()}}
+
+    def _page(self):
+        with open(os.path.join(STATIC_DIR, "dashboard.html"), "rb") as f:
+            return f.read()
+
+    def _index(self):
+        """Sans marché par défaut, / liste les salles."""
+        liens = "".join(f'<li><a href="/{nom}/">{nom}</a></li>' for nom in sorted(self.canaux))
+        return f"<!doctype html><meta charset=utf-8><title>Bourse</title><ul>{liens}</ul>".encode("utf-8")
+
+    @staticmethod
+    def _repond(writer, code, ctype, body):
+        raison = {200: "OK", 404: "Not Found"}[code]
+        writer.write(f"HTTP/1.1 {code} {raison}\r\nContent-Type: {ctype}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        writer.close()
+
+    async def _websocket(self, reader, writer, entetes, canal):
+        cle = entetes.get("sec-websocket-key")
+        if not cle:
+            self._repond(writer, 404, "text/plain", b"cle manquante")
+            return
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Accept: {ws_accept(cle)}\r\n\r\n").encode("latin-1"))
+        c = _Client(writer, canal)
+        c.resync = True          # premier message: snapshot complet
+        c.evenement.set()
+        canal.clients.add(c)
+        envoi = asyncio.ensure_future(self._envoi(c))
+        try:
+            while True:
+                opcode, data = await ws_read_frame(reader)
+                if opcode == OP_CLOSE:
+                    writer.write(ws_frame(data[:2], OP_CLOSE))
+                    break
+                if opcode == OP_PING:
+                    writer.write(ws_frame(data, OP_PONG))
+                # Les messages texte du client sont ignorés (flux descendant seulement)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            canal.clients.discard(c)
+            envoi.cancel()
+            writer.close()
+
+    # ---- cycle de vie
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._http, self.host, self.port, backlog=512)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._pret.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self):
+        """Lance la boucle asyncio dans un thread daemon; retourne quand le port écoute."""
+        def run():
+            try:
+                asyncio.run(self._main())
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._pret.set()
+        self._thread = threading.Thread(target=run, name="dashboard", daemon=True)
+        self._thread.start()
+        self._pret.wait()
+        return self
+
+    async def _arret(self):
+        for c in list(self.clients):
+            c.writer.close()
+        self._server.close()
+
+    def stop(self, timeout=2):
+        if self.loop is not None and self._server is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._arret(), self.loop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+# =================== /Tableau de bord web ==========================================
@@ -0,0 +1,118 @@
+# ====================== Sources de données (Google Sheets / local / fake) =========
+# Rien n'est ouvert à l'import: la connexion Google est faite au premier accès.
+import csv
+import os
+
+from fake_sheet import FakeSpreadsheet, FakeWorksheet
+
+_CLIENTS = {}   # credentials_file -> client gspread, partagé par tous les classeurs
+
+
+def _client(credentials_file):
+    if credentials_file not in _CLIENTS:
+        import gspread   # import lourd + réseau, seulement si on s'en sert
+        _CLIENTS[credentials_file] = gspread.service_account(filename=credentials_file)
+    return _CLIENTS[credentials_file]
+
+
+def _onglet(classeur, ref):
+    """Onglet par index (0, 1...) ou par titre ("Salle A")."""
+    return classeur.get_worksheet(ref) if isinstance(ref, int) else classeur.worksheet(ref)
+
+
+class GoogleSheetSource:
+    """Classeur Google: feuille 0 = compteurs de ventes, feuille 1 = OHLC."""
+
+    def __init__(self, credentials_file=None, url=None):
+        self.credentials_file = credentials_file or os.getenv("GOOGLE_CREDENTIALS_FILE")
+        self.url = url or os.getenv("GOOGLE_URL")
+        self._classeur = None
+        self._worksheets = None
+
+    @property
+    def classeur(self):
+        if self._classeur is None:
+            self._classeur = _client(self.credentials_file).open_by_url(self.url)
+        return self._classeur
+
+    def _charge(self):
+        if self._worksheets is None:
+            self._worksheets = self.classeur.worksheets()
+        return self._worksheets
+
+    def feuille(self, ref):
+        return _onglet(self.classeur, ref)
+
+    @property
+    def ventes(self):
+        return self._charge()[0]
+
+    @property
+    def ohlc(self):
+        return self._charge()[1]
+
+
+class FileWorksheet(FakeWorksheet):
+    """
+    Feuille de ventes lue dans un CSV local (une ligne du CSV = une ligne de la feuille).
+    Le fichier est relu quand il change: on peut y taper les ventes à la main.
+    """
+
+    def __init__(self, path, latence=0.0):
+        super().__init__(latence=latence, title=os.path.basename(path))
+        self.path = path
+        self._mtime = None
+
+    def _recharge(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        # Le fichier remplace tout: une valeur effacée ou une ligne raccourcie disparaît
+        cells = {}
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for r, ligne in enumerate(csv.reader(f), start=1):
+                for c, v in enumerate(ligne, start=1):
+                    cells[(r, c)] = v
+        self._cells = cells
+
+    def _grille(self, label):
+        self._recharge()
+        return super()._grille(label)
+
+    def cell(self, row, col):
+        self._recharge()
+        return super().cell(row, col)
+
+
+class LocalSource:
+    """Source hors-ligne: ventes depuis un CSV local (ou en mémoire), OHLC en mémoire."""
+
+    def __init__(self, path=None, valeurs=None):
+        self.ventes = FileWorksheet(path) if path else FakeWorksheet(valeurs, title="ventes")
+        self.ohlc = FakeWorksheet(title="ohlc")
+        self.classeur = FakeSpreadsheet([self.ventes, self.ohlc])
+
+    def feuille(self, ref):
+        return _onglet(self.classeur, ref)
+
+
+def ouvre_source(spec=None, url=None):
+    """
+    Construit la source décrite par `spec` (défaut: $BOURSE_SOURCE, sinon "google"):
+      - "google"          : classeur Google ($GOOGLE_CREDENTIALS_FILE, `url` ou $GOOGLE_URL);
+      - "local:<fichier>" : compteurs lus dans un CSV local;
+      - "fake"            : feuilles en mémoire, compteurs à zéro.
+    """
+    spec = spec or os.getenv("BOURSE_SOURCE", "google")
+    if spec == "google":
+        return GoogleSheetSource(url=url)
+    if spec.startswith("local:"):
+        return LocalSource(path=spec[len("local:"):])
+    if spec == "fake":
+        return LocalSource()
+    raise ValueError(f"source inconnue: {spec!r}")
+# =================== /Sources de données ===========================================
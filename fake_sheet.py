@@ -0,0 +1,149 @@
+# ====================== Feuille locale (tests / benchmarks / hors-ligne) ==========
+# Imite le sous-ensemble de gspread.Worksheet utilisé par l'appli.
+import time
+from collections import Counter, deque
+from types import SimpleNamespace
+
+from sales_ingestion import a1_to_rowcol
+
+
+class _Cell:
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+class FakeAPIError(Exception):
+    """Même forme que gspread.exceptions.APIError (.code, .response.status_code)."""
+
+    def __init__(self, code, message=""):
+        super().__init__({"code": code, "message": message})
+        self.code = code
+        self.response = SimpleNamespace(status_code=code)
+
+
+class FakeWorksheet:
+    """
+    Feuille en mémoire qui compte les appels et simule la latence réseau.
+
+    latence: secondes ajoutées à chaque appel (comme un aller-retour HTTP).
+    quota_ecriture: nb max d'appels d'écriture par fenêtre glissante de
+    `fenetre_quota` s, au-delà FakeAPIError(429) comme l'API Sheets (None = illimité).
+    """
+
+    def __init__(self, valeurs=None, latence=0.0, title="Feuille 1", quota_ecriture=None,
+                 fenetre_quota=60.0):
+        self.title = title
+        self.latence = latence
+        self.quota_ecriture = quota_ecriture
+        self.fenetre_quota = fenetre_quota
+        self.appels = Counter()
+        self._ecritures = deque()
+        self._cells = {}
+        for (row, col), v in (valeurs or {}).items():
+            self._cells[(row, col)] = str(v)
+
+    # ---- helpers
+    def _appel(self, nom):
+        self.appels[nom] += 1
+        if self.latence:
+            time.sleep(self.latence)
+
+    def _ecriture(self, nom):
+        self._appel(nom)
+        if self.quota_ecriture is None:
+            return
+        now = time.monotonic()
+        while self._ecritures and now - self._ecritures[0] >= self.fenetre_quota:
+            self._ecritures.popleft()
+        if len(self._ecritures) >= self.quota_ecriture:
+            self.appels["429"] += 1
+            raise FakeAPIError(429, "Quota exceeded for 'Write requests per minute per user'")
+        self._ecritures.append(now)
+
+    def _plage(self, label):
+        if ":" in label:
+            a, b = label.split(":", 1)
+        else:
+            a = b = label
+        (r0, c0), (r1, c1) = a1_to_rowcol(a), a1_to_rowcol(b)
+        return r0, c0, r1, c1
+
+    def _grille(self, label):
+        r0, c0, r1, c1 = self._plage(label)
+        grille = [[self._cells.get((r, c), "") for c in range(c0, c1 + 1)]
+                  for r in range(r0, r1 + 1)]
+        # Comme l'API Sheets: on tronque les cellules vides en fin de ligne
+        for ligne in grille:
+            while ligne and ligne[-1] == "":
+                ligne.pop()
+        while grille and not grille[-1]:
+            grille.pop()
+        return grille
+
+    def set(self, row, col, value):
+        """Écriture locale, sans compter d'appel (simule la caisse)."""
+        self._cells[(row, col)] = str(value)
+
+    # ---- API gspread
+    def cell(self, row, col):
+        self._appel("cell")
+        return _Cell(row, col, self._cells.get((row, col), ""))
+
+    def get(self, range_name):
+        self._appel("get")
+        return self._grille(range_name)
+
+    def batch_get(self, ranges, **kwargs):
+        self._appel("batch_get")
+        return [self._grille(r) for r in ranges]
+
+    def update_cell(self, row, col, value):
+        self._ecriture("update_cell")
+        self._cells[(row, col)] = str(value)
+
+    def batch_update(self, data, **kwargs):
+        self._ecriture("batch_update")
+        for bloc in data:
+            r0, c0, _, _ = self._plage(bloc["range"])
+            for di, ligne in enumerate(bloc["values"]):
+                for dj, v in enumerate(ligne):
+                    self._cells[(r0 + di, c0 + dj)] = str(v)
+        return {}
+
+
+class FakeSpreadsheet:
+    """Classeur en mémoire: les onglets sont des FakeWorksheet, values_batch_get lit plusieurs plages en un appel."""
+
+    def __init__(self, worksheets, latence=0.0):
+        self._worksheets = list(worksheets)
+        self.latence = latence
+        self.appels = Counter()
+
+    def worksheets(self):
+        return list(self._worksheets)
+
+    def get_worksheet(self, index):
+        return self._worksheets[index]
+
+    def worksheet(self, title):
+        for ws in self._worksheets:
+            if ws.title == title:
+                return ws
+        raise KeyError(f"onglet inconnu: {title!r}")
+
+    def values_batch_get(self, ranges, params=None):
+        self.appels["values_batch_get"] += 1
+        if self.latence:
+            time.sleep(self.latence)
+        out = []
+        for r in ranges:
+            titre, plage = r.rsplit("!", 1)
+            if titre.startswith("'"):
+                titre = titre[1:-1].replace("''", "'")
+            # Appel direct à _grille: un seul aller-retour compté, pas un par onglet
+            out.append({"range": r, "majorDimension": "ROWS",
+                        "values": self.worksheet(titre)._grille(plage)})
+        return {"valueRanges": out}
+# =================== /Feuille locale ===============================================
@@ -1,72 +1,120 @@
-from random import random,randint
-import matplotlib.pyplot as plt
+from random import random
 import numpy as np
-import gspread
-from google.oauth2 import service_account
 import time
-import mplfinance as mpf
-import pandas as pd
-from datetime import datetime, timedelta
-import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from ai_commenter import AICommenter
-from matplotlib.ticker import FuncFormatter
+from datetime import datetime
+from ai_commenter import AICommenter, SERIES_POINTS
+from sales_ingestion import SalesReader, IngestionWorker
+from sales_intake import OrderStore, SalesIntakeServer, fusionne_ventes
+from sheet_writer import SheetWriteBehind
+from history import TickHistory, chemin_archive
+from market_shm import MarketSnapshotWriter
+from market_engine import MarketEngine
+from ohlc_store import OHLCStore
+from market_features import FeatureTracker
+from catalogue import CATALOGUE
+from market_journal import MarketJournal
+from render_pool import RenderPool, TkPoolView
+from data_source import ouvre_source
+from scheduler import Scheduler
+from metrics import METRICS, TkOverlay
 from dotenv import load_dotenv
 import os
 
 # Load env variables
 load_dotenv()
 
-# Load Google sheet
-credentials_file = os.getenv("GOOGLE_CREDENTIALS_FILE")
-google_url = os.getenv("GOOGLE_URL")
 
-gc = gspread.service_account(filename=credentials_file)
-sheet = gc.open_by_url(google_url)
+# Tk, matplotlib et mplfinance ne sont importés que par l'appli (__main__) et au
+# premier style demandé: market_host et les benchmarks n'en paient pas le coût
+def style_bougies():
+    """Style mplfinance des graphes (fond noir, bougies vertes / rouges)."""
+    import mplfinance as mpf
+    return mpf.make_mpf_style(base_mpl_style='dark_background', 
+                              rc={'figure.facecolor': 'black',
+                                  'axes.facecolor': 'black', 
+                                  'axes.edgecolor': 'black', 
+                                  'axes.labelcolor': 'white', 
+                                  'xtick.color': 'white', 
+                                  'ytick.color': 'white', 
+                                  'grid.color': 'gray', 
+                                  'grid.alpha': 0}, marketcolors=mpf.make_marketcolors(up='green', down='red', 
+                                                                 edge='inherit', 
+                                                                 wick='inherit', 
+                                                                 volume='inherit'))
 
-# List all the worksheets in the Google Sheet
-worksheet_list = sheet.worksheets()
+# Rendu des graphes dans un pool de process (0 = rendu Tk incrémental dans le process)
+RENDU_WORKERS = int(os.getenv("BOURSE_RENDU_WORKERS", "0"))
 
-worksheet = worksheet_list[0]
-worksheet2 = worksheet_list[1]
+# Journal crash-safe du marché ("" = désactivé) et politique de fsync
+JOURNAL_PATH = os.getenv("BOURSE_JOURNAL", "bourse.journal")
+JOURNAL_FSYNC = os.getenv("BOURSE_JOURNAL_FSYNC", "interval")
+# Reprise seulement si le journal a moins de JOURNAL_MAX_AGE s (sinon c'est la soirée
+# d'avant: il est archivé); BOURSE_NOUVELLE_SOIREE=1 archive le journal au démarrage
+JOURNAL_MAX_AGE = float(os.getenv("BOURSE_JOURNAL_MAX_AGE", str(6 * 3600)))
+NOUVELLE_SOIREE = os.getenv("BOURSE_NOUVELLE_SOIREE", "0") != "0"
 
+# Périodes (s) des tâches planifiées: relevé des ventes, nouvelle bougie, rendu, commentaire IA
+PERIODE_VENTES = float(os.getenv("BOURSE_PERIODE_VENTES", "15"))
+PERIODE_BOUGIE = float(os.getenv("BOURSE_PERIODE_BOUGIE", "60"))
+PERIODE_RENDU = float(os.getenv("BOURSE_PERIODE_RENDU", "15"))
+PERIODE_IA = float(os.getenv("BOURSE_PERIODE_IA", "30"))
 
-custom_style = mpf.make_mpf_style(base_mpl_style='dark_background', 
-                                  rc={'figure.facecolor': 'black',
-                                      'axes.facecolor': 'black', 
-                                      'axes.edgecolor': 'black', 
-                                      'axes.labelcolor': 'white', 
-                                      'xtick.color': 'white', 
-                                      'ytick.color': 'white', 
-                                      'grid.color': 'gray', 
-                                      'grid.alpha': 0}, marketcolors=mpf.make_marketcolors(up='green', down='red', 
-                                                                     edge='inherit', 
-                                                                     wick='inherit', 
-                                                                     volume='inherit'))
+# Export des mesures par étape: fichier JSON réécrit toutes les PERIODE_METRIQUES s,
+# et/ou GET http://127.0.0.1:<port>/metrics (0 = pas de serveur). F2 affiche l'overlay.
+METRICS_FILE = os.getenv("BOURSE_METRICS_FILE", "")
+METRICS_PORT = int(os.getenv("BOURSE_METRICS_PORT", "0"))
+PERIODE_METRIQUES = float(os.getenv("BOURSE_PERIODE_METRIQUES", "2"))
+
+# Tableau de bord web (http://<ip>:<port>/, WebSocket sur /ws); 0 = désactivé
+DASHBOARD_PORT = int(os.getenv("BOURSE_DASHBOARD_PORT", "0"))
+
+# Commandes locales: POST http://<ip>:<port>/commandes (0 = désactivé), base SQLite
+# par soirée ({soiree} = date de la soirée, ou l'heure de démarrage si nouvelle soirée),
+# et relevé Sheets gardé en source secondaire (BOURSE_SHEETS_VENTES=0 pour le couper):
+# ses ventes s'ajoutent à celles de la caisse, une vente ne se saisit qu'à un endroit
+COMMANDES_PORT = int(os.getenv("BOURSE_COMMANDES_PORT", "0"))
+COMMANDES_DB = os.getenv("BOURSE_COMMANDES_DB", "bourse_commandes_{soiree}.sqlite")
+SHEETS_VENTES = os.getenv("BOURSE_SHEETS_VENTES", "1") != "0"
+
+# Recopie OHLC dans la feuille 1 (désactivée par défaut): 4 lignes O/H/L/C par bière dans
+# l'ordre du catalogue, une colonne par bougie; intervalle d'envoi (s) et quota par minute
+SHEET_OHLC = os.getenv("BOURSE_SHEET_OHLC", "0") != "0"
+SHEET_INTERVALLE = float(os.getenv("BOURSE_SHEET_INTERVALLE", "10"))
+SHEET_QUOTA = float(os.getenv("BOURSE_SHEET_QUOTA", "30"))
+
+# Archive de l'historique des ticks résumé par minute ("" = pas d'archive, fenêtre chaude seule)
+HISTORIQUE_DIR = os.getenv("BOURSE_HISTORIQUE", "historique")
+
+# Segment de mémoire partagée où le marché publie son état ("" = désactivé)
+SHM_NAME = os.getenv("BOURSE_SHM", "bourse_marche")
+
+# Nb max de bougies gardées en mémoire par bière (12 h de bougies d'une minute)
+CAPACITE_BOUGIES = 720
 
 def dfs_from_l_bieres(l_bieres):
     """Construit un dict {nom_biere: df} depuis ta liste d'objets."""
     return {b.nom: b.df for b in l_bieres}
 
+def features_from_l_bieres(l_bieres):
+    """{nom_biere: FeatureTracker} pour le payload IA incrémental."""
+    return {b.nom: b.features for b in l_bieres}
+
 class biere:
-    def __init__(self,prix_ini,nom,qte,prc,alpha,i,j,sheet):
+    def __init__(self,prix_ini,nom,qte,prc,alpha,i,j,sheet,archive=None):
         
         self.nom = nom
         self.prix = prix_ini
         self.alpha_a = 0.02
-        self.h_prix = [self.prix]
         self.i = i
         self.j = j
-        self.h_ventes = [0]
-        self.h_prix = [self.prix]
+        # Ticks récents en mémoire, les plus anciens résumés dans archive/<nom>.ticks
+        self.historique = TickHistory(self.prix, 0, time.time(),
+                                      archive=chemin_archive(archive, nom) if archive else None)
         now = datetime.now()
-        self.df = pd.DataFrame({
-            'Open': self.prix,
-            'High': self.prix,
-            'Low': self.prix,
-            'Close': self.prix,
-            'Volume' : 100
-        }, index=[now])
+        self.bougies = OHLCStore(CAPACITE_BOUGIES)
+        self.bougies.append(now, self.prix, self.prix, self.prix, self.prix, 100)
+        self.features = FeatureTracker(SERIES_POINTS)
+        self.features.nouvelle_bougie(now, self.prix)
         self.open = self.prix
         self.high = self.prix
         self.low = self.prix
@@ -74,6 +122,19 @@ class biere:
         self.qte = qte
         self.prc = prc
         self.sheet = sheet
+
+    @property
+    def h_prix(self):
+        return self.historique.prix
+
+    @property
+    def h_ventes(self):
+        return self.historique.ventes
+
+    @property
+    def df(self):
+        """Bougies en mémoire, en DataFrame sans copie (vue sur l'anneau)."""
+        return self.bougies.frame()
         
     def liste_b(self,l):
         self.liste = l
@@ -87,129 +148,166 @@ class biere:
         for _ in range(self.k):
             self.prix = self.prix*(1-random()*self.alpha_a/(self.k+0.2))
             
-    def actualise(self):
-        ventes = int(worksheet.cell(self.i, self.j).value)
+    def actualise(self, ventes):
         n = ventes - self.h_ventes[-1]
         #n = randint(0,2)
         if n > 0:
             self.achat(n)
             for b in self.liste:
                 b.vente(n)
-        self.h_prix.append(self.prix)
-        self.h_ventes.append(ventes)
+        self.historique.append(time.time(), self.prix, ventes)
         
     def actualise_df(self):
         self.high = max(self.prix,self.high)
         self.low = min(self.prix,self.low)
-        now = datetime.now()
-        self.df.iloc[-1] = pd.DataFrame({
-            'Open': self.open,
-            'High': self.high,
-            'Low': self.low,
-            'Close': self.prix,
-            'Volume' : 100
-        }, index=[now])
-    """
-    def actualise_sheet(self,k):
-        self.sheet.update_cell(4*(self.j-1) +1,k+2,self.open)
-        self.sheet.update_cell(4*(self.j-1) +2,k+2,self.high)
-        self.sheet.update_cell(4*(self.j-1) +3,k+2,self.low)
-        self.sheet.update_cell(4*(self.j-1) +4,k+2,self.close)
-    """
+        self.bougies.update_last(high=self.high, low=self.low, close=self.prix)
+        self.features.maj_close(self.prix)
+        
+    def actualise_sheet(self, ecriture, rang):
+        """
+        Met en file O/H/L/C de la bougie courante (lignes 4*rang+1..4*rang+4, rang =
+        position dans l_bieres); l'envoi à Sheets est groupé et différé.
+        """
+        col = self.bougies.total + 1
+        _, o, h, l, c, _ = self.bougies.last()
+        for k, v in enumerate((o, h, l, c), start=1):
+            ecriture.put(4*rang + k, col, round(v, 2))
         
     def actualise_bougie(self):
         now = datetime.now()
-        new_row = pd.DataFrame({
-            'Open': self.prix,
-            'High': self.prix,
-            'Low': self.prix,
-            'Close': self.prix,
-            'Volume' : 100
-        }, index=[now])
         self.open = self.prix
         self.close = self.prix
         self.high = self.prix
         self.low = self.prix
-        self.df = pd.concat([self.df, new_row])
+        self.bougies.append(now, self.prix, self.prix, self.prix, self.prix, 100)
+        self.features.nouvelle_bougie(now, self.prix)
         
     def affiche(self):
-        fig,ax = mpf.plot(self.df.tail(15),type='candle',style=custom_style)
+        import mplfinance as mpf
+        fig,ax = mpf.plot(self.bougies.tail(15),type='candle',style=style_bougies())
 
-def actualise_df(l_bieres):
-    for b in l_bieres:
-        b.actualise()
+def actualise_prix(l_bieres, ventes, moteur=None):
+    """Applique les ventes cumulées du tick; via le MarketEngine si fourni."""
+    if moteur is None:
+        for b in l_bieres:
+            b.actualise(ventes[b.nom])
+        return
+    cumul = [ventes[b.nom] for b in l_bieres]
+    deltas = np.array([v - b.h_ventes[-1] for v, b in zip(cumul, l_bieres)])
+    prix = moteur.applique(deltas)
+    now = time.time()
+    for b, p, v in zip(l_bieres, prix, cumul):
+        b.prix = float(p)
+        b.historique.append(now, b.prix, v)
+
+def actualise_df(l_bieres, ventes, moteur=None):
+    actualise_prix(l_bieres, ventes, moteur)
     for b in l_bieres:
         b.actualise_df()
     
 def actualise_bougie(l_bieres):
+    """Ouvre une nouvelle bougie au prix courant pour chaque bière."""
     for b in l_bieres:
         b.actualise_bougie()
-    for b in l_bieres:
-        b.actualise()
 
-def actualise_graph(l_canvas, l_fig_ax, l_bieres,l_label, root, ai, footer, k = 0):
-    print('a')
-    if k%4 == 0:
-        actualise_bougie(l_bieres)
-    else:
-        actualise_df(l_bieres)
-        """
-    for b in l_bieres:
-        b.actualise_sheet(k)
+def soiree(t=None):
+    """Date de la soirée (AAAAMMJJ): jusqu'à midi on est encore dans celle de la veille."""
+    return time.strftime("%Y%m%d", time.localtime((time.time() if t is None else t) - 12 * 3600))
+
+def derniers_releves(l_bieres, ingestion, commandes=None):
     """
-    
-    if k%2 == 0:
-        ai.update_footer_async(root=root, footer_label=footer, dfs=dfs_from_l_bieres(l_bieres))        
-    
-    for i in range(len(l_fig_ax)):
-        l_fig_ax[i][1][0].clear()
-        plt.rc('xtick', labelsize=8)
-        mpf.plot(l_bieres[i].df.tail(15),ax = l_fig_ax[i][1][0],type='candle',ylabel='',style=custom_style,returnfig=False)
+    Compteurs cumulés du tick: relevé Sheets (s'il y en a un) et commandes locales.
+    Avec les commandes, le relevé y est enregistré comme une source de plus et le
+    total de la base fait foi; sans nouveau relevé ni commande, rien ne change.
+    """
+    sheet = None
+    if ingestion is not None:
+        snaps = ingestion.queue.drain()
+        # Compteurs cumulés: seul le plus récent compte
+        sheet = snaps[-1].ventes if snaps else ingestion.dernier
+    if commandes is not None:
+        if sheet:
+            commandes.synchronise("sheets", sheet)
+        sheet = commandes.cumuls()
+    precedent = {b.nom: b.h_ventes[-1] for b in l_bieres}
+    return fusionne_ventes([b.nom for b in l_bieres], precedent, sheet)
+
+def ecrit_sheet(l_bieres, ecriture):
+    if ecriture is not None:
+        for rang, b in enumerate(l_bieres):
+            b.actualise_sheet(ecriture, rang)
 
-        ax = l_fig_ax[i][1][0]
-        ax.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f"{y:.1f}"))
+def diffuse(diffusions):
+    """Publie le nouvel état aux consommateurs locaux (navigateurs, mémoire partagée)."""
+    with METRICS.mesure("diffusion"):
+        for d in diffusions:
+            d.publish()
 
+def tache_ventes(l_bieres, ingestion, moteur, journal=None, diffusions=(), commandes=None, ecriture=None):
+    # Aucun appel réseau ici: le thread d'ingestion interroge Sheets
+    ventes = derniers_releves(l_bieres, ingestion, commandes)
+    applique_ventes(l_bieres, ventes, moteur, journal, diffusions, ecriture)
 
-        l_canvas[i].draw()
+def applique_ventes(l_bieres, ventes, moteur, journal=None, diffusions=(), ecriture=None):
+    """Un tick de marché à partir des compteurs cumulés: prix, bougies, recopie, journal, diffusion."""
+    with METRICS.mesure("moteur"):
+        actualise_prix(l_bieres, ventes, moteur)
+    with METRICS.mesure("bougies"):
+        for b in l_bieres:
+            b.actualise_df()
+    ecrit_sheet(l_bieres, ecriture)
+    if journal is not None:
+        with METRICS.mesure("journal"):
+            journal.log_tick(l_bieres)
+    diffuse(diffusions)
+
+def tache_bougie(l_bieres, journal=None, diffusions=(), ecriture=None):
+    with METRICS.mesure("nouvelle_bougie"):
+        actualise_bougie(l_bieres)
+    ecrit_sheet(l_bieres, ecriture)
+    if journal is not None:
+        with METRICS.mesure("journal"):
+            journal.log_tick(l_bieres, nouvelle_bougie=True)
+    diffuse(diffusions)
+
+def tache_rendu(l_rendus, l_bieres, l_label):
+    t0 = time.perf_counter()
+    # Seules les bougies modifiées sont redessinées, les autres sont sautées
+    if isinstance(l_rendus, TkPoolView):
+        l_rendus.update_all([b.bougies.arrays(l_rendus.n) for b in l_bieres])
+    else:
+        for i in range(len(l_rendus)):
+            with METRICS.mesure(f"rendu:{l_bieres[i].nom}"):
+                l_rendus[i].update(*l_bieres[i].bougies.arrays(l_rendus[i].n))
+    for i in range(len(l_bieres)):
         l_label[i].config(text = l_bieres[i].nom + " " + str(round(l_bieres[i].prix,2)) + "€")
-    root.after(15000, actualise_graph, l_canvas, l_fig_ax, l_bieres,l_label, root, ai, footer, k+1)
-    
+    METRICS.observe("rendu", time.perf_counter() - t0)
+
+def tache_metriques(overlay):
+    overlay.rafraichit()
+    if METRICS_FILE:
+        METRICS.ecrit(METRICS_FILE)
+
+def tache_commentaire(l_bieres, ai, footer):
+    ai.update_footer_local(footer, features_from_l_bieres(l_bieres))
+
+def tache_ia(l_bieres, root, ai, footer):
+    ai.update_footer_async(root=root, footer_label=footer, features=features_from_l_bieres(l_bieres))
+
 if __name__ == "__main__":
-    
+    import tkinter as tk
+    import mplfinance as mpf
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from candle_renderer import CandleRenderer
+    custom_style = style_bougies()
+
+    # Source de données (Google Sheets par défaut, BOURSE_SOURCE=local:ventes.csv hors-ligne)
+    source = ouvre_source()
+
     # Get beers infos
-    sheet = worksheet_list[1]
-    
-    corona = biere(1.7,"Corona",33,4.5,0.03,1,1,sheet)
-    despe = biere(2.5,"Desperados",33,5.9,0.03,11,1,sheet)
-    chouffe = biere(2.9,"Chouffe",33,8.0,0.03,21,1,sheet)
-    triple_k = biere(3,"Triple Karmelite",33,8.0,0.03,1,4,sheet)
-    leffe = biere(1.8,"Leffe",25,6.6,0.03,11,4,sheet)
-    goudale = biere(4,"Goudale",75,7.2,0.03,21,4,sheet)
-    otcho = biere(3.2,"Otcho",33,8.0,0.03,1,7,sheet)
-    vedett = biere(3,"Vedett",33,5.5,0.03,11,7,sheet)#
-    brewdog = biere(2.8,"Brewdog Punk",33,5.6,0.03,21,7,sheet)
-    seize = biere(1.7,"1664 blanche",25,5.5,0.03,1,10,sheet)
-    chouffe_b = biere(3,"Chouffe blanche",33,6.5,0.03,11,10,sheet)
-    kasteel = biere(3,"Kasteel rouge",33,8.0,0.03,21,10,sheet)
-    chouffe_c = biere(3,"Chouffe Cherry",33,8.0,0.03,1,13,sheet)
-    queue_de_charrue = biere(2.8,"Queue de charrue",33,5.5,0.03,11,13,sheet)
-    kwak = biere(2.8,"Kwak",33,8.4,0.03,21,13,sheet)
+    sheet = source.ohlc
     
-    l_bieres = [corona,
-    despe,
-    chouffe,
-    triple_k,
-    leffe,
-    goudale,
-    otcho,
-    vedett,
-    brewdog,
-    seize,
-    chouffe_b,
-    kasteel,
-    chouffe_c,
-    queue_de_charrue,
-    kwak]
+    l_bieres = [biere(*infos, sheet, archive=HISTORIQUE_DIR) for infos in CATALOGUE]
 
     # Init AI commenter
     ai = AICommenter()
@@ -217,30 +315,88 @@ if __name__ == "__main__":
     
     for i in range(len(l_bieres)):
         l_bieres[i].liste_b(l_bieres[:i]+l_bieres[i+1:])
+
+    # Coordonnées (i, j) -> bières, résolues une fois au démarrage
+    ingestion = None
+    if SHEETS_VENTES:
+        lecteur = SalesReader(source.ventes, l_bieres)
+        ingestion = IngestionWorker(lecteur, periode=PERIODE_VENTES)
+
+    # Commandes postées par le bar / la caisse, persistées et dédoublonnées par order_id
+    commandes = None
+    if COMMANDES_PORT:
+        db = COMMANDES_DB.format(soiree=time.strftime("%Y%m%d-%H%M%S") if NOUVELLE_SOIREE else soiree())
+        commandes = OrderStore(db, noms=[b.nom for b in l_bieres])
+
+    # Reprise après crash: prix, compteurs et bougies depuis le journal
+    journal = None
+    if JOURNAL_PATH:
+        journal = MarketJournal(JOURNAL_PATH, fsync=JOURNAL_FSYNC, max_age=JOURNAL_MAX_AGE)
+        if NOUVELLE_SOIREE and (archive := journal.archive()):
+            print(f"journal: nouvelle soirée, ancien journal dans {archive}")
+        t0 = time.perf_counter()
+        n = journal.recover(l_bieres)
+        if n:
+            print(f"journal: {n} ticks rejoués en {(time.perf_counter() - t0) * 1000:.1f} ms")
+        journal.open()
+        for b in l_bieres:
+            b.features.charge(b.bougies)
+    moteur = MarketEngine.from_bieres(l_bieres)
+    if ingestion is not None:
+        ingestion.start()
+
+    # Recopie des bougies dans la 2e feuille pour le bar: groupée, sous quota, jamais bloquante
+    ecriture = None
+    if SHEET_OHLC:
+        ecriture = SheetWriteBehind(sheet, intervalle=SHEET_INTERVALLE, par_minute=SHEET_QUOTA)
+        ecriture.start()
+
+    # Écrans supplémentaires (TV, téléphones): même marché, aucune lecture Sheets en plus
+    diffusions = []
+    dashboard = None
+    if DASHBOARD_PORT:
+        from dashboard_server import DashboardServer
+        dashboard = DashboardServer(l_bieres, port=DASHBOARD_PORT).start()
+        diffusions.append(dashboard)
+        print(f"tableau de bord: http://0.0.0.0:{dashboard.port}/")
+
+    # Consommateurs locaux (ticker LED, scripts): lecture directe via market_shm.MarketSnapshotReader
+    snapshot_shm = None
+    if SHM_NAME:
+        snapshot_shm = MarketSnapshotWriter(SHM_NAME, l_bieres)
+        snapshot_shm.publish()
+        diffusions.append(snapshot_shm)
     
+    # Pool créé avant Tk: les workers "spawn" ne voient jamais la fenêtre
+    pool = RenderPool(15, custom_style, workers=RENDU_WORKERS) if RENDU_WORKERS > 0 else None
+
     # Create Tkinter window
     root = tk.Tk()
     root.wm_title("Shhark")
     
-    # Create mpf graphs
-    l_fig_ax = [mpf.plot(l_bieres[i].df.tail(22),type='candle',figsize=(1.45, 1.2),ylabel='',style=custom_style,returnfig=True) for i in range(15)]
-
-    # Mofify police size in graphs (to fit in fullscreen, with hand)
-    for fig, axes in l_fig_ax:
-        for ax in axes:
-            ax.tick_params(axis='x', labelsize=3)
-            ax.tick_params(axis='y', labelsize=5)
-    
     # -------- Pack Graphs
     l_frame =  [tk.Frame(root) for i in range(15)]
     
     for i in range(len(l_frame)) :
         l_frame[i].grid(row = i%3,column = i//3)
-    l_canvas = [FigureCanvasTkAgg(l_fig_ax[i][0], master=l_frame[i]) for i in range(15)]
     l_label = [tk.Label(l_frame[i], text=l_bieres[i].nom, font=('Arial', 18),bg="black", fg="white") for i in range(15)]
-    
-    for i in range(len(l_canvas)):
-        l_canvas[i].get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+    if pool is None:
+        # Create mpf graphs
+        l_fig_ax = [mpf.plot(l_bieres[i].bougies.tail(22),type='candle',figsize=(1.45, 1.2),ylabel='',style=custom_style,returnfig=True) for i in range(15)]
+        l_canvas = [FigureCanvasTkAgg(l_fig_ax[i][0], master=l_frame[i]) for i in range(15)]
+        for i in range(len(l_canvas)):
+            l_canvas[i].get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        # Artistes persistants par graphe (remplacent le clear + mpf.plot à chaque tick)
+        l_rendus = [CandleRenderer(l_fig_ax[i][1][0], l_canvas[i], n_bougies=15, style=custom_style) for i in range(15)]
+    else:
+        # Les graphes arrivent en RGBA depuis le pool, Tk ne fait qu'afficher des images
+        l_images = [tk.Label(l_frame[i], bg="black") for i in range(15)]
+        for img in l_images:
+            img.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        l_rendus = TkPoolView(pool, l_images, n_bougies=15, root=root)
+
+    for i in range(len(l_label)):
         l_label[i].pack(side=tk.BOTTOM, fill=tk.X)
     
     # -------- Pack footer (AiCommenter)
@@ -248,11 +404,57 @@ if __name__ == "__main__":
                     bg="black", fg="white",wraplength=1200, justify="center")
     footer.grid(row=3, column=0, columnspan=5, sticky="ew", pady=30)
 
-    # Update loop
-    root.after(150, actualise_graph, l_canvas, l_fig_ax, l_bieres,l_label, root, ai, footer)
+    # Boucle de mise à jour: échéances absolues, une période par tâche
+    # (à échéance égale: nouvelle bougie, puis ventes, puis rendu, commentaire local et IA)
+    planif = Scheduler(after=root.after, cancel=root.after_cancel)
+    planif.add("bougie", PERIODE_BOUGIE, tache_bougie, l_bieres, journal, diffusions, ecriture, delai=0.15)
+    planif.add("ventes", PERIODE_VENTES, tache_ventes, l_bieres, ingestion, moteur, journal, diffusions, commandes, ecriture, delai=0.15)
+    planif.add("rendu", PERIODE_RENDU, tache_rendu, l_rendus, l_bieres, l_label, delai=0.15)
+    planif.add("commentaire", PERIODE_VENTES, tache_commentaire, l_bieres, ai, footer, delai=0.15)
+    planif.add("ia", PERIODE_IA, tache_ia, l_bieres, root, ai, footer, delai=0.15)
+    overlay = TkOverlay(root)
+    planif.add("metriques", PERIODE_METRIQUES, tache_metriques, overlay, delai=PERIODE_METRIQUES)
+    METRICS.add_source("taches", planif.stats)
+    if METRICS_PORT:
+        METRICS.serve(METRICS_PORT)
+    planif.start()
+
+    # Une commande reçue déclenche tout de suite le calcul des prix et le rendu
+    intake = None
+    if commandes is not None:
+        intake = SalesIntakeServer(commandes, port=COMMANDES_PORT,
+                                   on_commande=lambda: planif.trigger("ventes", "rendu", "commentaire")).start()
+        print(f"commandes: POST http://0.0.0.0:{intake.port}/commandes (base {commandes.path})")
     
     # Tkinter window configuration
     root.configure(bg='black')
     root.attributes('-fullscreen', True)
+
+    def fermeture():
+        planif.stop()
+        print(planif.resume())
+        if intake is not None:
+            intake.stop()
+        if ingestion is not None:
+            ingestion.stop(timeout=2)
+        if ecriture is not None:
+            ecriture.stop(timeout=2)
+        if dashboard is not None:
+            dashboard.stop()
+        if snapshot_shm is not None:
+            snapshot_shm.close()
+        if pool is not None:
+            pool.close()
+        if journal is not None:
+            journal.close()
+        if commandes is not None:
+            commandes.close()
+        for b in l_bieres:
+            b.historique.close()
+        root.destroy()
+    root.protocol("WM_DELETE_WINDOW", fermeture)
+    root.bind("<Escape>", lambda e: fermeture())
     
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    if ingestion is not None:
+        ingestion.stop(timeout=2)
\ No newline at end of file
@@ -0,0 +1,165 @@
+# ====================== Historique des ticks: fenêtre chaude + archive ============
+# Les derniers ticks (prix, ventes cumulées) restent en mémoire dans un anneau de
+# taille fixe; chaque minute écoulée est résumée (OHLC + ventes) et ajoutée à un
+# fichier binaire par bière, relu à la demande par np.memmap. La mémoire ne grandit
+# plus avec la durée de la soirée, l'historique complet reste rejouable.
+import os
+import re
+
+import numpy as np
+
+CHAUD = 960    # ticks gardés en mémoire (4 h à un tick / 15 s)
+PAS = 60       # secondes résumées par enregistrement d'archive
+
+ARCHIVE_DTYPE = np.dtype([
+    ("t", "<f8"),        # début de la période (s epoch)
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("ventes", "<i8"),   # ventes cumulées en fin de période
+    ("ticks", "<i8"),    # nb de ticks résumés
+])
+
+
+def chemin_archive(dossier, nom):
+    """Un fichier par bière; le nom est réduit aux caractères sûrs pour un nom de fichier."""
+    return os.path.join(dossier, re.sub(r"[^\w.-]+", "_", nom) + ".ticks")
+
+
+def lit_archive(path, debut=None, fin=None):
+    """
+    Enregistrements de l'archive dont t est dans [debut, fin[ (s epoch, None = sans borne).
+    Le fichier est projeté en mémoire: seules les pages de la plage sont lues.
+    """
+    taille = os.path.getsize(path) if os.path.exists(path) else 0
+    n = taille // ARCHIVE_DTYPE.itemsize
+    if n == 0:
+        return np.empty(0, ARCHIVE_DTYPE)
+    mm = np.memmap(path, dtype=ARCHIVE_DTYPE, mode="r", shape=(n,))
+    i0 = 0 if debut is None else int(np.searchsorted(mm["t"], debut, "left"))
+    i1 = n if fin is None else int(np.searchsorted(mm["t"], fin, "left"))
+    out = np.array(mm[i0:i1])
+    del mm
+    return out
+
+
+class TickHistory:
+    """
+    Historique tick par tick d'une bière.
+
+    Comme OHLCStore, chaque tick est écrit deux fois dans des tableaux de
+    2*capacity: `prix`, `ventes` et `t` sont des vues contiguës, sans copie,
+    des ticks de la fenêtre chaude (h[-1] = dernier tick).
+    """
+
+    def __init__(self, prix, ventes=0, t=0.0, capacity=CHAUD, archive=None, pas=PAS):
+        self.capacity = capacity
+        self.archive = archive
+        self.pas = pas
+        self._t = np.zeros(2 * capacity)
+        self._prix = np.zeros(2 * capacity)
+        self._ventes = np.zeros(2 * capacity, dtype=np.int64)
+        self._n = 0
+        self._f = None
+        self._bloc = None   # période en cours d'agrégation pour l'archive
+        if archive:
+            os.makedirs(os.path.dirname(archive) or ".", exist_ok=True)
+            self._f = open(archive, "ab")
+        self.append(t, prix, ventes)
+
+    def __len__(self):
+        return min(self._n, self.capacity)
+
+    def _vue(self, a):
+        fin = (self._n - 1) % self.capacity + self.capacity + 1
+        return a[fin - len(self):fin]
+
+    @property
+    def prix(self):
+        return self._vue(self._prix)
+
+    @property
+    def ventes(self):
+        return self._vue(self._ventes)
+
+    @property
+    def t(self):
+        return self._vue(self._t)
+
+    def append(self, t, prix, ventes):
+        pos = self._n % self.capacity
+        for a, v in ((self._t, t), (self._prix, prix), (self._ventes, ventes)):
+            a[pos] = v
+            a[pos + self.capacity] = v
+        self._n += 1
+        if self._f is not None:
+            self._agrege(t, prix, ventes)
+
+    def _agrege(self, t, prix, ventes):
+        debut = t - t % self.pas
+        b = self._bloc
+        if b is not None and b["t"] != debut:
+            self._ecrit(b)
+            b = None
+        if b is None:
+            self._bloc = {"t": debut, "open": prix, "high": prix, "low": prix,
+                          "close": prix, "ventes": ventes, "ticks": 1}
+        else:
+            b["high"] = max(b["high"], prix)
+            b["low"] = min(b["low"], prix)
+            b["close"] = prix
+            b["ventes"] = ventes
+            b["ticks"] += 1
+
+    def _ecrit(self, b):
+        rec = np.array([tuple(b[k] for k in ARCHIVE_DTYPE.names)], dtype=ARCHIVE_DTYPE)
+        self._f.write(rec.tobytes())
+        # Une écriture par minute et par bière: un crash ne perd que la période en cours
+        self._f.flush()
+
+    def restaure(self, t, prix, ventes):
+        """Repart d'un seul tick (reprise après crash); l'archive déjà écrite est conservée."""
+        self._n = 0
+        self._bloc = None
+        self.append(t, prix, ventes)
+
+    def flush(self):
+        if self._f is not None:
+            self._f.flush()
+
+    def lit(self, debut=None, fin=None):
+        """
+        Historique sur [debut, fin[: archive résumée pour ce qui précède la fenêtre
+        chaude, ticks bruts (un enregistrement par tick) ensuite, sans recouvrement.
+        """
+        t = self.t
+        froid = np.empty(0, ARCHIVE_DTYPE)
+        if self.archive is not None:
+            self.flush()
+            # Périodes d'archive jusqu'à celle qui contient le 1er tick chaud inclus
+            borne = t[0] - t[0] % self.pas + self.pas
+            froid = lit_archive(self.archive, debut, borne if fin is None else min(borne, fin))
+        sel = t >= froid["t"][-1] + self.pas if len(froid) else np.ones(len(t), bool)
+        if debut is not None:
+            sel &= t >= debut
+        if fin is not None:
+            sel &= t < fin
+        chaud = np.zeros(int(sel.sum()), ARCHIVE_DTYPE)
+        chaud["t"] = t[sel]
+        for k in ("open", "high", "low", "close"):
+            chaud[k] = self.prix[sel]
+        chaud["ventes"] = self.ventes[sel]
+        chaud["ticks"] = 1
+        return np.concatenate([froid, chaud])
+
+    def close(self):
+        """Écrit la période en cours et ferme l'archive."""
+        if self._f is None:
+            return
+        if self._bloc is not None:
+            self._ecrit(self._bloc)
+            self._bloc = None
+        self._f.close()
+        self._f = None
+# =================== /Historique des ticks =========================================
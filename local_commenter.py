@@ -0,0 +1,154 @@
+# ====================== Commentaire local (règles + gabarits) =====================
+# Commentaire du marché en français sans réseau ni LLM, en quelques dizaines de µs,
+# à partir des mêmes features que le payload IA (leader, laggard, ch_1/ch_5, vol).
+# Sert de socle au footer à chaque tick et de secours hors-ligne; le commentaire
+# OpenRouter, quand il arrive, passe par-dessus pendant quelques secondes.
+import random
+from collections import deque
+
+from comment_cache import BIG_MOVE_PCT, market_signature
+
+ROTATION = 4        # ticks avant de changer de tournure si l'état du marché ne bouge pas
+MEMOIRE = 6         # dernières tournures évitées, par catégorie
+PLAT_PCT = 0.3      # |variation| max de toutes les bières pour un marché "plat"
+
+# Une phrase de situation (selon le scénario) + une relance vers le bar. Les gabarits
+# ne prêtent à {lead} / {lag} que le sens de variation que le scénario garantit.
+SITUATIONS = {
+    "envol": (
+        "La {lead} s'envole à {lead_pct} et laisse tout le monde sur le quai !",
+        "Festival sur la {lead} : {lead_pct}, les traders en redemandent.",
+        "La {lead} prend l'ascenseur ({lead_pct}), la {lag} prend l'escalier de service ({lag_pct}).",
+        "Qui arrête la {lead} ? {lead_pct}, c'est plus une bière, c'est une fusée.",
+    ),
+    "krach": (
+        "Krach sur la {lag} : {lag_pct}, les actionnaires pleurent dans leur pinte.",
+        "La {lag} boit la tasse ({lag_pct}), le reste du comptoir regarde ailleurs.",
+        "Dégringolade de la {lag} à {lag_pct}, c'est le moment ou jamais de se servir.",
+        "La {lag} dévisse ({lag_pct}) : soldes monstres au comptoir !",
+    ),
+    "secousse": (
+        "Gros coup de chaud sur {big} : ça bouge de plus de {seuil} en une bougie !",
+        "Alerte volatilité sur {big}, les écrans clignotent de partout.",
+        "{big} fait le yoyo, accrochez vos verres.",
+    ),
+    "plat": (
+        "Marché au point mort : tout le monde se regarde en chien de faïence.",
+        "Encéphalogramme plat à la corbeille, quelqu'un va bien finir par commander ?",
+        "Rien ne bouge, les traders sont partis fumer. La {cheap} reste à {cheap_prix}.",
+    ),
+    # lead > 0 > lag
+    "contraste": (
+        "La {lead} mène la danse ({lead_pct}), la {lag} traîne des pieds ({lag_pct}).",
+        "Marché coupé en deux : la {lead} en tête ({lead_pct}), la {lag} en queue ({lag_pct}).",
+        "Tendance du moment : la {lead} grimpe ({lead_pct}), la {lag} recule ({lag_pct}).",
+        "La {lead} tient la corde à {lead_pct}, la {lag} cherche encore ses clés ({lag_pct}).",
+    ),
+    # tout monte (lag >= 0)
+    "hausse": (
+        "Hausse générale : la {lead} ouvre la marche ({lead_pct}), la {lag} suit tant bien que mal ({lag_pct}).",
+        "Tout le comptoir est dans le vert, la {lead} en tête ({lead_pct}).",
+        "Ça monte partout ! Même la {lag}, la plus sage, fait {lag_pct}; la {lead} s'emballe à {lead_pct}.",
+    ),
+    # tout baisse (lead <= 0)
+    "baisse": (
+        "Baisse générale : même la {lead}, la plus solide, fait {lead_pct}; la {lag} glisse à {lag_pct}.",
+        "Tout le comptoir est dans le rouge, la {lag} ferme la marche ({lag_pct}).",
+        "Les prix fondent comme la mousse : la {lag} à {lag_pct}, la {lead} limite la casse ({lead_pct}).",
+    ),
+}
+RELANCES = (
+    "Foncez sur la {cheap} à {cheap_prix} avant que ça remonte !",
+    "La {cheap} à {cheap_prix}, c'est cadeau : au bar, vite.",
+    "Achetez la rumeur, buvez la nouvelle.",
+    "Un conseil d'expert : diversifiez votre portefeuille, prenez-en deux.",
+    "Les prix ne vont pas se faire tout seuls, allez commander !",
+    "Dernière minute : la {lag} est à la traîne, c'est le moment d'en profiter.",
+    "Pensez à la {lead} pendant qu'elle est encore dans vos moyens.",
+)
+
+
+def _pct(x):
+    """+3.25 -> "+3,3 %" (virgule décimale)."""
+    return f"{x:+.1f} %".replace(".", ",")
+
+
+def _prix(x):
+    return f"{x:.2f} €".replace(".", ",")
+
+
+def _variation(f):
+    v = f.get("ch_5")
+    if v is None:
+        v = f.get("ch_1")
+    return v if v is not None else 0.0
+
+
+class LocalCommenter:
+    """
+    Commentaire en une ou deux phrases à partir d'un payload beer-market-v1
+    (comment) ou directement des FeatureTracker (comment_features, sans séries).
+    Même état du marché -> même tournure pendant ROTATION ticks, chiffres à jour.
+    """
+
+    def __init__(self, seed=None, rotation=ROTATION, memoire=MEMOIRE):
+        self.rng = random.Random(seed)
+        self.rotation = rotation
+        self._recents = {}
+        self._memoire = memoire
+        self._sig = None
+        self._choix = None
+        self._age = 0
+
+    def _tire(self, categorie, options):
+        recents = self._recents.setdefault(categorie, deque(maxlen=min(self._memoire, len(options) - 1)))
+        libres = [i for i in range(len(options)) if i not in recents] or list(range(len(options)))
+        i = self.rng.choice(libres)
+        recents.append(i)
+        return i
+
+    def comment_features(self, features):
+        """features: {nom: FeatureTracker}; même résultat que comment() sur le payload."""
+        beers = [{"name": nom, "features": ft.features()}
+                 for nom, ft in features.items() if ft is not None and len(ft) >= 2]
+        return self.comment({"beers": beers})
+
+    def comment(self, payload):
+        beers = [b for b in payload.get("beers", []) if b["features"].get("last") is not None]
+        if len(beers) < 2:
+            return "Ouverture du marché : les premières cotations arrivent, préparez vos gosiers !"
+        ranked = sorted(beers, key=lambda b: _variation(b["features"]))
+        lead, lag = ranked[-1], ranked[0]
+        cheap = min(beers, key=lambda b: b["features"]["last"])
+        big = [b["name"] for b in beers if abs(b["features"].get("ch_1") or 0.0) >= BIG_MOVE_PCT]
+        lead_move, lag_move = _variation(lead["features"]), _variation(lag["features"])
+
+        if max(abs(lead_move), abs(lag_move)) < PLAT_PCT:
+            scenario = "plat"
+        elif big and len(big) <= 3:
+            scenario = "secousse"
+        elif lead_move >= 2 * BIG_MOVE_PCT and lead_move >= -lag_move:
+            scenario = "envol"
+        elif lag_move <= -2 * BIG_MOVE_PCT:
+            scenario = "krach"
+        elif lag_move >= 0:
+            scenario = "hausse"
+        elif lead_move <= 0:
+            scenario = "baisse"
+        else:
+            scenario = "contraste"
+
+        sig = (market_signature(payload), scenario)
+        self._age += 1
+        if sig != self._sig or self._age >= self.rotation:
+            self._sig, self._age = sig, 0
+            self._choix = (self._tire(scenario, SITUATIONS[scenario]), self._tire("relance", RELANCES))
+        i, j = self._choix
+        valeurs = {
+            "lead": lead["name"], "lead_pct": _pct(lead_move),
+            "lag": lag["name"], "lag_pct": _pct(lag_move),
+            "cheap": cheap["name"], "cheap_prix": _prix(cheap["features"]["last"]),
+            "big": " et ".join(big[:3]), "seuil": _pct(BIG_MOVE_PCT).lstrip("+"),
+        }
+        return f"{SITUATIONS[scenario][i].format(**valeurs)} {RELANCES[j].format(**valeurs)}"
+# =================== /Commentaire local ============================================
@@ -0,0 +1,89 @@
+# ====================== Moteur de prix vectorisé (NumPy) ==========================
+# Remplace les boucles biere.achat / biere.vente: un tick = une mise à jour batch.
+import numpy as np
+
+# Au-delà de ce nombre de tirages par tick on passe à l'approximation normale
+EXACT_MAX_DRAWS = 4_000_000
+
+_GL_X, _GL_W = np.polynomial.legendre.leggauss(24)
+_GL_U = (_GL_X + 1.0) / 2.0   # noeuds sur [0, 1]
+_GL_W = _GL_W / 2.0
+
+
+def _log_moments(s):
+    """Moyenne et variance de log(1 + s*U), U ~ U(0,1), par quadrature (vectorisé sur s)."""
+    s = np.asarray(s, dtype=float)
+    x = np.log1p(np.multiply.outer(s, _GL_U))
+    mean = x @ _GL_W
+    var = ((x - mean[..., None]) ** 2) @ _GL_W
+    return mean, var
+
+
+class MarketEngine:
+    """
+    Tous les prix dans un seul tableau NumPy.
+
+    Reproduit la dynamique de `biere`: chaque bière qui a au moins une vente
+    sur le tick déclenche (comme biere.actualise, qui ignore n)
+      - k facteurs (1 + U*alpha) sur son propre prix,
+      - k facteurs (1 - U*alpha/(k+0.2)) sur le prix de chacune des autres,
+    avec k = nombre d'autres bières. Les facteurs étant multiplicatifs, l'ordre
+    des bières dans le tick n'a pas d'importance: on somme des log-facteurs.
+    """
+
+    def __init__(self, prix_ini, alpha=0.02, seed=None, noms=None,
+                 exact_max=EXACT_MAX_DRAWS):
+        self.prix = np.array(prix_ini, dtype=float)
+        n = len(self.prix)
+        self.alpha = np.broadcast_to(np.asarray(alpha, dtype=float), (n,)).copy()
+        self.k = n - 1
+        self.noms = list(noms) if noms is not None else None
+        self.rng = np.random.default_rng(seed)
+        self.exact_max = exact_max
+
+    @classmethod
+    def from_bieres(cls, l_bieres, seed=None, **kwargs):
+        return cls([b.prix for b in l_bieres],
+                   alpha=[b.alpha_a for b in l_bieres],
+                   noms=[b.nom for b in l_bieres], seed=seed, **kwargs)
+
+    def __len__(self):
+        return len(self.prix)
+
+    def _somme_logs(self, n_tirages, s):
+        """Somme de n_tirages[i] valeurs log(1 + s[i]*U) pour chaque bière i."""
+        out = np.zeros(len(s))
+        actifs = n_tirages > 0
+        if not actifs.any():
+            return out
+        L = int(n_tirages.max())
+        if actifs.sum() * L <= self.exact_max:
+            idx = np.flatnonzero(actifs)
+            u = self.rng.random((len(idx), L))
+            x = np.log1p(u * s[idx, None])
+            x[np.arange(L)[None, :] >= n_tirages[idx, None]] = 0.0
+            out[idx] = x.sum(axis=1)
+        else:
+            # Somme de centaines de milliers de termes iid: TCL, mêmes moments
+            mean, var = _log_moments(s[actifs])
+            n = n_tirages[actifs]
+            out[actifs] = self.rng.normal(n * mean, np.sqrt(n * var))
+        return out
+
+    def log_facteurs(self, ventes):
+        """Log du facteur multiplicatif appliqué à chaque prix pour un vecteur de ventes du tick."""
+        ventes = np.asarray(ventes)
+        acheteur = (ventes > 0).astype(np.int64)
+        m = int(acheteur.sum())
+        k = self.k
+        # Hausse: k tirages pour chaque bière vendue
+        hausse = self._somme_logs(acheteur * k, self.alpha)
+        # Baisse: k tirages par bière vendue *autre* que soi
+        baisse = self._somme_logs((m - acheteur) * k, -self.alpha / (k + 0.2))
+        return hausse + baisse
+
+    def applique(self, ventes):
+        """Applique les ventes d'un tick (vecteur de deltas, même ordre que les prix)."""
+        self.prix *= np.exp(self.log_facteurs(ventes))
+        return self.prix
+# =================== /Moteur de prix vectorisé =====================================
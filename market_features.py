@@ -0,0 +1,140 @@
+# ====================== Features IA incrémentales ================================
+# Dernier prix, ch_1/ch_5/ch_30 et volatilité tenus à jour à chaque tick en O(1),
+# au lieu de tout recalculer depuis le DataFrame complet à chaque appel IA.
+import math
+from datetime import timezone
+
+import numpy as np
+
+
+def _iso_utc(t):
+    """Même rendu que build_ai_payload_from_dfs (index naïf considéré UTC)."""
+    if isinstance(t, np.datetime64):
+        t = t.astype("datetime64[us]").item()
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    else:
+        t = t.astimezone(timezone.utc)
+    return t.isoformat(timespec="seconds")
+
+
+def _pct(now_val, past_val):
+    if past_val is None or past_val == 0:
+        return None
+    return (now_val - past_val) / abs(past_val) * 100.0
+
+
+class FeatureTracker:
+    """
+    Fenêtre glissante des `window` dernières clôtures de bougies d'une bière.
+
+    nouvelle_bougie() décale la fenêtre, maj_close() modifie la bougie en cours;
+    la volatilité (écart-type ddof=1 des rendements de la fenêtre, comme
+    pct_change().std()) est tenue par Welford avec ajout/retrait.
+    """
+
+    def __init__(self, window=40):
+        self.window = window
+        self._c = [0.0] * window     # anneau des clôtures
+        self._t = [""] * window      # anneau des horodatages ISO
+        self._start = 0
+        self._n = 0
+        # Welford sur les rendements de la fenêtre
+        self._rn = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self):
+        return self._n
+
+    # ---- Welford
+    def _add(self, r):
+        self._rn += 1
+        d = r - self._mean
+        self._mean += d / self._rn
+        self._m2 += d * (r - self._mean)
+
+    def _remove(self, r):
+        self._rn -= 1
+        if self._rn == 0:
+            self._mean = self._m2 = 0.0
+            return
+        d = r - self._mean
+        self._mean -= d / self._rn
+        self._m2 -= d * (r - self._mean)
+
+    # ---- accès anneau
+    def close(self, k=1):
+        """k-ième clôture en partant de la fin (1 = dernière)."""
+        return self._c[(self._start + self._n - k) % self.window]
+
+    def _ret(self, k):
+        """Rendement entre la clôture k+1 et la clôture k (depuis la fin)."""
+        prev = self.close(k + 1)
+        return self.close(k) / prev - 1.0 if prev else None
+
+    # ---- mises à jour (une par tick)
+    def nouvelle_bougie(self, t, close):
+        if self._n == self.window:
+            # La plus ancienne clôture sort, et avec elle le plus ancien rendement
+            r = self._ret(self._n - 1)
+            if r is not None:
+                self._remove(r)
+            self._start = (self._start + 1) % self.window
+            self._n -= 1
+        pos = (self._start + self._n) % self.window
+        self._c[pos] = float(close)
+        self._t[pos] = _iso_utc(t)
+        self._n += 1
+        if self._n >= 2:
+            r = self._ret(1)
+            if r is not None:
+                self._add(r)
+
+    def maj_close(self, close):
+        if self._n == 0:
+            raise IndexError("aucune bougie")
+        if self._n >= 2:
+            r = self._ret(1)
+            if r is not None:
+                self._remove(r)
+        self._c[(self._start + self._n - 1) % self.window] = float(close)
+        if self._n >= 2:
+            r = self._ret(1)
+            if r is not None:
+                self._add(r)
+
+    def charge(self, store):
+        """Réinitialise depuis un OHLCStore (démarrage, reprise après crash)."""
+        self.__init__(self.window)
+        t, data = store.arrays(self.window)
+        for ti, close in zip(t, data[:, 3]):
+            self.nouvelle_bougie(ti, close)
+        return self
+
+    # ---- lecture
+    def features(self, round_dec=3):
+        """Dict {last, ch_1, ch_5, ch_30, vol}, mêmes règles que build_ai_payload_from_dfs."""
+        n = self._n
+        last = self.close(1)
+
+        def at(k):
+            return self.close(k) if n >= k else None
+
+        def r2(x):
+            return None if x is None or not math.isfinite(x) else round(x, 2)
+
+        vol = math.sqrt(max(self._m2, 0.0) / (self._rn - 1)) if self._rn >= 2 else None
+        return {
+            "last": round(last, round_dec),
+            "ch_1": r2(_pct(last, at(2))),
+            "ch_5": r2(_pct(last, at(6))),
+            "ch_30": r2(_pct(last, at(min(31, n)))),
+            "vol": None if vol is None else round(vol, 3),
+        }
+
+    def series(self, round_dec=3):
+        return [{"t": self._t[(self._start + i) % self.window],
+                 "c": round(self._c[(self._start + i) % self.window], round_dec)}
+                for i in range(self._n)]
+# =================== /Features IA incrémentales ====================================
@@ -0,0 +1,277 @@
+# ====================== Hôte multi-salles ==========================================
+# Plusieurs bars (salles) indépendants dans un seul process, sans Tk: un planificateur,
+# un relevé des ventes groupé (un values_batch_get par classeur pour toutes les salles)
+# et un seul serveur de tableau de bord (page /<salle>/ par salle). Chaque salle garde
+# son moteur, son journal, son historique et sa recopie OHLC. --workers répartit les
+# salles sur plusieurs process quand une seule boucle ne suffit plus.
+#
+#   python -m market_host marches.json [--workers 2] [--port 8080] [--dossier marches]
+#
+# marches.json:
+#   {"marches": [
+#     {"nom": "salle_a",                 # [\w-]+, sert d'URL et de dossier d'état
+#      "source": "google",               # comme BOURSE_SOURCE (défaut: $BOURSE_SOURCE)
+#      "url": "https://docs.google...",  # classeur (défaut: $GOOGLE_URL)
+#      "ventes": "Salle A",              # onglet des compteurs, titre ou index (défaut 0)
+#      "ohlc": "OHLC A",                 # onglet de recopie des bougies (défaut 1)
+#                                        # (un onglet ne sert qu'à une salle et à un usage)
+#      "catalogue": [[1.7, "Corona", 33, 4.5, 0.03, 1, 1], ...],   # défaut: catalogue.py
+#      "alpha": 0.02, "seed": null},     # paramètres du moteur de prix
+#     ...]}
+import argparse
+import json
+import multiprocessing as mp
+import os
+import re
+import time
+
+import hh_bourse_v2 as app
+from catalogue import CATALOGUE
+from dashboard_server import DashboardServer
+from data_source import ouvre_source
+from market_engine import MarketEngine
+from market_journal import MarketJournal
+from market_shm import MarketSnapshotWriter
+from metrics import METRICS
+from sales_ingestion import BatchSalesReader, IngestionWorker, SalesReader
+from sales_intake import fusionne_ventes
+from scheduler import Scheduler
+from sheet_writer import SheetWriteBehind
+
+_NOM_RE = re.compile(r"[\w-]+")
+
+
+def _onglets(cfg):
+    """[(usage, ref)] des onglets d'une salle, défauts compris."""
+    return [("ventes", cfg.get("ventes", 0)), ("ohlc", cfg.get("ohlc", 1))]
+
+
+def _verifie_onglets(onglets):
+    """
+    onglets: [(salle, usage, clé de l'onglet)]. Lève ValueError si un onglet sert à
+    deux salles (ou à deux usages): les compteurs et les bougies s'écraseraient.
+    """
+    vus = {}
+    for nom, usage, cle in onglets:
+        if cle in vus:
+            autre, autre_usage = vus[cle]
+            raise ValueError(f"onglet {cle[-1]!r} partagé: {autre} ({autre_usage}) et {nom} ({usage}); "
+                             f"donnez à chaque salle ses onglets \"ventes\" et \"ohlc\"")
+        vus[cle] = (nom, usage)
+
+
+def charge_configs(path):
+    """Lit et valide la liste des salles."""
+    with open(path, encoding="utf-8") as f:
+        configs = json.load(f)["marches"]
+    vus = set()
+    for cfg in configs:
+        nom = cfg.get("nom", "")
+        if not _NOM_RE.fullmatch(nom):
+            raise ValueError(f"nom de salle invalide: {nom!r} (lettres, chiffres, _ et -)")
+        if nom in vus:
+            raise ValueError(f"salle en double: {nom!r}")
+        vus.add(nom)
+    # Avant la répartition sur les workers: chacun ne voit que ses salles
+    _verifie_onglets([(cfg["nom"], usage, (cfg.get("source"), cfg.get("url"), ref))
+                      for cfg in configs for usage, ref in _onglets(cfg)])
+    return configs
+
+
+class Marche:
+    """Une salle: ses bières, son moteur de prix, son journal et ses sorties."""
+
+    def __init__(self, cfg, source, dossier, quota=app.SHEET_QUOTA):
+        self.nom = cfg["nom"]
+        base = os.path.join(dossier, self.nom)
+        refs = dict(_onglets(cfg))
+        ohlc = source.feuille(refs["ohlc"])
+        self.ventes_feuille = source.feuille(refs["ventes"])
+        self.l_bieres = [app.biere(*infos, ohlc, archive=os.path.join(base, "historique"))
+                         for infos in cfg.get("catalogue") or CATALOGUE]
+        for i, b in enumerate(self.l_bieres):
+            if "alpha" in cfg:
+                b.alpha_a = cfg["alpha"]
+            b.liste_b(self.l_bieres[:i] + self.l_bieres[i+1:])
+        self.noms = [b.nom for b in self.l_bieres]
+
+        self.journal = None
+        if app.JOURNAL_PATH:
+            os.makedirs(base, exist_ok=True)
+            self.journal = MarketJournal(os.path.join(base, "bourse.journal"), fsync=app.JOURNAL_FSYNC,
+                                         max_age=app.JOURNAL_MAX_AGE)
+            if app.NOUVELLE_SOIREE and (archive := self.journal.archive()):
+                print(f"{self.nom}: nouvelle soirée, ancien journal dans {archive}")
+            n = self.journal.recover(self.l_bieres)
+            if n:
+                print(f"{self.nom}: {n} ticks rejoués")
+            self.journal.open()
+            for b in self.l_bieres:
+                b.features.charge(b.bougies)
+        self.moteur = MarketEngine.from_bieres(self.l_bieres, seed=cfg.get("seed"))
+
+        self.ecriture = None
+        if app.SHEET_OHLC:
+            self.ecriture = SheetWriteBehind(ohlc, intervalle=app.SHEET_INTERVALLE, par_minute=quota)
+        self.diffusions = []
+        self.snapshot_shm = None
+        if app.SHM_NAME:
+            self.snapshot_shm = MarketSnapshotWriter(f"{app.SHM_NAME}_{self.nom}", self.l_bieres)
+            self.diffusions.append(self.snapshot_shm)
+
+    def ventes(self, releve):
+        """Tick de ventes avec les compteurs relevés pour cette salle (None = pas de relevé)."""
+        precedent = {b.nom: b.h_ventes[-1] for b in self.l_bieres}
+        ventes = fusionne_ventes(self.noms, precedent, releve)
+        app.applique_ventes(self.l_bieres, ventes, self.moteur, self.journal, self.diffusions, self.ecriture)
+
+    def bougie(self):
+        app.tache_bougie(self.l_bieres, self.journal, self.diffusions, self.ecriture)
+
+    def start(self):
+        if self.ecriture is not None:
+            self.ecriture.start()
+
+    def close(self):
+        if self.ecriture is not None:
+            self.ecriture.stop(timeout=2)
+        if self.snapshot_shm is not None:
+            self.snapshot_shm.close()
+        if self.journal is not None:
+            self.journal.close()
+        for b in self.l_bieres:
+            b.historique.close()
+
+
+class MarketHost:
+    """
+    Fait tourner plusieurs salles dans le process courant.
+
+    sources: {(spec, url): source} déjà ouvertes (hors-ligne, benchmarks); sinon
+    chaque couple (source, url) des configs est ouvert une fois et partagé.
+    """
+
+    def __init__(self, configs, port=8080, dossier="marches", quota=None, sources=None):
+        self._sources = dict(sources or {})
+        quota = app.SHEET_QUOTA / len(configs) if quota is None else quota
+        # Onglets résolus avant d'ouvrir les salles: un index et un titre peuvent désigner le même
+        _verifie_onglets([(cfg["nom"], usage, (cfg.get("source"), cfg.get("url"),
+                                                self._source(cfg).feuille(ref).title))
+                          for cfg in configs for usage, ref in _onglets(cfg)])
+        self.marches = [Marche(cfg, self._source(cfg), dossier, quota) for cfg in configs]
+
+        lecteurs = {}
+        for cfg, m in zip(configs, self.marches):
+            lecteurs[m.nom] = (self._source(cfg).classeur, SalesReader(m.ventes_feuille, m.l_bieres))
+        self.ingestion = IngestionWorker(BatchSalesReader(lecteurs), periode=app.PERIODE_VENTES)
+
+        self.dashboard = None
+        if port:
+            self.dashboard = DashboardServer(port=port)
+            for m in self.marches:
+                m.diffusions.append(self.dashboard.ajoute(m.nom, m.l_bieres))
+
+        self.planif = Scheduler()
+        self.planif.add("bougie", app.PERIODE_BOUGIE, self.tache_bougie, delai=0.15)
+        self.planif.add("ventes", app.PERIODE_VENTES, self.tache_ventes, delai=0.15)
+        self.planif.add("metriques", app.PERIODE_METRIQUES, self.tache_metriques, delai=app.PERIODE_METRIQUES)
+        METRICS.add_source("taches", self.planif.stats)
+
+    def _source(self, cfg):
+        cle = (cfg.get("source"), cfg.get("url"))
+        if cle not in self._sources:
+            self._sources[cle] = ouvre_source(*cle)
+        return self._sources[cle]
+
+    def tache_ventes(self):
+        snaps = self.ingestion.queue.drain()
+        releve = snaps[-1].ventes if snaps else self.ingestion.dernier
+        with METRICS.mesure("salles"):
+            for m in self.marches:
+                m.ventes(releve.get(m.nom) if releve else None)
+
+    def tache_bougie(self):
+        for m in self.marches:
+            m.bougie()
+
+    def tache_metriques(self):
+        if app.METRICS_FILE:
+            METRICS.ecrit(app.METRICS_FILE)
+
+    def run(self, duree=None):
+        """Bloque jusqu'à stop(), Ctrl+C ou `duree` secondes, puis ferme tout."""
+        for m in self.marches:
+            m.start()
+        self.ingestion.start()
+        if self.dashboard is not None:
+            self.dashboard.start()
+            print(f"tableau de bord: http://0.0.0.0:{self.dashboard.port}/ "
+                  f"({', '.join(m.nom for m in self.marches)})")
+        try:
+            self.planif.run(duree)
+        finally:
+            self.close()
+            print(self.planif.resume())
+
+    def stop(self):
+        self.planif.stop()
+
+    def close(self):
+        """Arrête et ferme tout, sans rien afficher (le résumé des tâches est dans METRICS)."""
+        self.planif.stop()
+        self.ingestion.stop(timeout=2)
+        if self.dashboard is not None:
+            self.dashboard.stop()
+        for m in self.marches:
+            m.close()
+
+
+def _worker(configs, port, dossier, quota, duree):
+    try:
+        MarketHost(configs, port=port, dossier=dossier, quota=quota).run(duree)
+    except KeyboardInterrupt:
+        pass
+
+
+def lance(configs, workers=1, port=8080, dossier="marches", duree=None):
+    """
+    Toutes les salles dans ce process (workers <= 1), ou réparties sur `workers`
+    process; le worker w sert ses salles sur port + w. Le quota d'écriture Sheets
+    (partagé par le compte de service) est divisé entre toutes les salles.
+    """
+    quota = app.SHEET_QUOTA / len(configs)
+    if workers <= 1:
+        _worker(configs, port, dossier, quota, duree)
+        return
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_worker, name=f"salles-{w}",
+                         args=(configs[w::workers], port + w if port else 0, dossier, quota, duree))
+             for w in range(min(workers, len(configs)))]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        # Ctrl+C est aussi reçu par les workers, qui ferment leurs salles
+        fin = time.monotonic() + 5
+        for p in procs:
+            p.join(max(0.0, fin - time.monotonic()))
+            if p.is_alive():
+                p.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plusieurs salles de la bourse dans un seul hôte")
+    parser.add_argument("config", help="fichier JSON des salles")
+    parser.add_argument("--workers", type=int, default=1, help="process de salles (1 = tout dans ce process)")
+    parser.add_argument("--port", type=int, default=8080, help="tableau de bord (0 = désactivé)")
+    parser.add_argument("--dossier", default="marches", help="état par salle: journal, historique")
+    parser.add_argument("--duree", type=float, default=None, help="arrêt après N secondes")
+    args = parser.parse_args()
+    lance(charge_configs(args.config), args.workers, args.port, args.dossier, args.duree)
+
+
+if __name__ == "__main__":
+    main()
+# =================== /Hôte multi-salles ============================================
@@ -0,0 +1,325 @@
+# ====================== Journal du marché (append-only + snapshots) ================
+# Après un crash on repart des derniers prix / compteurs / bougies, pas de prix_ini.
+# Le journal est découpé en segments <path>.000001, <path>.000002...: chaque snapshot
+# ouvre un nouveau segment et supprime les précédents, le disque ne grandit plus avec
+# la soirée. Un journal trop vieux (soirée précédente) n'est pas repris mais archivé.
+import os
+import queue
+import re
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+_REC = struct.Struct("<II")        # longueur du payload, crc32 du payload
+_HEAD = struct.Struct("<BdI")      # type, time.time(), nb de bières
+TICK, NOUVELLE_BOUGIE = 0, 1
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+def _encode(kind, ts, prix, ventes, t_bougie, ohlc):
+    payload = b"".join((
+        _HEAD.pack(kind, ts, len(prix)),
+        np.ascontiguousarray(prix, dtype="<f8").tobytes(),
+        np.ascontiguousarray(ventes, dtype="<i8").tobytes(),
+        np.ascontiguousarray(t_bougie, dtype="<i8").tobytes(),
+        np.ascontiguousarray(ohlc, dtype="<f8").tobytes(),
+    ))
+    return _REC.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode(payload):
+    kind, ts, n = _HEAD.unpack_from(payload)
+    off = _HEAD.size
+    prix = np.frombuffer(payload, "<f8", n, off); off += 8 * n
+    ventes = np.frombuffer(payload, "<i8", n, off); off += 8 * n
+    t_bougie = np.frombuffer(payload, "<i8", n, off); off += 8 * n
+    ohlc = np.frombuffer(payload, "<f8", 4 * n, off).reshape(n, 4)
+    return kind, ts, prix, ventes, t_bougie, ohlc
+
+
+def read_records(path, offset=0):
+    """
+    Itère (fin_du_record, kind, ts, prix, ventes, t_bougie, ohlc) depuis `offset`.
+    S'arrête au premier record tronqué ou corrompu (écriture interrompue par le crash).
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(offset)
+        pos = offset
+        while True:
+            head = f.read(_REC.size)
+            if len(head) < _REC.size:
+                return
+            length, crc = _REC.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            pos += _REC.size + length
+            yield (pos,) + _decode(payload)
+
+
+def segments(path):
+    """[(numéro, chemin)] des segments du journal `path` présents sur disque, dans l'ordre."""
+    dossier, base = os.path.split(path)
+    motif = re.compile(re.escape(base) + r"\.(\d{6})")
+    try:
+        noms = os.listdir(dossier or ".")
+    except FileNotFoundError:
+        return []
+    return sorted((int(m.group(1)), os.path.join(dossier, nom))
+                  for nom in noms if (m := motif.fullmatch(nom)))
+
+
+def read_journal(path):
+    """Records de tous les segments encore sur disque (ou du seul fichier `path`)."""
+    if os.path.isfile(path):
+        yield from read_records(path)
+        return
+    for _, seg in segments(path):
+        yield from read_records(seg)
+
+
+def _fsync_dossier(path):
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _etat(l_bieres):
+    """Vecteurs prix / ventes cumulées / dernière bougie de chaque bière."""
+    n = len(l_bieres)
+    prix = np.empty(n)
+    ventes = np.empty(n, dtype=np.int64)
+    t_bougie = np.empty(n, dtype=np.int64)
+    ohlc = np.empty((n, 4))
+    for i, b in enumerate(l_bieres):
+        t, o, h, l, c, _ = b.bougies.last()
+        prix[i] = b.prix
+        ventes[i] = b.h_ventes[-1]
+        t_bougie[i] = t.astype("datetime64[ns]").astype(np.int64)
+        ohlc[i] = (o, h, l, c)
+    return prix, ventes, t_bougie, ohlc
+
+
+def _restaure_biere(b, prix, ventes):
+    b.prix = float(prix)
+    b.historique.restaure(time.time(), b.prix, int(ventes))
+    _, b.open, b.high, b.low, b.close, _ = b.bougies.last()
+
+
+class MarketJournal:
+    """
+    Journal binaire append-only des ticks + snapshots compacts périodiques.
+
+    fsync:
+      - "always"  : fsync à chaque tick (le plus sûr, bloque le tick sur le disque);
+      - "interval": un thread fait fsync toutes les `fsync_interval` s (défaut);
+      - "never"   : on laisse l'OS écrire (survit à un crash du process, pas de la machine).
+    Les snapshots sont écrits par le même thread: le tick ne fait qu'un write().
+
+    max_age (s): recover() ne reprend pas un journal dont le dernier écrit est plus
+    vieux (soirée précédente), il l'archive; None = toujours reprendre.
+    """
+
+    def __init__(self, path, fsync="interval", fsync_interval=1.0, snapshot_every=240, max_age=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync doit être parmi {FSYNC_POLICIES}")
+        self.path = path
+        self.snapshot_path = path + ".snap.npz"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.max_age = max_age
+        self._segment = 1
+        self._f = None
+        self._depuis_snapshot = 0
+        self._dirty = False
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    def _segment_path(self, n):
+        return f"{self.path}.{n:06d}"
+
+    def fichiers(self):
+        """Segments et snapshot du journal présents sur disque."""
+        fichiers = [seg for _, seg in segments(self.path)]
+        return fichiers + [self.snapshot_path] if os.path.exists(self.snapshot_path) else fichiers
+
+    # ---- nouvelle soirée
+    def archive(self):
+        """
+        Range le journal dans <path>.archives/<date>/ pour repartir des prix initiaux.
+        À appeler avant open(); retourne le dossier d'archive (None si pas de journal).
+        """
+        fichiers = self.fichiers()
+        if not fichiers:
+            return None
+        cible = os.path.join(self.path + ".archives", time.strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(cible, exist_ok=True)
+        for f in fichiers:
+            os.replace(f, os.path.join(cible, os.path.basename(f)))
+        self._segment = 1
+        return cible
+
+    # ---- reprise
+    def recover(self, l_bieres):
+        """
+        Reconstruit prix, compteurs et bougies des bières depuis snapshot + journal.
+        Retourne le nombre de records rejoués (0 si rien à reprendre). Un journal plus
+        vieux que max_age est archivé et rien n'est repris.
+        """
+        fichiers = self.fichiers()
+        if fichiers and self.max_age is not None:
+            age = time.time() - max(os.path.getmtime(f) for f in fichiers)
+            if age > self.max_age:
+                cible = self.archive()
+                print(f"journal: dernier tick il y a {age / 3600:.1f} h, pas de reprise (archivé dans {cible})")
+                return 0
+        par_nom = {b.nom: b for b in l_bieres}
+        noms, debut, offset = [b.nom for b in l_bieres], 0, 0
+        neuves = set(par_nom)   # bières encore sur leur bougie initiale
+        if os.path.exists(self.snapshot_path):
+            with np.load(self.snapshot_path) as snap:
+                noms = [str(x) for x in snap["noms"]]   # ordre des vecteurs du journal
+                # Snapshot d'avant les segments: son offset visait l'ancien fichier unique
+                debut = int(snap["segment"]) if "segment" in snap else 0
+                offset = int(snap["offset"])
+                for i, nom in enumerate(noms):
+                    b = par_nom.get(nom)
+                    if b is None:
+                        continue
+                    n = int(snap["n_bougies"][i])
+                    b.bougies = type(b.bougies)(b.bougies.capacity)
+                    neuves.discard(nom)
+                    for t, row in zip(snap["t"][i, :n], snap["ohlcv"][i, :n]):
+                        b.bougies.append(t, *row)
+                    _restaure_biere(b, snap["prix"][i], snap["ventes"][i])
+        n_records, dernier = 0, None
+        for n, seg in segments(self.path):
+            if n < debut:
+                # Déjà couvert par le snapshot (crash avant la fin du ménage)
+                os.remove(seg)
+                continue
+            fin = offset if n == debut else 0
+            for fin, kind, ts, prix, ventes, t_bougie, ohlc in read_records(seg, fin):
+                for i, nom in enumerate(noms[:len(prix)]):
+                    b = par_nom.get(nom)
+                    if b is None:
+                        continue
+                    if nom in neuves:
+                        b.bougies = type(b.bougies)(b.bougies.capacity)
+                        neuves.discard(nom)
+                    t = np.datetime64(int(t_bougie[i]), "ns")
+                    o, h, l, c = ohlc[i]
+                    if len(b.bougies) and b.bougies.last()[0] == t:
+                        b.bougies.update_last(open=o, high=h, low=l, close=c)
+                    else:
+                        b.bougies.append(t, o, h, l, c)
+                    _restaure_biere(b, prix[i], ventes[i])
+                n_records += 1
+            dernier = (n, seg, fin)
+        self._segment = max(debut, 1)
+        if dernier is not None:
+            # On continue dans le dernier segment: coupe une éventuelle fin de
+            # fichier à moitié écrite avant de réécrire derrière
+            self._segment, seg, fin = dernier
+            if os.path.getsize(seg) > fin:
+                with open(seg, "r+b") as f:
+                    f.truncate(fin)
+        return n_records
+
+    # ---- écriture
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._f = open(self._segment_path(self._segment), "ab")
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+        return self
+
+    def log_tick(self, l_bieres, nouvelle_bougie=False):
+        """Ajoute l'état du tick au journal (un seul write, pas de fsync sauf "always")."""
+        kind = NOUVELLE_BOUGIE if nouvelle_bougie else TICK
+        prix, ventes, t_bougie, ohlc = _etat(l_bieres)
+        self._f.write(_encode(kind, time.time(), prix, ventes, t_bougie, ohlc))
+        self._f.flush()
+        if self.fsync == "always":
+            os.fsync(self._f.fileno())
+        else:
+            self._dirty = True
+        self._depuis_snapshot += 1
+        if self._depuis_snapshot >= self.snapshot_every:
+            # Nouveau segment: le snapshot le prend pour origine, le thread supprime
+            # les segments précédents une fois le snapshot sur disque
+            self._depuis_snapshot = 0
+            ancien = self._f
+            self._segment += 1
+            self._f = open(self._segment_path(self._segment), "ab")
+            self._jobs.put((self._snapshot_data(l_bieres, prix, ventes), ancien))
+
+    def _snapshot_data(self, l_bieres, prix, ventes):
+        # Copie côté tick (quelques centaines de Ko), écriture côté thread
+        cap = max(len(b.bougies) for b in l_bieres)
+        t = np.zeros((len(l_bieres), cap), dtype="datetime64[ns]")
+        ohlcv = np.zeros((len(l_bieres), cap, 5))
+        n_bougies = np.zeros(len(l_bieres), dtype=np.int64)
+        for i, b in enumerate(l_bieres):
+            bt, bd = b.bougies.arrays()
+            n_bougies[i] = len(bt)
+            t[i, :len(bt)] = bt
+            ohlcv[i, :len(bt)] = bd
+        return dict(noms=np.array([b.nom for b in l_bieres]), prix=prix, ventes=ventes,
+                    t=t, ohlcv=ohlcv, n_bougies=n_bougies,
+                    segment=np.int64(self._segment), offset=np.int64(self._f.tell()))
+
+    def _write_snapshot(self, data, ancien):
+        # Tant que le nouveau snapshot n'est pas en place, la reprise passe par
+        # l'ancien snapshot et l'ancien segment: il doit être complet sur disque
+        os.fsync(ancien.fileno())
+        ancien.close()
+        tmp = self.snapshot_path + ".tmp.npz"
+        np.savez(tmp, **data)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        _fsync_dossier(self.snapshot_path)
+        for n, seg in segments(self.path):
+            if n < data["segment"]:
+                os.remove(seg)
+
+    def _run(self):
+        while True:
+            try:
+                job = self._jobs.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                job = None
+            if job is StopIteration:
+                return
+            try:
+                if job is not None:
+                    self._write_snapshot(*job)
+                elif self._dirty and self.fsync == "interval":
+                    self._dirty = False
+                    os.fsync(self._f.fileno())
+            except (OSError, ValueError) as e:
+                print(f"journal: {e}")
+
+    def close(self):
+        if self._f is None:
+            return
+        self._jobs.put(StopIteration)
+        if self._thread is not None:
+            self._thread.join()
+        self._f.flush()
+        if self.fsync != "never":
+            os.fsync(self._f.fileno())
+        self._f.close()
+        self._f = None
+# =================== /Journal du marché ============================================
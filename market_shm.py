@@ -0,0 +1,201 @@
+# ====================== Snapshot du marché en mémoire partagée ====================
+# Le process principal publie prix, ventes et dernières bougies dans un segment
+# multiprocessing.shared_memory nommé, à disposition fixe. Les consommateurs locaux
+# (ticker LED, script de stats, 2e écran) lisent sans Sheets ni réseau, en quelques
+# microsecondes. Cohérence par seqlock: compteur impair = écriture en cours.
+#
+# Disposition (little-endian), en-tête de 64 octets puis tableaux alignés sur 8:
+#   0  magic    8s   b"BOURSHM1"
+#   8  layout   u4   version de la disposition (1)
+#   12 n        u4   nb de bières
+#   16 k        u4   nb de bougies par bière
+#   20 nom_len  u4   octets par nom (UTF-8, complété par des \0)
+#   24 seq      u8   seqlock
+#   32 ts       f8   time.time() de la dernière publication
+#   40 n_pub    u8   nb de publications
+#   noms      n * nom_len
+#   prix      f8[n]
+#   ventes    i8[n]
+#   n_bougies i8[n]      bougies valides (les plus récentes à la fin)
+#   t         i8[n, k]   début de bougie, ns epoch (naïf, heure locale)
+#   ohlc      f8[n, k, 4]
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+MAGIC = b"BOURSHM1"
+LAYOUT = 1
+HEADER = struct.Struct("<8sIIII")
+HEADER_SIZE = 64
+SEQ_OFF, TS_OFF, NPUB_OFF = 24, 32, 40
+NOM_LEN = 32
+N_BOUGIES = 30
+
+
+def _align(x):
+    return (x + 7) & ~7
+
+
+def _offsets(n, k, nom_len):
+    off = {}
+    pos = HEADER_SIZE
+    for nom, taille in (("noms", n * nom_len), ("prix", 8 * n), ("ventes", 8 * n),
+                        ("n_bougies", 8 * n), ("t", 8 * n * k), ("ohlc", 32 * n * k)):
+        off[nom] = pos
+        pos = _align(pos + taille)
+    return off, pos
+
+
+def _vues(buf, n, k, nom_len):
+    off, _ = _offsets(n, k, nom_len)
+    return SimpleNamespace(
+        seq=np.ndarray((), "<u8", buf, SEQ_OFF),
+        ts=np.ndarray((), "<f8", buf, TS_OFF),
+        n_pub=np.ndarray((), "<u8", buf, NPUB_OFF),
+        prix=np.ndarray((n,), "<f8", buf, off["prix"]),
+        ventes=np.ndarray((n,), "<i8", buf, off["ventes"]),
+        n_bougies=np.ndarray((n,), "<i8", buf, off["n_bougies"]),
+        t=np.ndarray((n, k), "<i8", buf, off["t"]),
+        ohlc=np.ndarray((n, k, 4), "<f8", buf, off["ohlc"]),
+    )
+
+
+class MarketSnapshotWriter:
+    """Côté marché: crée le segment `name` et y publie l'état des `biere` après chaque tick."""
+
+    def __init__(self, name, l_bieres, n_bougies=N_BOUGIES, nom_len=NOM_LEN):
+        self.name = name
+        self.l_bieres = l_bieres
+        self.k = n_bougies
+        n = len(l_bieres)
+        _, taille = _offsets(n, n_bougies, nom_len)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=taille)
+        except FileExistsError:
+            # Segment laissé par un process précédent qui a planté: on le recrée
+            ancien = shared_memory.SharedMemory(name=name)
+            ancien.close()
+            ancien.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=taille)
+        buf = self._shm.buf
+        buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        HEADER.pack_into(buf, 0, MAGIC, LAYOUT, n, n_bougies, nom_len)
+        off, _ = _offsets(n, n_bougies, nom_len)
+        for i, b in enumerate(l_bieres):
+            nom = b.nom.encode("utf-8")[:nom_len]
+            buf[off["noms"] + i * nom_len: off["noms"] + i * nom_len + len(nom)] = nom
+        self.v = _vues(buf, n, n_bougies, nom_len)
+
+    def publish(self):
+        v = self.v
+        v.seq[...] = v.seq + 1          # impair: écriture en cours
+        for i, b in enumerate(self.l_bieres):
+            v.prix[i] = b.prix
+            v.ventes[i] = b.h_ventes[-1]
+            t, data = b.bougies.arrays(self.k)
+            m = len(t)
+            v.n_bougies[i] = m
+            v.t[i, self.k - m:] = t.astype("datetime64[ns]").astype(np.int64)
+            v.ohlc[i, self.k - m:] = data[:, :4]
+        v.ts[...] = time.time()
+        v.n_pub[...] = v.n_pub + 1
+        v.seq[...] = v.seq + 1          # pair: snapshot cohérent
+
+    def close(self):
+        self.v = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+class MarketSnapshotReader:
+    """
+    Côté consommateur: s'attache au segment `name` en lecture.
+
+    read() retourne une copie cohérente (quelques µs); pour lire sans copie:
+        seq = r.begin(); ...lire r.v.prix, r.v.ohlc...; if r.validate(seq): ok
+    """
+
+    def __init__(self, name):
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: le resource_tracker supprimerait le segment du marché à notre sortie
+            self._shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        buf = self._shm.buf
+        magic, layout, n, k, nom_len = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or layout != LAYOUT:
+            self._shm.close()
+            raise ValueError(f"segment {name!r}: disposition inconnue ({magic!r}, v{layout})")
+        off, _ = _offsets(n, k, nom_len)
+        self.noms = [bytes(buf[off["noms"] + i * nom_len: off["noms"] + (i + 1) * nom_len])
+                     .rstrip(b"\0").decode("utf-8", "replace") for i in range(n)]
+        self.k = k
+        self.v = _vues(buf, n, k, nom_len)
+
+    @property
+    def seq(self):
+        return int(self.v.seq)
+
+    def begin(self):
+        """Attend un compteur pair (pas d'écriture en cours) et le retourne."""
+        while True:
+            s = int(self.v.seq)
+            if not s & 1:
+                return s
+            time.sleep(0)
+
+    def validate(self, seq):
+        """True si aucune publication n'a eu lieu depuis begin()."""
+        return int(self.v.seq) == seq
+
+    def read(self, retries=1000):
+        """Snapshot cohérent: SimpleNamespace(seq, ts, noms, prix, ventes, n_bougies, t, ohlc)."""
+        v = self.v
+        for _ in range(retries):
+            s = self.begin()
+            snap = SimpleNamespace(seq=s, ts=float(v.ts), noms=self.noms, prix=v.prix.copy(),
+                                   ventes=v.ventes.copy(), n_bougies=v.n_bougies.copy(),
+                                   t=v.t.copy(), ohlc=v.ohlc.copy())
+            if self.validate(s):
+                return snap
+        raise TimeoutError("snapshot en cours d'écriture en continu")
+
+    def read_prix(self, retries=1000):
+        """{nom: prix} cohérent, sans les bougies."""
+        for _ in range(retries):
+            s = self.begin()
+            prix = self.v.prix.copy()
+            if self.validate(s):
+                return dict(zip(self.noms, prix.tolist()))
+        raise TimeoutError("snapshot en cours d'écriture en continu")
+
+    def close(self):
+        self.v = None
+        self._shm.close()
+
+
+def main():
+    """Ticker texte: python -m market_shm [nom_du_segment]"""
+    nom = sys.argv[1] if len(sys.argv) > 1 else "bourse_marche"
+    r = MarketSnapshotReader(nom)
+    vu = None
+    try:
+        while True:
+            if r.seq != vu:
+                vu = r.seq
+                print("  ".join(f"{n} {p:.2f}€" for n, p in r.read_prix().items()), flush=True)
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        r.close()
+
+
+if __name__ == "__main__":
+    main()
+# =================== /Snapshot du marché en mémoire partagée =======================
@@ -0,0 +1,170 @@
+# ====================== Mesures par étape du tick =================================
+# Chronométrage léger (perf_counter) de chaque étape: lecture Sheets, moteur,
+# bougies, rendu par bière, payload et appel IA. Percentiles sur une fenêtre
+# glissante d'échantillons; export JSON (fichier ou HTTP) et overlay Tk.
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+FENETRE = 512   # échantillons gardés par étape pour p50/p95
+
+
+class StageStats:
+    """Durées d'une étape: fenêtre glissante pour les percentiles, total et max depuis le début."""
+
+    def __init__(self, fenetre=FENETRE):
+        self.echantillons = deque(maxlen=fenetre)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.dernier = 0.0
+
+    def observe(self, duree):
+        self.echantillons.append(duree)
+        self.n += 1
+        self.total += duree
+        self.dernier = duree
+        if duree > self.max:
+            self.max = duree
+
+    def resume(self):
+        e = np.fromiter(self.echantillons, float, len(self.echantillons))
+        p50, p95 = np.percentile(e, (50, 95)) if len(e) else (0.0, 0.0)
+        return {
+            "n": self.n,
+            "dernier_ms": self.dernier * 1e3,
+            "p50_ms": float(p50) * 1e3,
+            "p95_ms": float(p95) * 1e3,
+            "max_ms": self.max * 1e3,
+            "moy_ms": self.total / self.n * 1e3 if self.n else 0.0,
+        }
+
+
+class Metrics:
+    """
+    Registre thread-safe {étape: StageStats}. Les threads (ingestion, IA) et
+    le thread Tk écrivent dans le même registre.
+    """
+
+    def __init__(self, fenetre=FENETRE):
+        self.fenetre = fenetre
+        self._stages = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+        self.actif = True
+        self.debut = time.time()
+
+    def observe(self, etape, duree):
+        if not self.actif:
+            return
+        with self._lock:
+            s = self._stages.get(etape)
+            if s is None:
+                s = self._stages[etape] = StageStats(self.fenetre)
+            s.observe(duree)
+
+    @contextmanager
+    def mesure(self, etape):
+        """with METRICS.mesure("moteur"): ... — chronomètre le bloc."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(etape, time.perf_counter() - t0)
+
+    def add_source(self, nom, fn):
+        """Ajoute un bloc calculé à l'export (ex. stats de retard du planificateur)."""
+        self._sources[nom] = fn
+
+    def snapshot(self):
+        with self._lock:
+            etapes = {nom: s.resume() for nom, s in self._stages.items()}
+        out = {"ts": time.time(), "uptime_s": time.time() - self.debut, "etapes": etapes}
+        for nom, fn in self._sources.items():
+            try:
+                out[nom] = fn()
+            except Exception as e:
+                out[nom] = {"erreur": repr(e)}
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def texte(self):
+        """Tableau compact pour l'overlay Tk."""
+        etapes = sorted(self.snapshot()["etapes"].items())
+        w = max([16] + [len(nom) + 1 for nom, _ in etapes])   # rendu:<bière> peut dépasser
+        lignes = [f"{'étape':<{w}}{'p50':>8}{'p95':>8}{'max':>8}{'n':>7}"]
+        for nom, s in etapes:
+            lignes.append(f"{nom:<{w}}{s['p50_ms']:>8.1f}{s['p95_ms']:>8.1f}{s['max_ms']:>8.1f}{s['n']:>7}")
+        return "\n".join(lignes) + "\n(ms)"
+
+    def ecrit(self, path):
+        """Écrit le snapshot JSON de façon atomique (lecteurs jamais face à un fichier partiel)."""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """GET http://host:port/metrics -> snapshot JSON, servi par un thread daemon."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        serveur = ThreadingHTTPServer((host, port), Handler)
+        serveur.daemon_threads = True
+        threading.Thread(target=serveur.serve_forever, name="metrics-http", daemon=True).start()
+        return serveur
+
+
+# Registre du process, partagé par tous les modules
+METRICS = Metrics()
+
+
+class TkOverlay:
+    """Tableau des mesures par-dessus la fenêtre Tk, affiché/masqué par une touche."""
+
+    def __init__(self, root, metrics=METRICS, touche="<F2>"):
+        import tkinter as tk
+        self.root = root
+        self.metrics = metrics
+        self.visible = False
+        self.label = tk.Label(root, text="", font=("Courier", 11), justify="left",
+                              anchor="nw", bg="#202020", fg="#00ff80")
+        root.bind(touche, lambda e: self.toggle())
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible:
+            self.rafraichit()
+            self.label.place(x=10, y=10)
+            self.label.lift()
+        else:
+            self.label.place_forget()
+
+    def rafraichit(self):
+        """À appeler périodiquement; ne fait rien quand l'overlay est masqué."""
+        if self.visible:
+            self.label.config(text=self.metrics.texte())
+# =================== /Mesures par étape du tick ====================================
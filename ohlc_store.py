@@ -0,0 +1,86 @@
+# ====================== Stockage OHLCV en anneau (NumPy) ==========================
+# Capacité fixe: ajout et mise à jour de la dernière bougie en O(1), mémoire constante.
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+class OHLCStore:
+    """
+    Anneau de `capacity` bougies OHLCV.
+
+    Chaque bougie est écrite deux fois (positions p et p + capacity) dans un
+    tableau de 2*capacity lignes: n'importe quelle fenêtre des N dernières
+    bougies (N <= capacity) est alors une tranche contiguë, donc exposable
+    sans copie en DataFrame.
+    """
+
+    def __init__(self, capacity=720):
+        if capacity < 1:
+            raise ValueError("capacity doit être >= 1")
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, len(COLUMNS)), dtype=float)
+        self._t = np.zeros(2 * capacity, dtype="datetime64[ns]")
+        self._n = 0   # nb total de bougies ajoutées depuis le début
+
+    def __len__(self):
+        return min(self._n, self.capacity)
+
+    @property
+    def total(self):
+        """Nombre de bougies ajoutées depuis la création (y compris celles écrasées)."""
+        return self._n
+
+    def _write(self, pos, t, row):
+        self._data[pos] = row
+        self._data[pos + self.capacity] = row
+        self._t[pos] = t
+        self._t[pos + self.capacity] = t
+
+    def append(self, t, open, high, low, close, volume=100.0):
+        """Ouvre une nouvelle bougie (écrase la plus ancienne si l'anneau est plein)."""
+        self._write(self._n % self.capacity, np.datetime64(t, "ns"),
+                    (open, high, low, close, volume))
+        self._n += 1
+
+    def update_last(self, high=None, low=None, close=None, volume=None, open=None):
+        """Met à jour en place les champs fournis de la dernière bougie."""
+        if self._n == 0:
+            raise IndexError("aucune bougie")
+        pos = (self._n - 1) % self.capacity
+        for col, v in ((OPEN, open), (HIGH, high), (LOW, low), (CLOSE, close), (VOLUME, volume)):
+            if v is not None:
+                self._data[pos, col] = v
+                self._data[pos + self.capacity, col] = v
+
+    def last(self):
+        """(t, open, high, low, close, volume) de la dernière bougie."""
+        if self._n == 0:
+            raise IndexError("aucune bougie")
+        pos = (self._n - 1) % self.capacity
+        return (self._t[pos],) + tuple(float(x) for x in self._data[pos])
+
+    def _slice(self, n=None):
+        size = len(self)
+        n = size if n is None else max(0, min(n, size))
+        end = (self._n - 1) % self.capacity + self.capacity + 1 if self._n else 0
+        return slice(end - n, end)
+
+    def arrays(self, n=None):
+        """Vues (temps, données[N, 5]) sur les n dernières bougies, sans copie."""
+        sl = self._slice(n)
+        return self._t[sl], self._data[sl]
+
+    def frame(self, n=None):
+        """
+        DataFrame des n dernières bougies (toutes si n est None) partageant la
+        mémoire de l'anneau: à lire tout de suite, il reflète les écritures suivantes.
+        """
+        t, data = self.arrays(n)
+        return pd.DataFrame(data, index=pd.DatetimeIndex(t), columns=COLUMNS, copy=False)
+
+    def tail(self, n=5):
+        return self.frame(n)
+# =================== /Stockage OHLCV en anneau =====================================
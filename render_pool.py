@@ -0,0 +1,174 @@
+# ====================== Rastérisation des graphes hors process ======================
+# Un pool multiprocessing dessine chaque graphe (Agg) dans un tampon RGBA en mémoire
+# partagée; le thread Tk ne fait que copier les pixels dans des PhotoImage, une fois
+# le rendu terminé (jamais d'attente du pool sur le thread Tk).
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# État propre à chaque worker (initialisé par _init_worker)
+_W = {}
+
+
+def _init_worker(shm_name, shape, style, figsize, dpi):
+    import matplotlib
+    matplotlib.use("Agg")
+    # Workers "spawn": même resource_tracker que le parent, seul le parent fait unlink()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _W.update(shm=shm, pixels=np.ndarray(shape, dtype=np.uint8, buffer=shm.buf),
+              style=style, figsize=figsize, dpi=dpi, fig=None)
+
+
+def _figure(df):
+    if _W["fig"] is None:
+        import mplfinance as mpf
+        # Même création que le __main__ de hh_bourse_v2: le style mpf pose les rc (fond, ticks)
+        fig, axes = mpf.plot(df, type="candle", figsize=_W["figsize"], ylabel="",
+                             style=_W["style"], returnfig=True)
+        fig.set_dpi(_W["dpi"])
+        _W.update(fig=fig, ax=axes[0], canvas=fig.canvas)
+    return _W["fig"], _W["ax"], _W["canvas"]
+
+
+def _render(task):
+    """Dessine une bière dans son slot de mémoire partagée. task = (slot, temps_ns, ohlc)."""
+    import mplfinance as mpf
+    from matplotlib.ticker import FuncFormatter
+    slot, temps, ohlc = task
+    df = pd.DataFrame(ohlc, index=pd.DatetimeIndex(temps.astype("datetime64[ns]")),
+                      columns=["Open", "High", "Low", "Close", "Volume"])
+    fig, ax, canvas = _figure(df)
+    ax.clear()
+    mpf.plot(df, ax=ax, type="candle", ylabel="", style=_W["style"], returnfig=False)
+    # Mêmes tailles que CandleRenderer: 15 graphes tiennent sur l'écran
+    ax.tick_params(axis="x", labelsize=3)
+    ax.tick_params(axis="y", labelsize=5)
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda y, _: f"{y:.1f}"))
+    canvas.draw()
+    h, w = _W["pixels"].shape[1:3]
+    _W["pixels"][slot] = np.asarray(canvas.buffer_rgba())[:h, :w]
+    return slot
+
+
+class RenderPool:
+    """
+    Pool de `workers` process qui rastérisent les graphes dans un segment
+    shared_memory de forme (n_bieres, hauteur, largeur, 4).
+
+    dpi: par défaut celui des figures Tk (rcParams["figure.dpi"]), pour que les
+    images aient la taille des graphes du rendu dans le process.
+    """
+
+    def __init__(self, n_bieres, style, figsize=(1.45, 1.2), dpi=None, workers=None):
+        if dpi is None:
+            import matplotlib
+            dpi = matplotlib.rcParams["figure.dpi"]
+        self.n_bieres = n_bieres
+        self.largeur = int(round(figsize[0] * dpi))
+        self.hauteur = int(round(figsize[1] * dpi))
+        shape = (n_bieres, self.hauteur, self.largeur, 4)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.pixels = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+        self.pixels[:] = 0
+        # spawn: pas de fork d'un process qui a déjà Tk et des threads
+        ctx = mp.get_context("spawn")
+        self.workers = workers or mp.cpu_count()
+        self._pool = ctx.Pool(self.workers, initializer=_init_worker,
+                              initargs=(self._shm.name, shape, dict(style), figsize, dpi))
+
+    @staticmethod
+    def _tasks(l_arrays, slots):
+        slots = range(len(l_arrays)) if slots is None else slots
+        return [(s, np.asarray(t).astype("int64"), np.array(d))
+                for s, (t, d) in zip(slots, l_arrays) if len(t)]
+
+    def render(self, l_arrays, slots=None):
+        """
+        l_arrays: [(temps, ohlc), ...] (ex: OHLCStore.arrays(15)) pour chaque slot.
+        Bloque jusqu'à ce que tous les graphes soient dans `pixels` (benchmarks);
+        retourne les slots rendus.
+        """
+        return self._pool.map(_render, self._tasks(l_arrays, slots), chunksize=1)
+
+    def render_async(self, l_arrays, slots=None, callback=None, error_callback=None):
+        """
+        Comme render() sans bloquer: callback(slots) est appelé depuis un thread du
+        pool quand tous les graphes sont dans `pixels`.
+        """
+        return self._pool.map_async(_render, self._tasks(l_arrays, slots), chunksize=1,
+                                    callback=callback, error_callback=error_callback)
+
+    def rgba(self, slot):
+        """Vue (hauteur, largeur, 4) sur les pixels du slot, sans copie."""
+        return self.pixels[slot]
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        del self.pixels
+        self._shm.close()
+        self._shm.unlink()
+
+
+class TkPoolView:
+    """
+    Côté Tk: un Label par bière, alimenté par les tampons RGBA du RenderPool.
+
+    update_all() envoie le rendu au pool et rend la main tout de suite; les images
+    sont posées par root.after() à la fin du rendu. Un seul rendu à la fois: un
+    tick arrivé pendant un rendu est gardé et traité juste après (le plus récent).
+    """
+
+    def __init__(self, pool, l_labels, n_bougies=15, root=None):
+        self.pool = pool
+        self.labels = l_labels
+        self.n = n_bougies
+        self.root = root if root is not None else l_labels[0]
+        self._photos = [None] * len(l_labels)
+        self._signatures = [None] * len(l_labels)
+        self._en_cours = False
+        self._attente = None
+
+    def update_all(self, l_arrays):
+        if self._en_cours:
+            # arrays() renvoie des vues sur l'anneau: une nouvelle bougie les décalerait
+            self._attente = [(np.array(t), np.array(d)) for t, d in l_arrays]
+            return []
+        # On ne renvoie au pool que les bières dont la dernière bougie a changé
+        sales = []
+        for i, (t, d) in enumerate(l_arrays):
+            sig = (len(t), t[-1] if len(t) else None, tuple(d[-1, :4]) if len(d) else None)
+            if sig != self._signatures[i]:
+                self._signatures[i] = sig
+                sales.append(i)
+        if not sales:
+            return []
+        self._en_cours = True
+        self.pool.render_async([l_arrays[i] for i in sales], slots=sales,
+                               callback=lambda _: self.root.after(0, self._affiche, sales),
+                               error_callback=lambda e: self.root.after(0, self._echec, sales, e))
+        return sales
+
+    def _affiche(self, sales):
+        from PIL import Image, ImageTk
+        for i in sales:
+            img = Image.frombuffer("RGBA", (self.pool.largeur, self.pool.hauteur),
+                                   self.pool.rgba(i), "raw", "RGBA", 0, 1)
+            self._photos[i] = ImageTk.PhotoImage(img)
+            self.labels[i].configure(image=self._photos[i])
+        self._fin()
+
+    def _echec(self, sales, e):
+        print(f"rendu: {e}")
+        for i in sales:
+            self._signatures[i] = None   # retenté au prochain tick
+        self._fin()
+
+    def _fin(self):
+        self._en_cours = False
+        if self._attente is not None:
+            l_arrays, self._attente = self._attente, None
+            self.update_all(l_arrays)
+# =================== /Rastérisation des graphes hors process ========================
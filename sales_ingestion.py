@@ -0,0 +1,191 @@
+# ====================== Lecture groupée des ventes (Google Sheets) ===============
+# Un seul appel batch_get par tick au lieu d'un worksheet.cell() par bière.
+import re
+import threading
+import time
+from collections import deque
+from types import MappingProxyType
+from typing import NamedTuple
+
+from metrics import METRICS
+
+_A1_RE = re.compile(r"^([A-Za-z]+)(\d+)$")
+
+
+def rowcol_to_a1(row, col):
+    """(1, 1) -> 'A1', (3, 28) -> 'AB3'."""
+    lettres = ""
+    while col > 0:
+        col, reste = divmod(col - 1, 26)
+        lettres = chr(ord("A") + reste) + lettres
+    return f"{lettres}{row}"
+
+
+def a1_to_rowcol(label):
+    """'AB3' -> (3, 28)."""
+    m = _A1_RE.match(label.strip())
+    if m is None:
+        raise ValueError(f"notation A1 invalide: {label!r}")
+    col = 0
+    for ch in m.group(1).upper():
+        col = col * 26 + (ord(ch) - ord("A") + 1)
+    return int(m.group(2)), col
+
+
+def _to_int(value):
+    """Compteur de ventes -> int (cellule vide = 0)."""
+    if value is None:
+        return 0
+    txt = str(value).strip()
+    if not txt:
+        return 0
+    return int(float(txt.replace(",", ".")))
+
+
+class SalesReader:
+    """
+    Lit tous les compteurs de ventes d'une feuille en un seul appel réseau.
+
+    Les coordonnées (i, j) de chaque bière sont converties une fois pour toutes
+    en une plage A1 englobante + des offsets dans la grille renvoyée.
+    """
+
+    def __init__(self, worksheet, l_bieres):
+        self.worksheet = worksheet
+        self.noms = [b.nom for b in l_bieres]
+        coords = [(b.i, b.j) for b in l_bieres]
+        i0 = min(i for i, _ in coords)
+        j0 = min(j for _, j in coords)
+        i1 = max(i for i, _ in coords)
+        j1 = max(j for _, j in coords)
+        self.plage = f"{rowcol_to_a1(i0, j0)}:{rowcol_to_a1(i1, j1)}"
+        self._offsets = [(i - i0, j - j0) for i, j in coords]
+
+    def lire(self):
+        """Retourne {nom_biere: ventes cumulées} en un seul batch_get."""
+        return self.decode(self.worksheet.batch_get([self.plage])[0])
+
+    @property
+    def plage_qualifiee(self):
+        """Plage préfixée par le nom de l'onglet ('Salle A'!A1:M21), pour values_batch_get."""
+        titre = self.worksheet.title.replace("'", "''")
+        return f"'{titre}'!{self.plage}"
+
+    def decode(self, grille):
+        """Grille renvoyée par l'API (lignes de chaînes) -> {nom_biere: ventes cumulées}."""
+        ventes = {}
+        for nom, (di, dj) in zip(self.noms, self._offsets):
+            # L'API tronque les lignes/colonnes vides en fin de plage
+            ligne = grille[di] if di < len(grille) else []
+            ventes[nom] = _to_int(ligne[dj] if dj < len(ligne) else None)
+        return ventes
+
+
+class BatchSalesReader:
+    """
+    Lit les compteurs de plusieurs marchés: un seul values_batch_get par classeur,
+    quel que soit le nombre de salles (un onglet chacune).
+
+    lecteurs: {nom_marche: (classeur, SalesReader)}; lire() -> {nom_marche: {nom_biere: ventes}}.
+    """
+
+    def __init__(self, lecteurs):
+        self.lecteurs = dict(lecteurs)
+        self._groupes = {}
+        for marche, (classeur, lecteur) in self.lecteurs.items():
+            self._groupes.setdefault(id(classeur), (classeur, []))[1].append((marche, lecteur))
+
+    def lire(self):
+        ventes = {}
+        for classeur, membres in self._groupes.values():
+            rep = classeur.values_batch_get([l.plage_qualifiee for _, l in membres])
+            for (marche, lecteur), bloc in zip(membres, rep["valueRanges"]):
+                ventes[marche] = lecteur.decode(bloc.get("values", []))
+        return ventes
+
+
+class SalesSnapshot(NamedTuple):
+    """Relevé immuable des compteurs, produit par le thread d'ingestion."""
+    ts: float                 # time.time() du relevé
+    ventes: MappingProxyType  # {nom_biere: ventes cumulées}, lecture seule
+    latence: float            # durée de l'appel Sheets (s)
+
+
+class SnapshotQueue:
+    """
+    File bornée thread-safe, le plus ancien élément est jeté quand elle est pleine.
+
+    Les compteurs étant cumulés, jeter un relevé ne perd aucune vente:
+    le relevé suivant les contient.
+    """
+
+    def __init__(self, maxlen=4):
+        self._items = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._lock:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+
+    def drain(self):
+        """Vide la file et retourne tous les éléments (du plus ancien au plus récent)."""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+        return items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+
+class IngestionWorker(threading.Thread):
+    """
+    Thread qui interroge la feuille toutes les `periode` secondes et pousse
+    des SalesSnapshot dans une SnapshotQueue. Le thread Tk ne fait que vider
+    la file: une lenteur de Sheets ne gèle plus l'affichage.
+    """
+
+    def __init__(self, lecteur, periode=15.0, maxlen=4):
+        super().__init__(name="ingestion-ventes", daemon=True)
+        self.lecteur = lecteur
+        self.periode = periode
+        self.queue = SnapshotQueue(maxlen=maxlen)
+        self.dernier = None       # ventes du dernier relevé réussi
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    def poll_once(self):
+        t0 = time.perf_counter()
+        try:
+            ventes = self.lecteur.lire()
+        except Exception as e:
+            # On garde le dernier relevé côté GUI, on retentera au prochain tour
+            self.last_error = e
+            print(f"ingestion: {e}")
+            return None
+        self.last_error = None
+        snap = SalesSnapshot(time.time(), MappingProxyType(dict(ventes)),
+                             time.perf_counter() - t0)
+        METRICS.observe("lecture_sheet", snap.latence)
+        self.dernier = snap.ventes
+        self.queue.put(snap)
+        return snap
+
+    def run(self):
+        while not self._stop_event.is_set():
+            debut = time.monotonic()
+            self.poll_once()
+            # Cadence fixe, quelle que soit la durée de l'appel
+            reste = self.periode - (time.monotonic() - debut)
+            self._stop_event.wait(max(0.0, reste))
+
+    def stop(self, timeout=None):
+        """Arrêt propre: réveille le thread et attend la fin de l'appel en cours."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+# =================== /Lecture groupée des ventes ===================================
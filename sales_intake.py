@@ -0,0 +1,207 @@
+# ====================== Prise de commandes locale (HTTP + SQLite) =================
+# Le bar ou un script de caisse poste les commandes ici au lieu d'attendre le
+# relevé Sheets (jusqu'à 15 s). Chaque commande porte un order_id: la rejouer
+# (retry réseau, double clic) ne la compte qu'une fois. Le relevé Sheets, quand il
+# est gardé, entre dans la même base comme une source à part (synchronise): chaque
+# source compte ses propres ventes et les totaux s'additionnent.
+import json
+import math
+import sqlite3
+import threading
+import time
+
+from metrics import METRICS
+
+QTE_MAX = 10_000   # par commande (un relevé Sheets peut rattraper une soirée entière)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commandes (
+    order_id TEXT PRIMARY KEY,
+    biere    TEXT NOT NULL,
+    qte      INTEGER NOT NULL,
+    ts       REAL NOT NULL,
+    source   TEXT NOT NULL
+)
+"""
+
+
+class OrderStore:
+    """
+    Commandes persistées dans SQLite (INSERT OR IGNORE sur order_id).
+    Les cumuls par bière (et par source) sont tenus en mémoire: la lecture par tick
+    ne touche pas la base. Une base par soirée: elle n'est jamais remise à zéro.
+    """
+
+    def __init__(self, path=":memory:", noms=None):
+        self.path = path
+        self.noms = set(noms) if noms is not None else None
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._lock = threading.Lock()
+        self._recharge()
+        self.doublons = 0
+
+    def _recharge(self):
+        self._cumuls, self._par_source = {}, {}
+        for source, biere, qte in self._db.execute(
+                "SELECT source, biere, SUM(qte) FROM commandes GROUP BY source, biere"):
+            self._cumuls[biere] = self._cumuls.get(biere, 0) + qte
+            self._par_source.setdefault(source, {})[biere] = qte
+
+    def add_many(self, commandes, source="local"):
+        """
+        commandes: itérable de dicts {order_id, biere, qte=1, ts=maintenant}.
+        Retourne (nouvelles, doublons). Lève ValueError sans rien écrire si une commande est invalide.
+        """
+        lignes = []
+        for c in commandes:
+            order_id = c.get("order_id")
+            biere = c.get("biere")
+            qte = c.get("qte", 1)
+            ts = c.get("ts")
+            if not order_id or not isinstance(order_id, str):
+                raise ValueError("order_id manquant")
+            if not isinstance(biere, str) or (self.noms is not None and biere not in self.noms):
+                raise ValueError(f"bière inconnue: {biere!r}")
+            if not isinstance(qte, int) or isinstance(qte, bool) or not 0 < qte <= QTE_MAX:
+                raise ValueError(f"quantité invalide pour {order_id}: {qte!r}")
+            if ts is not None and (not isinstance(ts, (int, float)) or isinstance(ts, bool)
+                                   or not math.isfinite(ts)):
+                raise ValueError(f"ts invalide pour {order_id}: {ts!r}")
+            lignes.append((order_id, biere, qte, float(ts or time.time()), source))
+        nouvelles = 0
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for ligne in lignes:
+                    cur = self._db.execute("INSERT OR IGNORE INTO commandes VALUES (?, ?, ?, ?, ?)", ligne)
+                    if cur.rowcount:
+                        nouvelles += 1
+                        _, biere, qte, _, source = ligne
+                        self._cumuls[biere] = self._cumuls.get(biere, 0) + qte
+                        par_biere = self._par_source.setdefault(source, {})
+                        par_biere[biere] = par_biere.get(biere, 0) + qte
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                self._recharge()
+                raise
+            self.doublons += len(lignes) - nouvelles
+        return nouvelles, len(lignes) - nouvelles
+
+    def add(self, order_id, biere, qte=1, ts=None, source="local"):
+        """True si la commande est nouvelle, False si order_id était déjà enregistré."""
+        return self.add_many([{"order_id": order_id, "biere": biere, "qte": qte, "ts": ts}], source)[0] == 1
+
+    def synchronise(self, source, cumuls):
+        """
+        Enregistre les compteurs cumulés d'une source sans identifiants (relevé Sheets)
+        comme des commandes de cette source: la hausse d'un compteur devient une commande
+        "<source>:<bière>:<compteur>". Relire le même relevé, même après un redémarrage,
+        n'ajoute rien; un compteur qui baisse est ignoré. Retourne le nb de commandes ajoutées.
+        """
+        with self._lock:
+            deja = dict(self._par_source.get(source, {}))
+        commandes = [{"order_id": f"{source}:{nom}:{n}", "biere": nom, "qte": n - deja.get(nom, 0)}
+                     for nom, n in cumuls.items()
+                     if n > deja.get(nom, 0) and (self.noms is None or nom in self.noms)]
+        return self.add_many(commandes, source=source)[0] if commandes else 0
+
+    def cumuls(self):
+        """{nom_biere: quantité totale commandée, toutes sources}."""
+        with self._lock:
+            return dict(self._cumuls)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def fusionne_ventes(noms, *sources):
+    """
+    Compteurs cumulés fusionnés par max, pour des sources qui comptent les mêmes ventes
+    (les compteurs du tick précédent et le relevé du tick): un compteur ne recule
+    jamais. Des sources qui comptent des ventes différentes (Sheets et caisse) passent
+    par OrderStore.synchronise, où elles s'additionnent.
+    """
+    return {nom: max((s.get(nom, 0) for s in sources if s), default=0) for nom in noms}
+
+
+class SalesIntakeServer:
+    """
+    Endpoint HTTP (thread daemon):
+      POST /commandes  {"order_id": "...", "biere": "...", "qte": 1}  ou une liste
+                       -> 200 {"nouvelles": n, "doublons": d} | 400 {"erreur": ...}
+      GET  /cumuls     -> {nom_biere: quantité}
+    on_commande() est appelé (depuis le thread HTTP) quand au moins une commande est nouvelle.
+    """
+
+    def __init__(self, store, host="0.0.0.0", port=8081, on_commande=None):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.on_commande = on_commande
+        self._serveur = None
+
+    def _handler(self):
+        from http.server import BaseHTTPRequestHandler
+        intake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _json(self, code, obj):
+                body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.split("?")[0] == "/cumuls":
+                    self._json(200, intake.store.cumuls())
+                else:
+                    self._json(404, {"erreur": "inconnu"})
+
+            def do_POST(self):
+                if self.path.split("?")[0] != "/commandes":
+                    self._json(404, {"erreur": "inconnu"})
+                    return
+                t0 = time.perf_counter()
+                try:
+                    n = int(self.headers.get("Content-Length", "0"))
+                    corps = json.loads(self.rfile.read(n) or b"null")
+                    commandes = corps if isinstance(corps, list) else [corps]
+                    if not all(isinstance(c, dict) for c in commandes):
+                        raise ValueError("commande attendue: objet JSON")
+                    nouvelles, doublons = intake.store.add_many(commandes)
+                except (ValueError, TypeError, OverflowError) as e:   # json.JSONDecodeError: ValueError
+                    self._json(400, {"erreur": str(e)})
+                    return
+                except sqlite3.Error as e:
+                    self._json(500, {"erreur": f"base: {e}"})
+                    return
+                if nouvelles and intake.on_commande is not None:
+                    intake.on_commande()
+                self._json(200, {"nouvelles": nouvelles, "doublons": doublons})
+                METRICS.observe("commande_http", time.perf_counter() - t0)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        from http.server import ThreadingHTTPServer   # seulement si l'endpoint est activé
+        self._serveur = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._serveur.daemon_threads = True
+        self.port = self._serveur.server_address[1]
+        threading.Thread(target=self._serveur.serve_forever, name="commandes-http", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._serveur is not None:
+            self._serveur.shutdown()
+            self._serveur.server_close()
+# =================== /Prise de commandes locale ====================================
@@ -0,0 +1,199 @@
+# ====================== Planificateur à échéances ================================
+# Chaque tâche a sa période et une échéance absolue (horloge monotone). L'échéance
+# suivante est calculée depuis l'échéance précédente, pas depuis la fin du tick:
+# une tâche lente ne décale pas la cadence. Une tâche en retard de plus d'une
+# période n'est exécutée qu'une fois, les échéances manquées sont comptées "sautées".
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class Task:
+    """Tâche périodique: fn(*args) toutes les `periode` secondes."""
+
+    def __init__(self, nom, periode, fn, args=(), echeance=0.0, fenetre=256):
+        if periode <= 0:
+            raise ValueError(f"période invalide pour {nom!r}: {periode}")
+        self.nom = nom
+        self.periode = float(periode)
+        self.fn = fn
+        self.args = args
+        self.echeance = echeance
+        self.runs = 0
+        self.sautes = 0
+        self.erreurs = 0
+        self.last_error = None
+        self.retards = deque(maxlen=fenetre)   # retard à l'exécution (s), fenêtre glissante
+        self.retard_max = 0.0
+        self.duree = 0.0                       # durée de la dernière exécution (s)
+        self.duree_max = 0.0
+
+    def stats(self):
+        r = np.fromiter(self.retards, float, len(self.retards))
+        return {
+            "periode_s": self.periode,
+            "runs": self.runs,
+            "sautes": self.sautes,
+            "erreurs": self.erreurs,
+            "retard_moy_ms": float(r.mean() * 1e3) if len(r) else None,
+            "retard_p95_ms": float(np.percentile(r, 95) * 1e3) if len(r) else None,
+            "retard_max_ms": self.retard_max * 1e3,
+            "duree_ms": self.duree * 1e3,
+            "duree_max_ms": self.duree_max * 1e3,
+        }
+
+
+class Scheduler:
+    """
+    Planificateur mono-thread à échéances absolues.
+
+    Dans Tk, `after`/`cancel` sont root.after/root.after_cancel: le planificateur
+    se réarme sur la prochaine échéance, toutes les tâches tournent dans le
+    thread Tk. Sans `after`, run() fait la même boucle avec time.sleep
+    (simulation, benchmarks).
+    """
+
+    def __init__(self, after=None, cancel=None, clock=time.monotonic):
+        self._after = after
+        self._cancel = cancel
+        self.clock = clock
+        self.tasks = {}
+        self._id = None
+        self._running = False
+        self._reveil = threading.Event()
+        self._lock = threading.Lock()
+        self._declenches = set()
+
+    def add(self, nom, periode, fn, *args, delai=0.0):
+        """Ajoute une tâche; première exécution `delai` secondes après l'ajout."""
+        if nom in self.tasks:
+            raise ValueError(f"tâche déjà planifiée: {nom!r}")
+        self.tasks[nom] = Task(nom, periode, fn, args, self.clock() + delai)
+        if self._running and self._after is not None:
+            self._arme()
+        return self.tasks[nom]
+
+    def prochaine_echeance(self):
+        return min((t.echeance for t in self.tasks.values()), default=math.inf)
+
+    def run_pending(self, now=None):
+        """Exécute les tâches échues, par ordre d'échéance; retourne leurs noms."""
+        now = self.clock() if now is None else now
+        # Ordre d'ajout à échéance égale (ex. bougie avant rendu)
+        dues = sorted((t for t in self.tasks.values() if t.echeance <= now),
+                      key=lambda t: t.echeance)
+        for t in dues:
+            fin = self._execute(t, retard=True)
+            # Compensation de dérive: on repart de l'échéance, pas de l'heure courante
+            t.echeance += t.periode
+            if t.echeance <= fin:
+                # Échéances manquées regroupées en une seule exécution, à la suivante
+                manquees = math.floor((fin - t.echeance) / t.periode) + 1
+                t.sautes += manquees
+                t.echeance += manquees * t.periode
+        return [t.nom for t in dues]
+
+    def _execute(self, t, retard):
+        debut = self.clock()
+        if retard:
+            r = max(0.0, debut - t.echeance)
+            t.retards.append(r)
+            t.retard_max = max(t.retard_max, r)
+        try:
+            t.fn(*t.args)
+        except Exception as e:
+            # Une tâche en échec ne doit pas arrêter les autres
+            t.erreurs += 1
+            t.last_error = e
+            print(f"tâche {t.nom}: {e!r}")
+        fin = self.clock()
+        t.runs += 1
+        t.duree = fin - debut
+        t.duree_max = max(t.duree_max, t.duree)
+        return fin
+
+    def trigger(self, *noms):
+        """
+        Exécution immédiate, hors cadence, des tâches `noms` (ex. commande reçue).
+        Appelable depuis un autre thread: l'exécution a lieu dans le thread du
+        planificateur via after(0); les déclenchements rapprochés sont regroupés.
+        L'échéance périodique des tâches n'est pas modifiée.
+        """
+        with self._lock:
+            premier = not self._declenches
+            self._declenches.update(noms)
+        if premier:
+            if self._after is not None:
+                self._after(0, self._run_triggered)
+            else:
+                self._reveil.set()
+
+    def _run_triggered(self):
+        with self._lock:
+            noms, self._declenches = self._declenches, set()
+        for t in list(self.tasks.values()):
+            if t.nom in noms:
+                self._execute(t, retard=False)
+
+    # ---- boucle Tk
+    def start(self):
+        self._running = True
+        self._arme()
+
+    def _arme(self):
+        if self._id is not None and self._cancel is not None:
+            self._cancel(self._id)
+        delai = max(0.0, self.prochaine_echeance() - self.clock())
+        if math.isinf(delai):
+            self._id = None
+            return
+        # +1 ms: root.after arrondit à la milliseconde inférieure
+        self._id = self._after(int(delai * 1000) + 1, self._tick)
+
+    def _tick(self):
+        self._id = None
+        if not self._running:
+            return
+        self.run_pending()
+        self._arme()
+
+    # ---- boucle sans Tk
+    def run(self, duree=None):
+        """Boucle bloquante jusqu'à stop() ou pendant `duree` secondes."""
+        self._running = True
+        fin = math.inf if duree is None else self.clock() + duree
+        while self._running and self.clock() < fin:
+            if self._declenches:
+                self._run_triggered()
+            self.run_pending()
+            attente = min(self.prochaine_echeance(), fin) - self.clock()
+            if attente > 0 and not self._declenches:
+                # Réveillé plus tôt par trigger() ou stop()
+                self._reveil.wait(attente)
+                self._reveil.clear()
+        self._running = False
+
+    def stop(self):
+        self._running = False
+        self._reveil.set()
+        if self._id is not None and self._cancel is not None:
+            self._cancel(self._id)
+        self._id = None
+
+    def stats(self):
+        """{nom_tache: statistiques de retard et de durée}."""
+        return {nom: t.stats() for nom, t in self.tasks.items()}
+
+    def resume(self):
+        """Une ligne par tâche, pour les logs."""
+        lignes = []
+        for nom, s in self.stats().items():
+            p95 = "-" if s["retard_p95_ms"] is None else f"{s['retard_p95_ms']:.0f}"
+            lignes.append(f"{nom}: {s['runs']} runs, {s['sautes']} sautées, "
+                          f"retard p95 {p95} ms / max {s['retard_max_ms']:.0f} ms, "
+                          f"durée max {s['duree_max_ms']:.0f} ms")
+        return "\n".join(lignes)
+# =================== /Planificateur à échéances ====================================
@@ -0,0 +1,185 @@
+# ====================== Écriture différée de l'OHLC dans Sheets ===================
+# Les mises à jour de cellules sont fusionnées en mémoire (la dernière valeur gagne)
+# et envoyées par un thread en un seul batch_update par intervalle, sous un quota
+# "token bucket". Le thread Tk ne fait que déposer des valeurs: jamais d'appel réseau.
+import random
+import threading
+import time
+
+from metrics import METRICS
+from sales_ingestion import rowcol_to_a1
+
+BACKOFF_MIN = 2.0     # s, premier recul après un 429
+BACKOFF_MAX = 120.0   # s
+COLONNES_EN_PLUS = 60 # colonnes ajoutées d'un coup quand l'OHLC atteint le bord de la feuille
+
+
+class TokenBucket:
+    """`rate` jetons par seconde, au plus `capacity` en réserve."""
+
+    def __init__(self, rate, capacity=1.0, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError(f"débit invalide: {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._t = clock()
+
+    def _remplit(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._t) * self.rate)
+        self._t = now
+
+    def try_take(self, n=1.0):
+        self._remplit()
+        if self._tokens >= n:
+            self._tokens -= n
+            return True
+        return False
+
+    def wait_time(self, n=1.0):
+        """Secondes avant que `n` jetons soient disponibles."""
+        self._remplit()
+        return max(0.0, (n - self._tokens) / self.rate)
+
+
+def _status(e):
+    """Code HTTP d'une erreur gspread (APIError.code / .response.status_code), sinon None."""
+    code = getattr(e, "code", None)
+    if code is None:
+        code = getattr(getattr(e, "response", None), "status_code", None)
+    return code
+
+
+def _transitoire(e):
+    """Vaut la peine de réessayer: quota (429), erreur serveur (5xx) ou réseau."""
+    code = _status(e)
+    if code is None:
+        return isinstance(e, OSError)   # requests.ConnectionError / Timeout en héritent
+    return code == 429 or code >= 500
+
+
+def plages(cellules):
+    """
+    {(row, col): valeur} -> données batch_update, une plage par suite de lignes
+    contiguës dans une même colonne (une bougie O/H/L/C = une plage de 4 cellules).
+    """
+    data = []
+    par_col = {}
+    for (r, c), v in cellules.items():
+        par_col.setdefault(c, []).append((r, v))
+    for c in sorted(par_col):
+        lignes = sorted(par_col[c])
+        debut = 0
+        for k in range(1, len(lignes) + 1):
+            if k == len(lignes) or lignes[k][0] != lignes[k - 1][0] + 1:
+                r0, r1 = lignes[debut][0], lignes[k - 1][0]
+                data.append({"range": f"{rowcol_to_a1(r0, c)}:{rowcol_to_a1(r1, c)}",
+                             "values": [[v] for _, v in lignes[debut:k]]})
+                debut = k
+    return data
+
+
+class SheetWriteBehind(threading.Thread):
+    """
+    File d'écriture différée vers une feuille gspread.
+
+    put() fusionne les cellules en attente; toutes les `intervalle` secondes, si le
+    quota (`par_minute` appels, rafale `rafale`) le permet, un seul batch_update
+    part avec toutes les cellules. Sur 429, 5xx ou erreur réseau, les cellules sont
+    remises en file (sans écraser les valeurs plus récentes) et le thread recule
+    exponentiellement; toute autre erreur (4xx) est définitive: le lot est abandonné
+    pour ne pas bloquer les écritures suivantes. La feuille est élargie quand les
+    bougies dépassent sa dernière colonne.
+    """
+
+    def __init__(self, worksheet, intervalle=10.0, par_minute=30, rafale=2):
+        super().__init__(name="ecriture-sheet", daemon=True)
+        self.worksheet = worksheet
+        self.intervalle = intervalle
+        self.bucket = TokenBucket(par_minute / 60.0, rafale)
+        self._attente = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._backoff = 0.0
+        self.appels = 0
+        self.cellules = 0
+        self.rate_limited = 0
+        self.abandons = 0
+        self.last_error = None
+
+    def put(self, row, col, value):
+        """Non bloquant: remplace la valeur en attente pour (row, col)."""
+        with self._lock:
+            self._attente[(row, col)] = value
+
+    def put_many(self, cellules):
+        with self._lock:
+            self._attente.update(cellules)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._attente)
+
+    def flush_once(self, force=False):
+        """Un envoi si quelque chose attend et si le quota le permet; retourne True si envoyé."""
+        with self._lock:
+            if not self._attente:
+                return False
+        if not self.bucket.try_take() and not force:
+            return False
+        with self._lock:
+            lot, self._attente = self._attente, {}
+        t0 = time.perf_counter()
+        try:
+            self._agrandit(lot)
+            self.worksheet.batch_update(plages(lot), value_input_option="RAW")
+        except Exception as e:
+            self.last_error = e
+            if not _transitoire(e):
+                self.abandons += len(lot)
+                self._backoff = 0.0
+                print(f"écriture sheet: {e} ({len(lot)} cellules abandonnées)")
+                return False
+            with self._lock:
+                # Les valeurs arrivées pendant l'appel sont plus récentes: on ne les écrase pas
+                lot.update(self._attente)
+                self._attente = lot
+            if _status(e) == 429:
+                self.rate_limited += 1
+            self._backoff = min(BACKOFF_MAX, max(BACKOFF_MIN, self._backoff * 2))
+            print(f"écriture sheet: {e} (nouvel essai dans {self._backoff:.0f} s)")
+            return False
+        METRICS.observe("ecriture_sheet", time.perf_counter() - t0)
+        self._backoff = 0.0
+        self.last_error = None
+        self.appels += 1
+        self.cellules += len(lot)
+        return True
+
+    def _agrandit(self, lot):
+        # gspread: col_count / add_cols; les feuilles en mémoire n'ont pas de limite
+        col_count = getattr(self.worksheet, "col_count", None)
+        besoin = max(c for _, c in lot)
+        if col_count is not None and besoin > col_count:
+            self.worksheet.add_cols(besoin - col_count + COLONNES_EN_PLUS)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.flush_once()
+            attente = self.intervalle
+            if self._backoff:
+                # Gigue: plusieurs process ne retentent pas tous au même instant
+                attente = max(attente, self._backoff * random.uniform(0.8, 1.2))
+            elif len(self):
+                attente = max(attente, self.bucket.wait_time())
+            self._stop_event.wait(attente)
+
+    def stop(self, timeout=None):
+        """Arrête le thread puis tente un dernier envoi de ce qui reste."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        self.flush_once(force=True)
+# =================== /Écriture différée de l'OHLC ==================================
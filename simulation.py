@@ -0,0 +1,172 @@
+# ====================== Simulation / replay sans GUI ni Google ====================
+"""
+Rejoue la logique de prix de la bourse (MarketEngine, même dynamique que biere)
+sur des ventes synthétiques ou enregistrées, aussi vite que le CPU le permet.
+
+Exemples (depuis la racine du dépôt):
+    python simulation.py --ticks 960 --sortie ohlc.csv
+    python simulation.py --ventes soiree.csv --sortie ohlc.parquet
+    python simulation.py --alpha 0.01 0.02 0.03 --echelle 0.8 1 1.2 --runs 100 --jobs 8
+"""
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from catalogue import CATALOGUE
+from market_engine import MarketEngine
+
+TICK_SECONDS = 15
+TICKS_PAR_BOUGIE = 4
+
+
+def ventes_synthetiques(n_bieres, ticks, seed=None, max_par_tick=2):
+    """Deltas de ventes par tick, uniformes dans [0, max_par_tick] (l'ancien `randint(0,2)`)."""
+    rng = np.random.default_rng(seed)
+    for _ in range(ticks):
+        yield rng.integers(0, max_par_tick + 1, size=n_bieres)
+
+
+def ventes_enregistrees(path, noms):
+    """
+    Deltas de ventes depuis un enregistrement de compteurs cumulés:
+      - CSV: une colonne par bière (nom en en-tête), une ligne par tick;
+      - journal du marché (market_journal), ordre des bières de l'enregistrement.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            lignes = csv.DictReader(f)
+            cumuls = (np.array([int(float(row.get(n) or 0)) for n in noms]) for row in lignes)
+            yield from _deltas(cumuls, len(noms))
+    else:
+        from market_journal import read_journal
+        yield from _deltas((r[4] for r in read_journal(path)), len(noms))
+
+
+def _deltas(cumuls, n):
+    precedent = np.zeros(n, dtype=np.int64)
+    for cumul in cumuls:
+        cumul = np.asarray(cumul, dtype=np.int64)[:n]
+        c = np.zeros(n, dtype=np.int64)
+        c[:len(cumul)] = cumul
+        yield np.maximum(c - precedent, 0)
+        precedent = c
+
+
+def simule(prix_ini, ventes, alpha=0.02, seed=None, ticks_par_bougie=TICKS_PAR_BOUGIE):
+    """
+    Fait tourner le marché sur l'itérable `ventes` (un vecteur de deltas par tick).
+    Même séquence que les tâches planifiées de hh_bourse_v2: nouvelle bougie tous
+    les `ticks_par_bougie` ticks (ouverte au prix courant), puis mise à jour H/L/C.
+    Retourne (ohlc[n_bougies, n_bieres, 4], n_ticks).
+    """
+    moteur = MarketEngine(prix_ini, alpha=alpha, seed=seed)
+    bougies = []
+    courante = None
+    k = -1
+    for k, delta in enumerate(ventes):
+        if k % ticks_par_bougie == 0:
+            courante = np.repeat(moteur.prix[:, None], 4, axis=1)
+            bougies.append(courante)
+        p = moteur.applique(delta)
+        np.maximum(courante[:, 1], p, out=courante[:, 1])
+        np.minimum(courante[:, 2], p, out=courante[:, 2])
+        courante[:, 3] = p
+    ohlc = np.stack(bougies) if bougies else np.empty((0, len(moteur.prix), 4))
+    return ohlc, k + 1
+
+
+def vers_dataframe(ohlc, noms, debut=None, ticks_par_bougie=TICKS_PAR_BOUGIE):
+    """Format long: une ligne par (bougie, bière), index temporel simulé."""
+    debut = debut or datetime(2000, 1, 1, 20)
+    pas = timedelta(seconds=TICK_SECONDS * ticks_par_bougie)
+    n_bougies, n_bieres, _ = ohlc.shape
+    temps = [debut + i * pas for i in range(n_bougies)]
+    return pd.DataFrame({
+        "t": np.repeat(temps, n_bieres),
+        "biere": np.tile(noms, n_bougies),
+        "Open": ohlc[:, :, 0].ravel(),
+        "High": ohlc[:, :, 1].ravel(),
+        "Low": ohlc[:, :, 2].ravel(),
+        "Close": ohlc[:, :, 3].ravel(),
+    })
+
+
+def ecrit(df, path):
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)   # nécessite pyarrow ou fastparquet
+    else:
+        df.to_csv(path, index=False)
+
+
+def _un_run(args):
+    """Un run de balayage; retourne un résumé (pour des milliers de runs en parallèle)."""
+    alpha, echelle, run, ticks, seed = args
+    prix_ini = np.array([c[0] for c in CATALOGUE]) * echelle
+    n = len(prix_ini)
+    ohlc, _ = simule(prix_ini, ventes_synthetiques(n, ticks, seed=seed), alpha=alpha, seed=seed + 1)
+    close = ohlc[-1, :, 3]
+    return {
+        "alpha": alpha, "echelle": echelle, "run": run,
+        "prix_moyen_fin": float(close.mean()),
+        "prix_min": float(ohlc[:, :, 2].min()),
+        "prix_max": float(ohlc[:, :, 1].max()),
+        "ecart_fin": float(close.std()),
+    }
+
+
+def balayage(alphas, echelles, runs, ticks, jobs=None, seed=0):
+    grille = [(a, e, r, ticks, seed + 2 * i)
+              for i, (a, e, r) in enumerate(itertools.product(alphas, echelles, range(runs)))]
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        return pd.DataFrame(ex.map(_un_run, grille, chunksize=max(1, len(grille) // (4 * (jobs or os.cpu_count() or 1)))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=960, help="ticks de 15 s (960 = 4 h)")
+    parser.add_argument("--ventes", help="CSV de compteurs cumulés ou journal à rejouer")
+    parser.add_argument("--alpha", type=float, nargs="+", default=[0.02])
+    parser.add_argument("--echelle", type=float, nargs="+", default=[1.0],
+                        help="facteur appliqué aux prix de départ du catalogue")
+    parser.add_argument("--runs", type=int, default=1, help="runs par combinaison (balayage)")
+    parser.add_argument("--jobs", type=int, default=None, help="process pour le balayage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sortie", help="fichier .csv ou .parquet")
+    args = parser.parse_args()
+
+    noms = [c[1] for c in CATALOGUE]
+    if len(args.alpha) > 1 or len(args.echelle) > 1 or args.runs > 1:
+        t0 = time.perf_counter()
+        res = balayage(args.alpha, args.echelle, args.runs, args.ticks, jobs=args.jobs, seed=args.seed)
+        dt = time.perf_counter() - t0
+        print(f"{len(res)} simulations x {args.ticks} ticks en {dt:.1f} s "
+              f"({len(res) * args.ticks / dt:,.0f} ticks/s)")
+        print(res.groupby(["alpha", "echelle"])[["prix_moyen_fin", "prix_min", "prix_max"]].mean())
+        if args.sortie:
+            ecrit(res, args.sortie)
+        return
+
+    prix_ini = np.array([c[0] for c in CATALOGUE]) * args.echelle[0]
+    if args.ventes:
+        ventes = ventes_enregistrees(args.ventes, noms)
+    else:
+        ventes = ventes_synthetiques(len(noms), args.ticks, seed=args.seed)
+    t0 = time.perf_counter()
+    ohlc, n_ticks = simule(prix_ini, ventes, alpha=args.alpha[0], seed=args.seed + 1)
+    dt = time.perf_counter() - t0
+    print(f"{n_ticks} ticks, {len(noms)} bières en {dt * 1000:.1f} ms ({n_ticks / dt:,.0f} ticks/s)")
+    if args.sortie:
+        ecrit(vers_dataframe(ohlc, noms), args.sortie)
+        print(f"OHLC écrit dans {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
+# =================== /Simulation ===================================================
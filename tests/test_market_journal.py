@@ -0,0 +1,151 @@
+"""
+Reprise du journal du marché: crash au milieu d'un record, fin de fichier tronquée,
+segments compactés par les snapshots, nouvelle soirée (archive et journal trop vieux).
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hh_bourse_v2 as app
+from catalogue import CATALOGUE
+from market_journal import MarketJournal, segments
+
+
+def _bieres():
+    l_bieres = [app.biere(*infos, None) for infos in CATALOGUE[:4]]
+    for i, b in enumerate(l_bieres):
+        b.liste_b(l_bieres[:i] + l_bieres[i+1:])
+    return l_bieres
+
+
+def _etat(l_bieres):
+    return [(b.prix, b.h_ventes[-1], len(b.bougies), tuple(b.bougies.last()[1:5])) for b in l_bieres]
+
+
+def _soiree(path, ticks, snapshot_every=240):
+    """Fait tourner un marché `ticks` ticks (une bougie tous les 4) sans fermer le journal."""
+    l_bieres = _bieres()
+    journal = MarketJournal(path, fsync="never", snapshot_every=snapshot_every)
+    journal.recover(l_bieres)
+    journal.open()
+    cumul = {b.nom: 0 for b in l_bieres}
+    for t in range(ticks):
+        if t % 4 == 3:
+            app.tache_bougie(l_bieres, journal)
+        else:
+            cumul = {nom: v + (t + k) % 3 for k, (nom, v) in enumerate(cumul.items())}
+            app.applique_ventes(l_bieres, cumul, None, journal)
+    return l_bieres, journal
+
+
+def _reprise(path, **kw):
+    l_bieres = _bieres()
+    journal = MarketJournal(path, **kw)
+    return l_bieres, journal.recover(l_bieres), journal
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "bourse.journal")
+
+
+def test_reprise_apres_crash_au_milieu_d_un_record(path):
+    l_bieres, journal = _soiree(path, 10)
+    attendu = _etat(l_bieres)
+    # Le process meurt pendant le write() du tick suivant: seul un bout du record est là
+    _, seg = segments(path)[-1]
+    taille = os.path.getsize(seg)
+    with open(seg, "ab") as f:
+        f.write(b"\x40\x01\x00\x00\x12\x34")
+    journal._jobs.put(StopIteration)
+
+    repris, n, journal = _reprise(path)
+    assert n == 10
+    assert _etat(repris) == attendu
+    assert os.path.getsize(seg) == taille
+    # On réécrit derrière le dernier record complet
+    journal.open()
+    journal.log_tick(repris)
+    journal.close()
+    assert _reprise(path)[1] == 11
+
+
+def test_reprise_fin_de_fichier_tronquee(path):
+    l_bieres, journal = _soiree(path, 9)
+    avant_dernier = _etat(l_bieres)
+    app.applique_ventes(l_bieres, {b.nom: b.h_ventes[-1] + 5 for b in l_bieres}, None, journal)
+    journal._jobs.put(StopIteration)
+    _, seg = segments(path)[-1]
+    with open(seg, "r+b") as f:
+        f.truncate(os.path.getsize(seg) - 7)
+
+    repris, n, _ = _reprise(path)
+    assert n == 9
+    assert _etat(repris) == avant_dernier
+
+
+def test_snapshots_compactent_le_journal(path):
+    l_bieres, journal = _soiree(path, 23, snapshot_every=5)
+    attendu = _etat(l_bieres)
+    journal.close()
+    # 4 snapshots: seul le segment ouvert par le dernier reste, avec 3 ticks
+    assert [n for n, _ in segments(path)] == [5]
+    repris, n, _ = _reprise(path)
+    assert n == 3
+    assert _etat(repris) == attendu
+
+
+def test_reprise_avant_la_fin_du_snapshot(path):
+    # Crash après l'ouverture d'un segment, avant que son snapshot soit écrit:
+    # l'ancien snapshot et l'ancien segment suffisent
+    l_bieres, journal = _soiree(path, 7, snapshot_every=5)
+    fin = time.monotonic() + 5
+    while [n for n, _ in segments(path)] != [2] and time.monotonic() < fin:
+        time.sleep(0.01)   # le thread du journal écrit le 1er snapshot
+    assert [n for n, _ in segments(path)] == [2]
+    journal._write_snapshot = lambda data, ancien: ancien.flush()
+    for _ in range(7):
+        app.applique_ventes(l_bieres, {b.nom: b.h_ventes[-1] + 1 for b in l_bieres}, None, journal)
+    journal.close()
+    assert [n for n, _ in segments(path)] == [2, 3]
+
+    repris, n, _ = _reprise(path)
+    assert n == 9
+    assert _etat(repris) == _etat(l_bieres)
+
+
+def test_nouvelle_soiree(path):
+    _, journal = _soiree(path, 10, snapshot_every=4)
+    journal.close()
+    journal = MarketJournal(path)
+    cible = journal.archive()
+    assert journal.fichiers() == []
+    assert sorted(os.listdir(cible)) == ["bourse.journal.000003", "bourse.journal.snap.npz"]
+
+    neuves = _etat(_bieres())
+    repris, n, journal = _reprise(path)
+    assert n == 0
+    assert [e[:3] for e in _etat(repris)] == [e[:3] for e in neuves]
+    journal.open()
+    journal.close()
+    assert [n for n, _ in segments(path)] == [1]
+
+
+def test_journal_trop_vieux_pas_repris(path):
+    _, journal = _soiree(path, 10)
+    journal.close()
+    hier = time.time() - 20 * 3600
+    for f in MarketJournal(path).fichiers():
+        os.utime(f, (hier, hier))
+
+    repris, n, journal = _reprise(path, max_age=6 * 3600)
+    assert n == 0
+    assert repris[0].h_ventes[-1] == 0
+    assert journal.fichiers() == []
+    assert os.listdir(path + ".archives")
@@ -0,0 +1,88 @@
+"""
+Prise de commandes locale: dédoublonnage par order_id, lot annulé sur une commande
+invalide, relevé Sheets synchronisé une seule fois (même après redémarrage), et
+réponses JSON de l'endpoint HTTP aux commandes mal formées.
+
+    python -m pytest -q tests
+"""
+import http.client
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sales_intake import OrderStore, SalesIntakeServer
+
+NOMS = ["Corona", "Leffe"]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "commandes.sqlite")
+
+
+def test_add_many_rejoue_sans_doubler(db):
+    store = OrderStore(db, noms=NOMS)
+    lot = [{"order_id": "a1", "biere": "Corona", "qte": 2}, {"order_id": "a2", "biere": "Leffe"}]
+    assert store.add_many(lot) == (2, 0)
+    assert store.add_many(lot) == (0, 2)
+    assert store.add_many(lot + [{"order_id": "a3", "biere": "Leffe"}]) == (1, 2)
+    assert store.cumuls() == {"Corona": 2, "Leffe": 2}
+    assert store.doublons == 4
+    store.close()
+    assert OrderStore(db, noms=NOMS).cumuls() == {"Corona": 2, "Leffe": 2}
+
+
+@pytest.mark.parametrize("mauvaise", [
+    {"order_id": "b2", "biere": "Kwak"},
+    {"order_id": "b2", "biere": ["Corona"]},
+    {"order_id": "b2", "biere": "Corona", "qte": 0},
+    {"order_id": "b2", "biere": "Corona", "qte": 2 ** 70},
+    {"order_id": "b2", "biere": "Corona", "ts": {}},
+    {"order_id": "b2", "biere": "Corona", "ts": float("nan")},
+    {"biere": "Corona"},
+])
+def test_lot_annule_sur_une_commande_invalide(db, mauvaise):
+    store = OrderStore(db, noms=NOMS)
+    with pytest.raises(ValueError):
+        store.add_many([{"order_id": "b1", "biere": "Corona"}, mauvaise])
+    assert store.cumuls() == {}
+    # Rien n'a été écrit: b1 est encore nouvelle
+    assert store.add("b1", "Corona")
+
+
+def test_synchronise_idempotent_et_apres_redemarrage(db):
+    store = OrderStore(db, noms=NOMS)
+    store.add("c1", "Corona", 2)
+    assert store.synchronise("sheets", {"Corona": 3, "Leffe": 1}) == 2
+    assert store.synchronise("sheets", {"Corona": 3, "Leffe": 1}) == 0
+    assert store.cumuls() == {"Corona": 5, "Leffe": 1}
+    store.close()
+
+    store = OrderStore(db, noms=NOMS)
+    assert store.synchronise("sheets", {"Corona": 3, "Leffe": 1}) == 0
+    assert store.synchronise("sheets", {"Corona": 4, "Leffe": 0}) == 1
+    assert store.cumuls() == {"Corona": 6, "Leffe": 1}
+
+
+def test_endpoint_repond_400_aux_commandes_mal_formees():
+    store = OrderStore(noms=NOMS)
+    serveur = SalesIntakeServer(store, host="127.0.0.1", port=0).start()
+    try:
+        def post(corps):
+            conn = http.client.HTTPConnection("127.0.0.1", serveur.port, timeout=5)
+            conn.request("POST", "/commandes", body=json.dumps(corps))
+            r = conn.getresponse()
+            return r.status, json.loads(r.read())
+
+        for corps in ({"order_id": "a5", "biere": ["x"]},
+                      {"order_id": "a6", "biere": "Corona", "ts": {}},
+                      {"order_id": "a7", "biere": "Corona", "qte": 2 ** 70}):
+            status, reponse = post(corps)
+            assert status == 400 and "erreur" in reponse
+        assert post({"order_id": "a8", "biere": "Corona"}) == (200, {"nouvelles": 1, "doublons": 0})
+    finally:
+        serveur.stop()
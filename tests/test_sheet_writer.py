@@ -0,0 +1,71 @@
+"""
+Écriture différée de l'OHLC: les erreurs passagères (429, 5xx, réseau) remettent
+le lot en file, une erreur définitive (4xx) l'abandonne sans bloquer la suite, et
+la feuille est élargie quand les bougies atteignent sa dernière colonne.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_sheet import FakeAPIError, FakeWorksheet
+from sales_ingestion import a1_to_rowcol
+from sheet_writer import SheetWriteBehind
+
+
+class _Feuille(FakeWorksheet):
+    """Feuille en mémoire qui lève les erreurs de `erreurs` aux prochains batch_update."""
+
+    def __init__(self, erreurs=(), col_count=None):
+        super().__init__()
+        self.erreurs = list(erreurs)
+        if col_count is not None:
+            self.col_count = col_count
+
+    def batch_update(self, data, **kw):
+        if self.erreurs:
+            raise self.erreurs.pop(0)
+        fin = [a1_to_rowcol(d["range"].split(":")[-1]) for d in data]
+        if hasattr(self, "col_count") and any(c > self.col_count for _, c in fin):
+            raise FakeAPIError(400, "exceeds grid limits")
+        return super().batch_update(data, **kw)
+
+    def add_cols(self, n):
+        self.appels["add_cols"] += 1
+        self.col_count += n
+
+
+@pytest.mark.parametrize("erreur", [FakeAPIError(429), FakeAPIError(503), ConnectionError("reset")])
+def test_erreur_passagere_remet_le_lot_en_file(erreur):
+    ws = _Feuille([erreur])
+    ecriture = SheetWriteBehind(ws, par_minute=6000, rafale=10)
+    ecriture.put(1, 2, 1.5)
+    assert not ecriture.flush_once(force=True)
+    assert len(ecriture) == 1
+    assert ecriture.flush_once(force=True)
+    assert ws.cell(1, 2).value == "1.5"
+
+
+def test_erreur_definitive_abandonne_le_lot():
+    ws = _Feuille([FakeAPIError(400, "exceeds grid limits")])
+    ecriture = SheetWriteBehind(ws, par_minute=6000, rafale=10)
+    ecriture.put_many({(1, 2): 1.0, (2, 2): 2.0})
+    assert not ecriture.flush_once(force=True)
+    assert len(ecriture) == 0 and ecriture.abandons == 2
+    # Les écritures suivantes passent
+    ecriture.put(1, 3, 3.0)
+    assert ecriture.flush_once(force=True)
+    assert ws.cell(1, 3).value == "3.0"
+
+
+def test_feuille_elargie_au_bord():
+    ws = _Feuille(col_count=26)
+    ecriture = SheetWriteBehind(ws, par_minute=6000, rafale=10)
+    ecriture.put_many({(r, 27): float(r) for r in range(1, 5)})
+    assert ecriture.flush_once(force=True)
+    assert ws.col_count > 27 and ws.appels["add_cols"] == 1
+    assert ws.cell(4, 27).value == "4.0"